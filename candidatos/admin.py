@@ -2,7 +2,9 @@ from django.contrib import admin
 from .models import (
     Empresa, Sede, Supervisor, Candidato, Proceso, RegistroAsistencia, 
     DatosCualificacion, ComentarioProceso, RegistroTest, DocumentoCandidato,
-    TipoDocumento, MensajePlantilla, TareaEnvioMasivo, DetalleEnvio
+    TipoDocumento, MensajePlantilla, TareaEnvioMasivo, DetalleEnvio,
+    ProcesoTransicion, ResumenEmbudoDiario, CupoEnvioWhatsApp, ResumenMensajeriaCandidato,
+    SugerenciaFusionCandidato
 )
 from django.utils.html import format_html
 
@@ -30,6 +32,16 @@ class RegistroAsistenciaInline(admin.TabularInline):
     fields = ('momento_registro', 'fase_actual', 'movimiento', 'estado')
     readonly_fields = ('momento_registro',)
 
+class ProcesoTransicionInline(admin.TabularInline):
+    model = ProcesoTransicion
+    extra = 0
+    can_delete = False
+    fields = ('fecha', 'estado_anterior', 'estado_nuevo', 'usuario', 'permanencia_segundos')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Candidato)
 class CandidatoAdmin(admin.ModelAdmin):
     list_display = ('tipo_documento','DNI', 'nombres_completos','edad', 'estado_actual', 'telefono_whatsapp','email','fecha_registro','usuario_ultima_modificacion')
@@ -71,7 +83,17 @@ class ProcesoAdmin(admin.ModelAdmin):
         }),
     )
     
-    inlines = [RegistroAsistenciaInline] 
+    inlines = [RegistroAsistenciaInline, ProcesoTransicionInline]
+
+    def save_model(self, request, obj, form, change):
+        obj.usuario_transicion = request.user
+        super().save_model(request, obj, form, change)
+
+@admin.register(ResumenEmbudoDiario)
+class ResumenEmbudoDiarioAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'sede', 'empresa', 'estado', 'entradas', 'salidas', 'avances', 'mediana_permanencia_segundos')
+    list_filter = ('empresa', 'sede', 'estado')
+    date_hierarchy = 'fecha'
 
 @admin.register(RegistroAsistencia)
 class RegistroAsistenciaAdmin(admin.ModelAdmin):
@@ -334,7 +356,7 @@ class TareaEnvioMasivoAdmin(admin.ModelAdmin):
     """Administración de las tareas de envío (Historial de Campañas)."""
     list_display = (
         '__str__', 'fecha_inicio', 'proceso_tipo', 'fecha_origen', 
-        'total_contactos', 'total_entregados', 'estado', 'mostrar_tasa_exito'
+        'total_contactos', 'total_entregados', 'estado', 'fecha_estimada_fin', 'mostrar_tasa_exito'
     )
     list_filter = ('estado', 'proceso_tipo', 'fecha_origen', 'fecha_inicio', 'usuario_que_envia')
     search_fields = ('mensaje_plantilla__titulo', 'usuario_que_envia__username', 'task_id')
@@ -344,7 +366,8 @@ class TareaEnvioMasivoAdmin(admin.ModelAdmin):
     
     readonly_fields = (
         'fecha_inicio', 'usuario_que_envia', 'total_contactos', 
-        'total_entregados', 'total_fallidos', 'task_id', 'mostrar_tasa_exito'
+        'total_entregados', 'total_fallidos', 'task_id', 'mostrar_tasa_exito',
+        'destinatarios', 'reanudar_en', 'fecha_estimada_fin'
     )
 
     def mostrar_tasa_exito(self, obj):
@@ -357,12 +380,57 @@ class TareaEnvioMasivoAdmin(admin.ModelAdmin):
     mostrar_tasa_exito.short_description = 'Tasa de Éxito'
 
 
+@admin.register(CupoEnvioWhatsApp)
+class CupoEnvioWhatsAppAdmin(admin.ModelAdmin):
+    list_display = ('phone_id', 'tasa_por_segundo', 'capacidad', 'limite_diario', 'dia', 'enviados_dia')
+    readonly_fields = ('tokens', 'tokens_actualizados', 'dia', 'enviados_dia')
+
+
+@admin.register(ResumenMensajeriaCandidato)
+class ResumenMensajeriaCandidatoAdmin(admin.ModelAdmin):
+    list_display = ('candidato', 'telefono_e164', 'telefono_valido', 'opt_out', 'envios_exitosos', 'envios_fallidos', 'ultimo_envio', 'ultima_lectura')
+    list_filter = ('telefono_valido', 'opt_out')
+    search_fields = ('candidato__DNI', 'candidato__nombres_completos', 'telefono_e164')
+    readonly_fields = ('candidato', 'telefono_e164', 'telefono_valido', 'envios_exitosos', 'envios_fallidos', 'ultimo_envio', 'ultima_lectura')
+
+
+
+@admin.register(SugerenciaFusionCandidato)
+class SugerenciaFusionCandidatoAdmin(admin.ModelAdmin):
+    list_display = ('candidato_a', 'candidato_b', 'puntaje', 'motivos', 'estado', 'revisado_por', 'fecha_actualizacion')
+    list_filter = ('estado',)
+    search_fields = ('candidato_a__DNI', 'candidato_a__nombres_completos', 'candidato_b__DNI', 'candidato_b__nombres_completos')
+    list_select_related = ('candidato_a', 'candidato_b', 'revisado_por')
+    readonly_fields = ('candidato_a', 'candidato_b', 'puntaje', 'motivos', 'revisado_por', 'fecha_creacion', 'fecha_actualizacion')
+    ordering = ('estado', '-puntaje')
+    actions = ['marcar_descartado', 'marcar_fusionado']
+
+    def _marcar(self, request, queryset, estado):
+        actualizadas = queryset.update(estado=estado, revisado_por=request.user)
+        self.message_user(request, f"{actualizadas} sugerencias actualizadas.")
+
+    @admin.action(description="Marcar como 'No es duplicado'")
+    def marcar_descartado(self, request, queryset):
+        self._marcar(request, queryset, 'DESCARTADO')
+
+    @admin.action(description="Marcar como fusionado")
+    def marcar_fusionado(self, request, queryset):
+        self._marcar(request, queryset, 'FUSIONADO')
+
+    def save_model(self, request, obj, form, change):
+        obj.revisado_por = request.user
+        super().save_model(request, obj, form, change)
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(DetalleEnvio)
 class DetalleEnvioAdmin(admin.ModelAdmin):
     """Administración de los detalles individuales de cada mensaje."""
     list_display = ('tarea_envio', 'contacto', 'telefono', 'estado_meta', 'fecha_envio', 'id_mensaje_meta')
     list_filter = ('estado_meta', 'fecha_envio', 'tarea_envio__proceso_tipo')
-    search_fields = ('contacto__DNI', 'telefono', 'id_mensaje_meta', 'contenido_final')
+    search_fields = ('contacto__DNI', 'telefono', 'id_mensaje_meta')
     date_hierarchy = 'fecha_envio'
     
     fieldsets = (
@@ -370,12 +438,12 @@ class DetalleEnvioAdmin(admin.ModelAdmin):
             'fields': ('tarea_envio', 'contacto', 'telefono'),
         }),
         ('Contenido y Estado', {
-            'fields': ('contenido_final', 'estado_meta', 'id_mensaje_meta', 'fecha_envio'),
+            'fields': ('contenido_final', 'cuerpo', 'variables', 'estado_meta', 'id_mensaje_meta', 'fecha_envio'),
         }),
     )
     
     readonly_fields = (
-        'tarea_envio', 'contacto', 'telefono', 'contenido_final', 
+        'tarea_envio', 'contacto', 'telefono', 'contenido_final', 'cuerpo', 'variables', 
         'estado_meta', 'id_mensaje_meta', 'fecha_envio'
     )
 
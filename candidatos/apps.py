@@ -5,3 +5,7 @@ class CandidatosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'candidatos'
     
+
+    def ready(self):
+        # Conecta las señales que invalidan el mapa del kiosko.
+        from .utils import kiosko  # noqa: F401
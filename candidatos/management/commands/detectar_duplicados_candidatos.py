@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from candidatos.utils.duplicados import UMBRAL_SUGERENCIA, detectar_duplicados
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca candidatos que probablemente son la misma persona (mismo teléfono, mismo nombre "
+        "normalizado o DNI a un dígito de distancia) y guarda SugerenciaFusionCandidato."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dni',
+            nargs='*',
+            help='DNI de los candidatos a revisar (por defecto, toda la tabla).',
+        )
+        parser.add_argument(
+            '--umbral',
+            type=int,
+            default=UMBRAL_SUGERENCIA,
+            help=f'Puntaje mínimo (0-100) para sugerir la fusión (por defecto {UMBRAL_SUGERENCIA}).',
+        )
+
+    def handle(self, *args, **options):
+        creadas, actualizadas, borradas = detectar_duplicados(options['dni'] or None, umbral=options['umbral'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sugerencias de fusión: {creadas} nuevas, {actualizadas} actualizadas, {borradas} obsoletas borradas"
+        ))
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from candidatos.models import Sede, TipoDocumento
+from candidatos.utils.importacion import IMPORTACION_CHUNK, ArchivoInvalido, ImportacionCandidatos, leer_lotes
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea o actualiza candidatos (por DNI) desde un CSV o XLSX con columnas DNI, "
+        "nombres_completos y telefono_whatsapp (opcionales: email, distrito, edad)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx.')
+        parser.add_argument(
+            '--sede',
+            type=int,
+            required=True,
+            help='ID de la sede de registro para los candidatos nuevos.',
+        )
+        parser.add_argument(
+            '--tipo-documento',
+            type=int,
+            default=1,
+            help='ID del tipo de documento para los candidatos nuevos (por defecto 1, DNI).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='No escribe nada: muestra las altas (+), cambios (~), duplicados (?) y errores (!).',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=IMPORTACION_CHUNK,
+            help=f'Filas procesadas por transacción (por defecto {IMPORTACION_CHUNK}).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sede = Sede.objects.get(pk=options['sede'])
+        except Sede.DoesNotExist:
+            raise CommandError(f"No existe la sede con ID {options['sede']}.")
+        try:
+            tipo_documento = TipoDocumento.objects.get(pk=options['tipo_documento'])
+        except TipoDocumento.DoesNotExist:
+            raise CommandError(f"No existe el tipo de documento con ID {options['tipo_documento']}.")
+
+        simular = options['dry_run']
+        importacion = ImportacionCandidatos(
+            sede, tipo_documento, simular=simular,
+            al_cambiar=self.stdout.write if simular else None,
+        )
+
+        inicio = time.monotonic()
+        try:
+            for lote in leer_lotes(options['archivo'], max(options['chunk'], 1)):
+                importacion.procesar(lote)
+        except (ArchivoInvalido, OSError) as e:
+            raise CommandError(str(e))
+
+        if simular:
+            self.stdout.write(self.style.WARNING("Simulación (--dry-run): no se guardó ningún cambio."))
+        for etiqueta, valor in importacion.resumen().items():
+            self.stdout.write(f"{etiqueta}: {valor}")
+        self.stdout.write(self.style.SUCCESS(f"Importación finalizada en {time.monotonic() - inicio:.1f} s"))
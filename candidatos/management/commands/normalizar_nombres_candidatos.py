@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from candidatos.models import Candidato
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula Candidato.nombre_normalizado (nombre sin tildes ni mayúsculas, palabras "
+        "ordenadas) usado para detectar duplicados. Necesario tras cargas o UPDATE masivos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dni',
+            nargs='*',
+            help='DNI de los candidatos a recalcular (por defecto, todos).',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=2000,
+            help='Cantidad de candidatos actualizados por consulta (por defecto 2000).',
+        )
+
+    def handle(self, *args, **options):
+        total = Candidato.normalizar_nombres(options['dni'] or None, lote=max(options['chunk'], 1))
+        self.stdout.write(self.style.SUCCESS(f"Nombres normalizados actualizados: {total}"))
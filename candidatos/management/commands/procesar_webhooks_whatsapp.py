@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from candidatos.utils.webhook_whatsapp import procesar_eventos_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica a DetalleEnvio y TareaEnvioMasivo los eventos del webhook de WhatsApp que "
+        "sigan en cola (programar en cron; cubre reinicios y estados que llegaron antes que su envío)."
+    )
+
+    def handle(self, *args, **options):
+        total = procesar_eventos_pendientes()
+        self.stdout.write(self.style.SUCCESS(f"Eventos procesados: {total}"))
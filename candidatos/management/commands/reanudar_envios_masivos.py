@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from candidatos.utils.envios import reanudar_envios_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Reanuda las campañas de WhatsApp pausadas por el cupo diario de Meta cuyo "
+        "`reanudar_en` ya pasó (programar en cron; cubre reinicios del servidor)."
+    )
+
+    def handle(self, *args, **options):
+        reanudadas = reanudar_envios_pendientes(en_segundo_plano=False)
+        self.stdout.write(self.style.SUCCESS(f"Campañas reanudadas: {len(reanudadas)} {reanudadas or ''}"))
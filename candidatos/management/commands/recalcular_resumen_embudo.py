@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from candidatos.utils.embudo import recalcular_resumen_dia
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera ResumenEmbudoDiario (entradas, salidas, conversión y mediana de "
+        "permanencia por sede, empresa y estado) a partir de ProcesoTransicion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Fecha inicial YYYY-MM-DD (por defecto, ayer).',
+        )
+        parser.add_argument(
+            '--hasta',
+            help='Fecha final YYYY-MM-DD, inclusive (por defecto, hoy).',
+        )
+
+    def _fecha(self, valor, por_defecto):
+        if not valor:
+            return por_defecto
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {valor} (debe ser YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        hoy = timezone.localdate()
+        desde = self._fecha(options['desde'], hoy - timedelta(days=1))
+        hasta = self._fecha(options['hasta'], hoy)
+
+        if desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta.")
+
+        total = 0
+        fecha = desde
+        while fecha <= hasta:
+            total += recalcular_resumen_dia(fecha)
+            fecha += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Filas de resumen escritas: {total} ({desde} a {hasta})"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from candidatos.models import ResumenMensajeriaCandidato
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera ResumenMensajeriaCandidato (teléfono E.164, envíos exitosos/fallidos, último "
+        "envío y última lectura) a partir de Candidato y DetalleEnvio, conservando las bajas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dni',
+            nargs='*',
+            help='DNI de los candidatos a recalcular (por defecto, todos).',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=2000,
+            help='Cantidad de candidatos reescritos por transacción (por defecto 2000).',
+        )
+
+    def handle(self, *args, **options):
+        total = ResumenMensajeriaCandidato.recalcular(options['dni'] or None, lote=max(options['chunk'], 1))
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes de mensajería escritos: {total}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from candidatos.models import Candidato, TokenBusquedaCandidato
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera TokenBusquedaCandidato (palabras normalizadas del nombre, DNI y teléfono) "
+        "para la búsqueda por prefijo. Necesario tras cargas o UPDATE masivos de candidatos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dni',
+            nargs='*',
+            help='DNI de los candidatos a reindexar (por defecto, todos).',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=2000,
+            help='Cantidad de candidatos reindexados por transacción (por defecto 2000).',
+        )
+
+    def handle(self, *args, **options):
+        candidatos = Candidato.objects.order_by('pk')
+        if options['dni']:
+            candidatos = candidatos.filter(pk__in=options['dni'])
+
+        chunk = max(options['chunk'], 1)
+        total = 0
+        lote = []
+        for fila in candidatos.values_list('DNI', 'nombres_completos', 'telefono_whatsapp').iterator(chunk_size=chunk):
+            lote.append(fila)
+            if len(lote) >= chunk:
+                total += TokenBusquedaCandidato.indexar(lote)
+                lote = []
+        if lote:
+            total += TokenBusquedaCandidato.indexar(lote)
+
+        self.stdout.write(self.style.SUCCESS(f"Candidatos reindexados: {total}"))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from candidatos.models import Candidato, Proceso
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el puntero desnormalizado Candidato.proceso_actual (y las copias de "
+        "estado, empresa y supervisor) a partir de la tabla de procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo informa cuántos candidatos están desincronizados, sin escribir.',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=2000,
+            help='Cantidad de candidatos actualizados por transacción (por defecto 2000).',
+        )
+
+    def _desincronizados(self):
+        ultimo = Proceso.objects.filter(candidato=OuterRef('pk')).order_by('-fecha_inicio', '-pk')
+
+        return Candidato.objects.annotate(
+            esperado_id=Subquery(ultimo.values('pk')[:1]),
+            esperado_estado=Subquery(ultimo.values('estado')[:1]),
+            esperado_empresa=Subquery(ultimo.values('empresa_proceso')[:1]),
+            esperado_supervisor=Subquery(ultimo.values('supervisor')[:1]),
+        ).exclude(
+            Q(proceso_actual=F('esperado_id')) | Q(proceso_actual__isnull=True, esperado_id__isnull=True),
+            Q(proceso_actual_estado=F('esperado_estado')) | Q(proceso_actual_estado__isnull=True, esperado_estado__isnull=True),
+            Q(proceso_actual_empresa=F('esperado_empresa')) | Q(proceso_actual_empresa__isnull=True, esperado_empresa__isnull=True),
+            Q(proceso_actual_supervisor=F('esperado_supervisor')) | Q(proceso_actual_supervisor__isnull=True, esperado_supervisor__isnull=True),
+        )
+
+    def handle(self, *args, **options):
+        pendientes = list(self._desincronizados().values_list('pk', flat=True))
+
+        self.stdout.write(f"Candidatos desincronizados: {len(pendientes)}")
+
+        if options['check'] or not pendientes:
+            return
+
+        chunk = max(options['chunk'], 1)
+        actualizados = 0
+
+        for inicio in range(0, len(pendientes), chunk):
+            with transaction.atomic():
+                actualizados += Candidato.sincronizar_proceso_actual(pendientes[inicio:inicio + chunk])
+
+        self.stdout.write(self.style.SUCCESS(f"Candidatos reparados: {actualizados}"))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def poblar_proceso_actual(apps, schema_editor):
+    Candidato = apps.get_model('candidatos', 'Candidato')
+    Proceso = apps.get_model('candidatos', 'Proceso')
+
+    ultimo = Proceso.objects.filter(candidato=OuterRef('pk')).order_by('-fecha_inicio', '-pk')
+    Candidato.objects.update(
+        proceso_actual=Subquery(ultimo.values('pk')[:1]),
+        proceso_actual_estado=Subquery(ultimo.values('estado')[:1]),
+        proceso_actual_empresa=Subquery(ultimo.values('empresa_proceso')[:1]),
+        proceso_actual_supervisor=Subquery(ultimo.values('supervisor')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0029_alter_comentarioproceso_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidato',
+            name='proceso_actual',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Proceso más reciente del candidato (por fecha de inicio).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='candidatos.proceso'),
+        ),
+        migrations.AddField(
+            model_name='candidato',
+            name='proceso_actual_empresa',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Copia de la empresa del proceso actual.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='candidatos.empresa'),
+        ),
+        migrations.AddField(
+            model_name='candidato',
+            name='proceso_actual_estado',
+            field=models.CharField(blank=True, editable=False, help_text='Copia del estado del proceso actual.', max_length=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='candidato',
+            name='proceso_actual_supervisor',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Copia del supervisor del proceso actual.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='candidatos.supervisor'),
+        ),
+        migrations.RunPython(poblar_proceso_actual, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0030_candidato_proceso_actual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcesoTransicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(blank=True, choices=[('CONVOCADO', 'Convocado'), ('CONFIRMADO', 'Confirmado'), ('TEORIA', 'Capacitación Teórica'), ('PRACTICA', 'Capacitación Práctica'), ('CONTRATADO', 'Contratado'), ('NO_APTO', 'No Apto (No cumple pruebas/objetivos)'), ('ABANDONO', 'Abandono/Deserción')], max_length=15, null=True)),
+                ('estado_nuevo', models.CharField(choices=[('CONVOCADO', 'Convocado'), ('CONFIRMADO', 'Confirmado'), ('TEORIA', 'Capacitación Teórica'), ('PRACTICA', 'Capacitación Práctica'), ('CONTRATADO', 'Contratado'), ('NO_APTO', 'No Apto (No cumple pruebas/objetivos)'), ('ABANDONO', 'Abandono/Deserción')], max_length=15)),
+                ('fecha', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('permanencia_segundos', models.PositiveIntegerField(blank=True, help_text='Tiempo que el proceso permaneció en el estado anterior.', null=True)),
+                ('proceso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='candidatos.proceso')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transición de Proceso',
+                'verbose_name_plural': 'Transiciones de Proceso',
+                'indexes': [models.Index(fields=['proceso', 'fecha'], name='transicion_proceso_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenEmbudoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('CONVOCADO', 'Convocado'), ('CONFIRMADO', 'Confirmado'), ('TEORIA', 'Capacitación Teórica'), ('PRACTICA', 'Capacitación Práctica'), ('CONTRATADO', 'Contratado'), ('NO_APTO', 'No Apto (No cumple pruebas/objetivos)'), ('ABANDONO', 'Abandono/Deserción')], max_length=15)),
+                ('entradas', models.PositiveIntegerField(default=0, help_text='Procesos que ingresaron al estado ese día.')),
+                ('salidas', models.PositiveIntegerField(default=0, help_text='Procesos que dejaron el estado ese día.')),
+                ('avances', models.PositiveIntegerField(default=0, help_text='Salidas hacia un estado que no es de descarte.')),
+                ('mediana_permanencia_segundos', models.PositiveIntegerField(blank=True, null=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='candidatos.empresa')),
+                ('sede', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='candidatos.sede')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Embudo',
+                'verbose_name_plural': 'Resúmenes Diarios de Embudo',
+                'indexes': [models.Index(fields=['empresa', 'fecha'], name='resumen_embudo_empresa_idx')],
+                'unique_together': {('fecha', 'sede', 'empresa', 'estado')},
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+CONTADOR_POR_ESTADO = {'A': 'asistencias', 'T': 'tardanzas', 'F': 'faltas', 'J': 'justificados'}
+
+
+def poblar_resumen_asistencia(apps, schema_editor):
+    RegistroAsistencia = apps.get_model('candidatos', 'RegistroAsistencia')
+    ResumenAsistenciaDiaria = apps.get_model('candidatos', 'ResumenAsistenciaDiaria')
+
+    resumenes = {}
+    registros = RegistroAsistencia.objects.order_by('momento_registro').values_list(
+        'proceso_id', 'proceso__candidato_id', 'momento_registro', 'fase_actual', 'movimiento', 'estado'
+    )
+
+    for proceso_id, candidato_id, momento, fase, movimiento, estado in registros.iterator(chunk_size=5000):
+        fecha = timezone.localdate(momento) if timezone.is_aware(momento) else momento.date()
+        resumen = resumenes.get((proceso_id, fecha))
+        if resumen is None:
+            resumen = resumenes[(proceso_id, fecha)] = ResumenAsistenciaDiaria(
+                proceso_id=proceso_id, candidato_id=candidato_id, fecha=fecha
+            )
+
+        resumen.registros += 1
+        contador = CONTADOR_POR_ESTADO.get(estado)
+        if contador:
+            setattr(resumen, contador, getattr(resumen, contador) + 1)
+
+        resumen.ultimo_momento = momento
+        resumen.ultima_fase = fase
+        resumen.ultimo_movimiento = movimiento
+        resumen.ultimo_estado = estado or ''
+
+    ResumenAsistenciaDiaria.objects.bulk_create(resumenes.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0031_proceso_transicion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAsistenciaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('registros', models.PositiveIntegerField(default=0)),
+                ('asistencias', models.PositiveIntegerField(default=0)),
+                ('tardanzas', models.PositiveIntegerField(default=0)),
+                ('faltas', models.PositiveIntegerField(default=0)),
+                ('justificados', models.PositiveIntegerField(default=0)),
+                ('ultimo_momento', models.DateTimeField(blank=True, null=True)),
+                ('ultima_fase', models.CharField(blank=True, choices=[('CONVOCADO', 'Convocado'), ('CONFIRMADO', 'Confirmado'), ('TEORIA', 'Capacitación Teórica'), ('PRACTICA', 'Capacitación Práctica (OJT)')], max_length=15)),
+                ('ultimo_movimiento', models.CharField(blank=True, choices=[('ENTRADA', 'Entrada'), ('SALIDA', 'Salida')], max_length=8)),
+                ('ultimo_estado', models.CharField(blank=True, choices=[('A', 'Asistió (Puntual)'), ('T', 'Tardanza'), ('F', 'Faltó'), ('J', 'Justificado')], max_length=1)),
+                ('candidato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_asistencia', to='candidatos.candidato')),
+                ('proceso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_asistencia', to='candidatos.proceso')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Asistencia',
+                'verbose_name_plural': 'Resúmenes Diarios de Asistencia',
+                'indexes': [models.Index(fields=['candidato', 'fecha'], name='resumen_asist_cand_fecha_idx'), models.Index(fields=['fecha', 'ultimo_estado'], name='resumen_asist_fecha_est_idx')],
+                'unique_together': {('proceso', 'fecha')},
+            },
+        ),
+        migrations.RunPython(poblar_resumen_asistencia, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:07
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def poblar_fecha_asistencia(apps, schema_editor):
+    RegistroAsistencia = apps.get_model('candidatos', 'RegistroAsistencia')
+
+    pendientes = []
+    for registro in RegistroAsistencia.objects.only('pk', 'momento_registro').iterator(chunk_size=5000):
+        momento = registro.momento_registro
+        registro.fecha = timezone.localdate(momento) if timezone.is_aware(momento) else momento.date()
+        pendientes.append(registro)
+        if len(pendientes) >= 5000:
+            RegistroAsistencia.objects.bulk_update(pendientes, ['fecha'])
+            pendientes = []
+
+    if pendientes:
+        RegistroAsistencia.objects.bulk_update(pendientes, ['fecha'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0032_resumen_asistencia_diaria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroasistencia',
+            name='fecha',
+            field=models.DateField(blank=True, editable=False, help_text='Fecha local de momento_registro (columna indexable para filtros por día).', null=True),
+        ),
+        migrations.RunPython(poblar_fecha_asistencia, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='candidato',
+            index=models.Index(fields=['estado_actual', 'kanban_activo', 'fecha_registro'], name='candidato_estado_kanban_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detalleenvio',
+            index=models.Index(fields=['contacto', 'estado_meta'], name='detalle_contacto_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proceso',
+            index=models.Index(fields=['fecha_inicio', 'kanban_activo'], name='proceso_fecha_kanban_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proceso',
+            index=models.Index(fields=['candidato', 'estado', 'fecha_inicio'], name='proceso_cand_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroasistencia',
+            index=models.Index(fields=['proceso', 'fecha', 'movimiento'], name='asistencia_proc_fecha_mov_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+CONTADOR_POR_ESTADO = {'A': 'asistencias', 'T': 'tardanzas', 'F': 'faltas', 'J': 'justificados'}
+
+
+def depurar_asistencias_duplicadas(apps, schema_editor):
+    """
+    Antes de la restricción única: conserva la primera ENTRADA y la última SALIDA de cada
+    proceso y día, elimina el resto y reconstruye el resumen diario de esos días.
+    """
+    RegistroAsistencia = apps.get_model('candidatos', 'RegistroAsistencia')
+    ResumenAsistenciaDiaria = apps.get_model('candidatos', 'ResumenAsistenciaDiaria')
+
+    duplicados = (
+        RegistroAsistencia.objects.values('proceso_id', 'fecha', 'movimiento')
+        .annotate(total=Count('pk'))
+        .filter(total__gt=1)
+    )
+
+    afectados = set()
+    for grupo in duplicados:
+        registros = RegistroAsistencia.objects.filter(
+            proceso_id=grupo['proceso_id'], fecha=grupo['fecha'], movimiento=grupo['movimiento']
+        ).order_by('momento_registro', 'pk')
+        ids = list(registros.values_list('pk', flat=True))
+        conservar = ids[0] if grupo['movimiento'] == 'ENTRADA' else ids[-1]
+        RegistroAsistencia.objects.filter(pk__in=ids).exclude(pk=conservar).delete()
+        afectados.add((grupo['proceso_id'], grupo['fecha']))
+
+    for proceso_id, fecha in afectados:
+        registros = list(
+            RegistroAsistencia.objects.filter(proceso_id=proceso_id, fecha=fecha)
+            .order_by('momento_registro')
+            .values('proceso__candidato_id', 'momento_registro', 'fase_actual', 'movimiento', 'estado')
+        )
+        ultimo = registros[-1]
+        valores = {
+            'candidato_id': ultimo['proceso__candidato_id'],
+            'registros': len(registros),
+            'ultimo_momento': ultimo['momento_registro'],
+            'ultima_fase': ultimo['fase_actual'],
+            'ultimo_movimiento': ultimo['movimiento'],
+            'ultimo_estado': ultimo['estado'] or '',
+        }
+        for estado, contador in CONTADOR_POR_ESTADO.items():
+            valores[contador] = sum(1 for r in registros if r['estado'] == estado)
+
+        ResumenAsistenciaDiaria.objects.update_or_create(proceso_id=proceso_id, fecha=fecha, defaults=valores)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0033_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sede',
+            name='hora_limite_entrada',
+            field=models.TimeField(blank=True, help_text='Hasta esta hora la ENTRADA es puntual. Vacío: settings.HORA_LIMITE_ASISTENCIA.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sede',
+            name='hora_limite_tardanza',
+            field=models.TimeField(blank=True, help_text='Desde esta hora la ENTRADA es FALTA y antes de ella la SALIDA es temprana. Vacío: settings.HORA_LIMITE_TARDANZA.', null=True),
+        ),
+        migrations.RunPython(depurar_asistencias_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='registroasistencia',
+            constraint=models.UniqueConstraint(fields=('proceso', 'fecha', 'movimiento'), name='asistencia_unica_por_dia'),
+        ),
+        migrations.RemoveIndex(
+            model_name='registroasistencia',
+            name='asistencia_proc_fecha_mov_idx',
+        ),
+    ]
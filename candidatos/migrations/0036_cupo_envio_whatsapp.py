@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0035_trabajo_exportacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CupoEnvioWhatsApp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_id', models.CharField(max_length=50, unique=True)),
+                ('capacidad', models.FloatField(help_text='Máximo de mensajes que se pueden enviar en ráfaga.')),
+                ('tasa_por_segundo', models.FloatField(help_text='Mensajes por segundo permitidos para el número.')),
+                ('limite_diario', models.PositiveIntegerField(default=0, help_text='Mensajes por día según el nivel de Meta. 0: sin límite.')),
+                ('tokens', models.FloatField(default=0)),
+                ('tokens_actualizados', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dia', models.DateField(blank=True, null=True)),
+                ('enviados_dia', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cupo de Envío WhatsApp',
+                'verbose_name_plural': 'Cupos de Envío WhatsApp',
+            },
+        ),
+        migrations.AddField(
+            model_name='tareaenviomasivo',
+            name='destinatarios',
+            field=models.JSONField(blank=True, default=list, help_text='DNIs seleccionados; los que aún no tienen DetalleEnvio quedan pendientes.'),
+        ),
+        migrations.AddField(
+            model_name='tareaenviomasivo',
+            name='fecha_estimada_fin',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fin Estimado'),
+        ),
+        migrations.AddField(
+            model_name='tareaenviomasivo',
+            name='reanudar_en',
+            field=models.DateTimeField(blank=True, help_text='Si se agotó el cupo diario de Meta, momento desde el que se reanuda el envío.', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0036_cupo_envio_whatsapp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoWebhookWhatsApp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField()),
+                ('recibido', models.DateTimeField(auto_now_add=True)),
+                ('lote', models.CharField(blank=True, max_length=32, null=True)),
+                ('reclamado', models.DateTimeField(blank=True, null=True)),
+                ('procesado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Webhook WhatsApp',
+                'verbose_name_plural': 'Eventos de Webhook WhatsApp',
+                'indexes': [models.Index(fields=['procesado', 'lote'], name='webhook_pendiente_idx'), models.Index(fields=['lote'], name='webhook_lote_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0037_evento_webhook_whatsapp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mensajeplantilla',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:23
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+LOTE = 2000
+VARIABLE_LEGADA = '{nombres_completos}'
+
+
+def _hash(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _literal(texto):
+    return texto.replace('{', '{{').replace('}', '}}')
+
+
+def compactar_historial(apps, schema_editor):
+    """
+    Calcula el hash de las plantillas y reemplaza cada contenido_final por un cuerpo
+    compartido. El envío anterior solo sustituía {nombres_completos}: si el texto coincide
+    con la plantilla de su tarea así personalizada, el cuerpo es la plantilla y la variable
+    queda en `variables`; si no, el texto completo se guarda como cuerpo literal.
+    """
+    MensajePlantilla = apps.get_model('candidatos', 'MensajePlantilla')
+    CuerpoMensaje = apps.get_model('candidatos', 'CuerpoMensaje')
+    DetalleEnvio = apps.get_model('candidatos', 'DetalleEnvio')
+
+    plantillas = list(MensajePlantilla.objects.only('pk', 'contenido_texto'))
+    for plantilla in plantillas:
+        plantilla.hash_contenido = _hash(plantilla.contenido_texto)
+    MensajePlantilla.objects.bulk_update(plantillas, ['hash_contenido'], batch_size=LOTE)
+
+    detalles = DetalleEnvio.objects.order_by('pk').values_list(
+        'pk', 'contenido_final', 'contacto__nombres_completos', 'tarea_envio__mensaje_plantilla__contenido_texto'
+    )
+
+    cuerpos = {}
+    lote = []
+
+    def guardar():
+        CuerpoMensaje.objects.bulk_create(
+            [CuerpoMensaje(hash=h, texto=t) for h, t in cuerpos.items()],
+            batch_size=LOTE, ignore_conflicts=True,
+        )
+        cuerpos.clear()
+        DetalleEnvio.objects.bulk_update(lote, ['cuerpo', 'variables'], batch_size=LOTE)
+        lote.clear()
+
+    for pk, contenido, nombre, plantilla in detalles.iterator(chunk_size=LOTE):
+        variables = {}
+        sin_legada = (plantilla or '').replace(VARIABLE_LEGADA, '')
+        if (
+            plantilla is not None and '{' not in sin_legada and '}' not in sin_legada
+            and contenido == plantilla.replace(VARIABLE_LEGADA, nombre or '')
+        ):
+            texto = plantilla
+            if VARIABLE_LEGADA in plantilla:
+                variables = {'nombres_completos': nombre or ''}
+        else:
+            texto = _literal(contenido)
+
+        h = _hash(texto)
+        cuerpos[h] = texto
+        lote.append(DetalleEnvio(pk=pk, cuerpo_id=h, variables=variables))
+        if len(lote) >= LOTE:
+            guardar()
+
+    guardar()
+
+
+def restaurar_contenido_final(apps, schema_editor):
+    DetalleEnvio = apps.get_model('candidatos', 'DetalleEnvio')
+
+    lote = []
+    for detalle in DetalleEnvio.objects.select_related('cuerpo').iterator(chunk_size=LOTE):
+        texto = detalle.cuerpo.texto if detalle.cuerpo_id else ''
+        for nombre, valor in detalle.variables.items():
+            texto = texto.replace('{%s}' % nombre, valor)
+        detalle.contenido_final = texto.replace('{{', '{').replace('}}', '}')
+        lote.append(detalle)
+    DetalleEnvio.objects.bulk_update(lote, ['contenido_final'], batch_size=LOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0038_mensajeplantilla_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuerpoMensaje',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('texto', models.TextField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cuerpo de Mensaje',
+                'verbose_name_plural': 'Cuerpos de Mensajes',
+            },
+        ),
+        migrations.AddField(
+            model_name='detalleenvio',
+            name='variables',
+            field=models.JSONField(blank=True, default=dict, help_text='Valores de las variables de la plantilla para este destinatario.'),
+        ),
+        migrations.AddField(
+            model_name='mensajeplantilla',
+            name='hash_contenido',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='detalleenvio',
+            name='cuerpo',
+            field=models.ForeignKey(db_column='cuerpo_hash', help_text='Texto base del mensaje (compartido por toda la campaña).', null=True, on_delete=django.db.models.deletion.PROTECT, to='candidatos.cuerpomensaje'),
+        ),
+        migrations.RunPython(compactar_historial, restaurar_contenido_final),
+        # Con default para que revertir pueda volver a crear la columna antes de restaurarla.
+        migrations.AlterField(
+            model_name='detalleenvio',
+            name='contenido_final',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RemoveField(
+            model_name='detalleenvio',
+            name='contenido_final',
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:27
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def _e164(telefono):
+    digitos = re.sub(r'\D', '', telefono or '')
+    codigo = settings.WHATSAPP_CODIGO_PAIS
+    if len(digitos) > 9 and digitos.startswith(codigo):
+        digitos = digitos[len(codigo):]
+    return f'+{codigo}{digitos}' if re.match(r'^9\d{8}$', digitos) else ''
+
+
+def poblar_resumen_mensajeria(apps, schema_editor):
+    Candidato = apps.get_model('candidatos', 'Candidato')
+    DetalleEnvio = apps.get_model('candidatos', 'DetalleEnvio')
+    ResumenMensajeriaCandidato = apps.get_model('candidatos', 'ResumenMensajeriaCandidato')
+
+    envios = {
+        fila['contacto_id']: fila for fila in
+        DetalleEnvio.objects.filter(contacto__isnull=False).values('contacto_id').annotate(
+            exitosos=Count('pk', filter=~Q(estado_meta='FALLIDO')),
+            fallidos=Count('pk', filter=Q(estado_meta='FALLIDO')),
+            ultimo=Max('fecha_envio'),
+            lectura=Max('fecha_envio', filter=Q(estado_meta='LEIDO')),
+        )
+    }
+
+    resumenes = []
+    for pk, telefono in Candidato.objects.values_list('pk', 'telefono_whatsapp').iterator(chunk_size=5000):
+        e164 = _e164(telefono)
+        envio = envios.get(pk, {})
+        resumenes.append(ResumenMensajeriaCandidato(
+            candidato_id=pk, telefono_e164=e164, telefono_valido=bool(e164),
+            envios_exitosos=envio.get('exitosos', 0), envios_fallidos=envio.get('fallidos', 0),
+            ultimo_envio=envio.get('ultimo'), ultima_lectura=envio.get('lectura'),
+        ))
+    ResumenMensajeriaCandidato.objects.bulk_create(resumenes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0039_cuerpo_mensaje'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensajeriaCandidato',
+            fields=[
+                ('candidato', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_mensajeria', serialize=False, to='candidatos.candidato')),
+                ('telefono_e164', models.CharField(blank=True, db_index=True, max_length=16)),
+                ('telefono_valido', models.BooleanField(default=False)),
+                ('opt_out', models.BooleanField(default=False, help_text='El candidato pidió no recibir más mensajes.')),
+                ('envios_exitosos', models.PositiveIntegerField(default=0)),
+                ('envios_fallidos', models.PositiveIntegerField(default=0)),
+                ('ultimo_envio', models.DateTimeField(blank=True, null=True)),
+                ('ultima_lectura', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Mensajería',
+                'verbose_name_plural': 'Resúmenes de Mensajería',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='proceso',
+            index=models.Index(fields=['estado', 'fecha_inicio'], name='proceso_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumenmensajeriacandidato',
+            index=models.Index(fields=['telefono_valido', 'opt_out', 'ultimo_envio'], name='resumen_msj_envio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumenmensajeriacandidato',
+            index=models.Index(fields=['telefono_valido', 'opt_out', 'ultima_lectura'], name='resumen_msj_lectura_idx'),
+        ),
+        migrations.RunPython(poblar_resumen_mensajeria, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0040_resumen_mensajeria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tareaenviomasivo',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, help_text='Último cambio de la campaña o del estado de alguno de sus mensajes.'),
+        ),
+        migrations.AddIndex(
+            model_name='detalleenvio',
+            index=models.Index(fields=['tarea_envio', 'estado_meta', 'id'], name='detalle_tarea_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tareaenviomasivo',
+            index=models.Index(fields=['-fecha_inicio', '-id'], name='tarea_envio_cursor_idx'),
+        ),
+    ]
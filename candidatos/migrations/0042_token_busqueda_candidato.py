@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:32
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').casefold()
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[^\W_]+', texto))
+
+
+def poblar_tokens(apps, schema_editor):
+    Candidato = apps.get_model('candidatos', 'Candidato')
+    TokenBusquedaCandidato = apps.get_model('candidatos', 'TokenBusquedaCandidato')
+
+    tokens = []
+    for dni, nombres, telefono in Candidato.objects.values_list('DNI', 'nombres_completos', 'telefono_whatsapp').iterator(chunk_size=5000):
+        vistos = set()
+        for tipo, valores in (('D', [dni]), ('T', [telefono]), ('N', _normalizar(nombres).split())):
+            for valor in valores:
+                token = _normalizar(valor).replace(' ', '')[:64]
+                if token and token not in vistos:
+                    vistos.add(token)
+                    tokens.append(TokenBusquedaCandidato(candidato_id=dni, token=token, tipo=tipo))
+        if len(tokens) >= 5000:
+            TokenBusquedaCandidato.objects.bulk_create(tokens)
+            tokens = []
+    TokenBusquedaCandidato.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0041_historial_envios_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenBusquedaCandidato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('tipo', models.CharField(choices=[('N', 'Nombre'), ('D', 'DNI'), ('T', 'Teléfono')], max_length=1)),
+                ('candidato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens_busqueda', to='candidatos.candidato')),
+            ],
+            options={
+                'verbose_name': 'Token de Búsqueda',
+                'verbose_name_plural': 'Tokens de Búsqueda',
+                'indexes': [models.Index(fields=['token', 'candidato'], name='token_busqueda_idx')],
+            },
+        ),
+        migrations.RunPython(poblar_tokens, migrations.RunPython.noop),
+    ]
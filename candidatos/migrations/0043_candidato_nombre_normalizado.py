@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:34
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').casefold()
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(sorted(re.findall(r'[^\W_]+', texto)))[:255]
+
+
+def poblar_nombre_normalizado(apps, schema_editor):
+    Candidato = apps.get_model('candidatos', 'Candidato')
+
+    cambios = []
+    for dni, nombres in Candidato.objects.values_list('DNI', 'nombres_completos').iterator(chunk_size=5000):
+        cambios.append(Candidato(DNI=dni, nombre_normalizado=_normalizar(nombres)))
+        if len(cambios) >= 5000:
+            Candidato.objects.bulk_update(cambios, ['nombre_normalizado'])
+            cambios = []
+    Candidato.objects.bulk_update(cambios, ['nombre_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0042_token_busqueda_candidato'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidato',
+            name='nombre_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Nombre sin tildes ni mayúsculas y con las palabras ordenadas (ver normalizar_nombre()).', max_length=255),
+        ),
+        migrations.RunPython(poblar_nombre_normalizado, migrations.RunPython.noop),
+    ]
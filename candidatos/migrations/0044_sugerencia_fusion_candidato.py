@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0043_candidato_nombre_normalizado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaFusionCandidato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('puntaje', models.PositiveSmallIntegerField(help_text='Similitud del par, de 0 a 100.')),
+                ('motivos', models.JSONField(default=list, help_text='Coincidencias que suman al puntaje: telefono, nombre, dni, email.')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente de revisión'), ('FUSIONADO', 'Fusionado'), ('DESCARTADO', 'No es duplicado')], default='PENDIENTE', max_length=12)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('candidato_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_fusion_a', to='candidatos.candidato')),
+                ('candidato_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_fusion_b', to='candidatos.candidato')),
+                ('revisado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sugerencia de Fusión',
+                'verbose_name_plural': 'Sugerencias de Fusión',
+                'indexes': [models.Index(fields=['estado', '-puntaje'], name='sugerencia_fusion_estado_idx')],
+                'constraints': [models.UniqueConstraint(fields=('candidato_a', 'candidato_b'), name='sugerencia_fusion_par_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0044_sugerencia_fusion_candidato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudRegistroPublico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('candidato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_registro', to='candidatos.candidato')),
+            ],
+            options={
+                'verbose_name': 'Solicitud de Registro Público',
+                'verbose_name_plural': 'Solicitudes de Registro Público',
+            },
+        ),
+    ]
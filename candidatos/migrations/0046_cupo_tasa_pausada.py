@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0045_solicitud_registro_publico'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cupoenviowhatsapp',
+            name='tasa_por_segundo',
+            field=models.FloatField(help_text='Mensajes por segundo permitidos para el número. 0: pausado.'),
+        ),
+    ]
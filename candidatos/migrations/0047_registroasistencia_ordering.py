@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidatos', '0046_cupo_tasa_pausada'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='registroasistencia',
+            options={'ordering': ['-momento_registro'], 'verbose_name_plural': 'Asistencia'},
+        ),
+    ]
@@ -1,10 +1,96 @@
-from django.db import models
-from datetime import date
-from django.core.exceptions import ValidationError
+import hashlib
+import re
+import unicodedata
+
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery
+from datetime import date, datetime, timedelta
+from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.cache import cache
+
+_ESTADO_NO_CARGADO = object()
+
+class TransicionEstadoMixin:
+    """
+    Recuerda el valor con el que se cargó `campo_estado` (desde from_db) para detectar
+    transiciones en save() sin volver a consultar la fila.
+
+    Los modelos que lo usan pueden sobrescribir:
+        antes_de_transicion(anterior, nuevo): se ejecuta antes de escribir la fila.
+        despues_de_transicion(anterior, nuevo): se ejecuta después de escribirla.
+    """
+    campo_estado = 'estado'
+
+    @property
+    def usuario_transicion(self):
+        """Usuario responsable del próximo cambio de estado (no se persiste en la fila)."""
+        return getattr(self, '_usuario_transicion', None)
+
+    @usuario_transicion.setter
+    def usuario_transicion(self, usuario):
+        self._usuario_transicion = usuario
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._marcar_estado_original()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or self.campo_estado in fields:
+            self._marcar_estado_original()
+
+    def _marcar_estado_original(self):
+        attname = self._meta.get_field(self.campo_estado).attname
+        # Si el campo fue diferido (.only/.defer) no está en __dict__.
+        self._estado_original = self.__dict__.get(attname, _ESTADO_NO_CARGADO)
+
+    @property
+    def estado_original(self):
+        """Estado persistido en la base de datos; None para instancias nuevas."""
+        if self._state.adding:
+            return None
+        valor = getattr(self, '_estado_original', _ESTADO_NO_CARGADO)
+        if valor is _ESTADO_NO_CARGADO:
+            valor = type(self)._base_manager.filter(pk=self.pk).values_list(self.campo_estado, flat=True).first()
+            self._estado_original = valor
+        return valor
+
+    @property
+    def estado_cambio(self):
+        return self.estado_original != getattr(self, self.campo_estado)
+
+    def antes_de_transicion(self, anterior, nuevo):
+        pass
+
+    def despues_de_transicion(self, anterior, nuevo):
+        pass
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.campo_estado not in update_fields:
+            return super().save(*args, **kwargs)
+        # Un estado diferido (.only/.defer) no cambió y Django no lo escribe.
+        if not self._state.adding and self._meta.get_field(self.campo_estado).attname not in self.__dict__:
+            return super().save(*args, **kwargs)
+
+        anterior = self.estado_original
+        nuevo = getattr(self, self.campo_estado)
+        hay_transicion = anterior != nuevo
+
+        if hay_transicion:
+            self.antes_de_transicion(anterior, nuevo)
+
+        super().save(*args, **kwargs)
+        self._estado_original = nuevo
+
+        if hay_transicion:
+            self.despues_de_transicion(anterior, nuevo)
 
 class Empresa(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
@@ -39,6 +125,15 @@ class Sede(models.Model):
     nombre = models.CharField(max_length=100)
     ciudad = models.CharField(max_length=100)
 
+    hora_limite_entrada = models.TimeField(
+        null=True, blank=True,
+        help_text="Hasta esta hora la ENTRADA es puntual. Vacío: settings.HORA_LIMITE_ASISTENCIA."
+    )
+    hora_limite_tardanza = models.TimeField(
+        null=True, blank=True,
+        help_text="Desde esta hora la ENTRADA es FALTA y antes de ella la SALIDA es temprana. Vacío: settings.HORA_LIMITE_TARDANZA."
+    )
+
     def __str__(self):
         return f"{self.nombre} ({self.empresa.nombre})"
 
@@ -91,7 +186,9 @@ MOTIVOS_DESCARTE = [
     ('OTRO', 'Otro Motivo'),
 ]
 
-class Candidato(models.Model):
+class Candidato(TransicionEstadoMixin, models.Model):
+    campo_estado = 'estado_actual'
+
     DNI = models.CharField(max_length=30, primary_key=True, unique=True, verbose_name="Número de Documento")
     tipo_documento = models.ForeignKey(
         'TipoDocumento', 
@@ -100,6 +197,13 @@ class Candidato(models.Model):
         default=1 
     )
     nombres_completos = models.CharField(max_length=255)
+    nombre_normalizado = models.CharField(
+        max_length=255,
+        db_index=True,
+        editable=False,
+        default='',
+        help_text="Nombre sin tildes ni mayúsculas y con las palabras ordenadas (ver normalizar_nombre())."
+    )
     edad = models.IntegerField(blank=True, null=True, help_text="Edad del candidato.")
     telefono_whatsapp = models.CharField(max_length=9)
     email = models.EmailField(max_length=255,blank=True,null=True)
@@ -145,6 +249,154 @@ class Candidato(models.Model):
         help_text="Motivo por el cual el candidato desistió o fue descartado."
     )
 
+    # Puntero desnormalizado al proceso más reciente (mantenido por Proceso.save y
+    # Candidato.sincronizar_proceso_actual) para evitar la subconsulta por candidato.
+    proceso_actual = models.ForeignKey(
+        'Proceso',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Proceso más reciente del candidato (por fecha de inicio)."
+    )
+    proceso_actual_estado = models.CharField(
+        max_length=15,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Copia del estado del proceso actual."
+    )
+    proceso_actual_empresa = models.ForeignKey(
+        'Empresa',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Copia de la empresa del proceso actual."
+    )
+    proceso_actual_supervisor = models.ForeignKey(
+        'Supervisor',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Copia del supervisor del proceso actual."
+    )
+
+    CAMPOS_PROCESO_ACTUAL = [
+        'proceso_actual', 'proceso_actual_estado', 'proceso_actual_empresa', 'proceso_actual_supervisor',
+    ]
+
+    @property
+    def proceso_activo(self):
+        """
+        Proceso más reciente que no está en un estado final, o None. Casi siempre es
+        proceso_actual (sin consulta); solo si este ya terminó se busca uno anterior abierto.
+        """
+        if not self.proceso_actual_id:
+            return None
+        if self.proceso_actual_estado not in Proceso.ESTADOS_FINALES:
+            return self.proceso_actual
+        return (
+            self.procesos.exclude(estado__in=Proceso.ESTADOS_FINALES)
+            .select_related('sede_proceso')
+            .order_by('-fecha_inicio', '-pk')
+            .first()
+        )
+
+    @classmethod
+    def sincronizar_proceso_actual(cls, candidato_ids=None):
+        """
+        Recalcula en un único UPDATE el puntero proceso_actual (y sus copias) de los
+        candidatos indicados, o de todos si candidato_ids es None.
+        """
+        ultimo = Proceso.objects.filter(candidato=OuterRef('pk')).order_by('-fecha_inicio', '-pk')
+
+        qs = cls.objects.all()
+        if candidato_ids is not None:
+            qs = qs.filter(pk__in=list(candidato_ids))
+
+        return qs.update(
+            proceso_actual=Subquery(ultimo.values('pk')[:1]),
+            proceso_actual_estado=Subquery(ultimo.values('estado')[:1]),
+            proceso_actual_empresa=Subquery(ultimo.values('empresa_proceso')[:1]),
+            proceso_actual_supervisor=Subquery(ultimo.values('supervisor')[:1]),
+        )
+
+    # Campos copiados al resumen de mensajería y al índice de búsqueda.
+    CAMPOS_INDEXADOS = ('nombres_completos', 'telefono_whatsapp')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._indexados_originales = tuple(instancia.__dict__.get(c) for c in cls.CAMPOS_INDEXADOS)
+        return instancia
+
+    def _valores_indexados(self):
+        # Desde __dict__, como from_db: un campo diferido (.only()) no se carga solo para comparar.
+        return tuple(self.__dict__.get(c) for c in self.CAMPOS_INDEXADOS)
+
+    def save(self, *args, **kwargs):
+        nuevo = self._state.adding
+        if 'nombres_completos' in self.__dict__:
+            self.nombre_normalizado = normalizar_nombre(self.nombres_completos)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nombres_completos' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'nombre_normalizado'}
+
+        # El puntero a proceso_actual lo mantiene sincronizar_proceso_actual. Un save() completo
+        # escribe los valores que la instancia tenía al cargarse (quizá de antes de un cambio de
+        # proceso), así que se recalculan con su propio UPDATE en la misma transacción.
+        resincronizar = not nuevo and (
+            update_fields is None or not set(update_fields).isdisjoint(self.CAMPOS_PROCESO_ACTUAL)
+        )
+        reindexar = nuevo or self._valores_indexados() != getattr(self, '_indexados_originales', None)
+
+        if not resincronizar and not reindexar:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if resincronizar:
+                Candidato.sincronizar_proceso_actual([self.pk])
+            if reindexar:
+                ResumenMensajeriaCandidato.actualizar_telefono(self.pk, self.telefono_whatsapp)
+                TokenBusquedaCandidato.indexar([(self.pk, self.nombres_completos, self.telefono_whatsapp)])
+        self._indexados_originales = self._valores_indexados()
+
+    @classmethod
+    def con_mismo_nombre(cls, nombres):
+        """Candidatos cuyo nombre coincide sin importar tildes, mayúsculas, espacios ni orden."""
+        clave = normalizar_nombre(nombres)
+        return cls.objects.filter(nombre_normalizado=clave) if clave else cls.objects.none()
+
+    @classmethod
+    def normalizar_nombres(cls, candidato_ids=None, lote=2000):
+        """
+        Recalcula nombre_normalizado (tras cargas o UPDATE que no pasan por save()).
+        Solo reescribe las filas que cambian; devuelve cuántas.
+        """
+        candidatos = cls.objects.order_by('pk')
+        if candidato_ids is not None:
+            candidatos = candidatos.filter(pk__in=candidato_ids)
+
+        total = 0
+        cambios = []
+        for dni, nombres, actual in candidatos.values_list('DNI', 'nombres_completos', 'nombre_normalizado').iterator(chunk_size=lote):
+            clave = normalizar_nombre(nombres)
+            if clave != actual:
+                cambios.append(cls(DNI=dni, nombre_normalizado=clave))
+            if len(cambios) >= lote:
+                total += cls.objects.bulk_update(cambios, ['nombre_normalizado'])
+                cambios = []
+        if cambios:
+            total += cls.objects.bulk_update(cambios, ['nombre_normalizado'])
+        return total
+
     def clean(self):
         if self.DNI and not self.DNI.isdigit():
             raise ValidationError({'DNI': 'El DNI solo debe contener dígitos (0-9).'})
@@ -171,6 +423,98 @@ class Candidato(models.Model):
         
         return 'text-gray-500'
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado_actual', 'kanban_activo', 'fecha_registro'], name='candidato_estado_kanban_idx'),
+        ]
+
+def normalizar_texto(texto):
+    """'  Luis  VELÁSQUEZ-Peña ' -> 'luis velasquez pena' (sin tildes ni mayúsculas, solo letras y dígitos)."""
+    texto = unicodedata.normalize('NFKD', texto or '').casefold()
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[^\W_]+', texto))
+
+
+def normalizar_nombre(texto):
+    """
+    Forma canónica de un nombre para comparar y detectar duplicados: normalizar_texto con
+    las palabras ordenadas ("Velásquez Luis" y "LUIS  velasquez" -> 'luis velasquez').
+    """
+    return ' '.join(sorted(normalizar_texto(texto).split()))[:255]
+
+
+class TokenBusquedaCandidato(models.Model):
+    """
+    Índice de búsqueda por prefijo: una fila por palabra normalizada del nombre, el DNI y
+    el teléfono de cada candidato. Lo mantiene Candidato.save; las cargas masivas deben
+    llamar a `indexar` (o al comando reindexar_busqueda_candidatos).
+    """
+    NOMBRE, DNI, TELEFONO = 'N', 'D', 'T'
+    TIPOS = [
+        (NOMBRE, 'Nombre'),
+        (DNI, 'DNI'),
+        (TELEFONO, 'Teléfono'),
+    ]
+
+    candidato = models.ForeignKey('Candidato', on_delete=models.CASCADE, related_name='tokens_busqueda')
+    token = models.CharField(max_length=64)
+    tipo = models.CharField(max_length=1, choices=TIPOS)
+
+    # Versión en caché de las búsquedas; cambia con cada reindexación.
+    CLAVE_VERSION = 'busqueda_candidatos:version'
+
+    @classmethod
+    def tokens(cls, dni, nombres, telefono):
+        vistos = set()
+        for tipo, valores in ((cls.DNI, [dni]), (cls.TELEFONO, [telefono]), (cls.NOMBRE, normalizar_texto(nombres).split())):
+            for valor in valores:
+                token = normalizar_texto(valor).replace(' ', '')[:64]
+                if token and token not in vistos:
+                    vistos.add(token)
+                    yield tipo, token
+
+    @classmethod
+    def indexar(cls, candidatos, lote=2000):
+        """Reescribe los tokens de `candidatos`: iterable de (DNI, nombres_completos, telefono_whatsapp)."""
+        candidatos = list(candidatos)
+        ids = [dni for dni, _, _ in candidatos]
+        with transaction.atomic():
+            for inicio in range(0, len(ids), lote):
+                cls.objects.filter(candidato_id__in=ids[inicio:inicio + lote]).delete()
+            cls.objects.bulk_create(
+                [
+                    cls(candidato_id=dni, token=token, tipo=tipo)
+                    for dni, nombres, telefono in candidatos
+                    for tipo, token in cls.tokens(dni, nombres, telefono)
+                ],
+                batch_size=lote,
+            )
+            transaction.on_commit(cls.invalidar_cache)
+        return len(candidatos)
+
+    @classmethod
+    def version_cache(cls):
+        return cache.get_or_set(cls.CLAVE_VERSION, 1, None)
+
+    @classmethod
+    def invalidar_cache(cls):
+        try:
+            cache.incr(cls.CLAVE_VERSION)
+        except ValueError:
+            cache.set(cls.CLAVE_VERSION, 1, None)
+
+    def __str__(self):
+        return f"{self.token} ({self.candidato_id})"
+
+    class Meta:
+        verbose_name = "Token de Búsqueda"
+        verbose_name_plural = "Tokens de Búsqueda"
+        indexes = [
+            # token primero: la búsqueda por prefijo es un rango sobre este índice.
+            models.Index(fields=['token', 'candidato'], name='token_busqueda_idx'),
+        ]
+
+
 class DatosCualificacion(models.Model):
     candidato = models.OneToOneField(
         Candidato, 
@@ -254,7 +598,7 @@ class DatosCualificacion(models.Model):
     class Meta:
         verbose_name_plural = 'Formulario'
     
-class Proceso(models.Model):
+class Proceso(TransicionEstadoMixin, models.Model):
     candidato = models.ForeignKey(
         'Candidato', 
         on_delete=models.CASCADE, 
@@ -278,6 +622,7 @@ class Proceso(models.Model):
         ('ABANDONO', 'Abandono/Deserción')
     ]
     estado = models.CharField(max_length=15, choices=ESTADOS_PROCESO, default='CONVOCADO')
+    ESTADOS_FINALES = ['CONTRATADO', 'NO_APTO', 'ABANDONO']
 
     fecha_confirmado = models.DateField(null=True, blank=True, help_text="Fecha en el que el cadidato pasó a Confirmado")
 
@@ -303,34 +648,48 @@ class Proceso(models.Model):
         help_text="Indica si se queda por 'Aptitud' a pesar de fallar otras pruebas (Opción escasa)."
     )
 
-    def save(self, *args, **kwargs):
-        
-        old_estado = None
-        if self.pk:
-            try:
-                old_proceso = Proceso.objects.get(pk=self.pk)
-                old_estado = old_proceso.estado
-            except Proceso.DoesNotExist:
-                pass 
+    FECHAS_POR_ESTADO = {
+        'CONFIRMADO': 'fecha_confirmado',
+        'TEORIA': 'fecha_teorico',
+        'PRACTICA': 'fecha_practico',
+        'CONTRATADO': 'fecha_contratacion',
+    }
 
-        current_date = date.today() 
+    def sellar_fecha_fase(self, old_estado, fecha=None):
+        """
+        Registra la fecha de ingreso a la fase actual si el estado cambió y la fecha aún
+        está vacía. Devuelve el nombre del campo sellado (o None).
+        """
+        campo = self.FECHAS_POR_ESTADO.get(self.estado)
+        if campo and old_estado != self.estado and not getattr(self, campo):
+            setattr(self, campo, fecha or date.today())
+            return campo
+        return None
 
-        if self.estado == 'CONFIRMADO' and old_estado != 'CONFIRMADO' and not self.fecha_confirmado:
-            self.fecha_confirmado = current_date 
+    def fecha_ingreso_fase(self, estado):
+        """Fecha (sin hora) en que el proceso entró a `estado` según las columnas de fase."""
+        if estado == 'CONVOCADO':
+            return self.fecha_inicio
+        campo = self.FECHAS_POR_ESTADO.get(estado)
+        return getattr(self, campo) if campo else None
 
-        if self.estado == 'CONFIRMADO' and old_estado != 'CONFIRMADO' and not self.fecha_confirmado:
-            self.fecha_confirmado = current_date
-        
-        if self.estado == 'TEORIA' and old_estado != 'TEORIA' and not self.fecha_teorico:
-            self.fecha_teorico = current_date
-            
-        elif self.estado == 'PRACTICA' and old_estado != 'PRACTICA' and not self.fecha_practico:
-            self.fecha_practico = current_date
-            
-        elif self.estado == 'CONTRATADO' and old_estado != 'CONTRATADO' and not self.fecha_contratacion:
-            self.fecha_contratacion = current_date
-        
-        super().save(*args, **kwargs)
+    def antes_de_transicion(self, anterior, nuevo):
+        self.sellar_fecha_fase(anterior)
+
+    def despues_de_transicion(self, anterior, nuevo):
+        ProcesoTransicion.registrar([(self, anterior)], usuario=self.usuario_transicion)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Candidato.sincronizar_proceso_actual([self.candidato_id])
+
+    def delete(self, *args, **kwargs):
+        candidato_id = self.candidato_id
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            Candidato.sincronizar_proceso_actual([candidato_id])
+        return resultado
 
     def __str__(self):
         return f"Proceso {self.pk}: {self.candidato.DNI} - {self.fecha_inicio.strftime('%Y-%m-%d')} ({self.get_estado_display()})"
@@ -338,6 +697,117 @@ class Proceso(models.Model):
     class Meta:
         unique_together = ('candidato', 'fecha_inicio', 'empresa_proceso')
         verbose_name_plural = 'Procesos'
+        indexes = [
+            models.Index(fields=['fecha_inicio', 'kanban_activo'], name='proceso_fecha_kanban_idx'),
+            models.Index(fields=['candidato', 'estado', 'fecha_inicio'], name='proceso_cand_estado_fecha_idx'),
+            models.Index(fields=['estado', 'fecha_inicio'], name='proceso_estado_fecha_idx'),
+        ]
+
+class ProcesoTransicion(models.Model):
+    """
+    Bitácora de solo inserción de los cambios de estado de un Proceso. Se escribe en lote
+    desde Proceso.save y desde aplicar_transicion_masiva.
+    """
+    proceso = models.ForeignKey('Proceso', on_delete=models.CASCADE, related_name='transiciones')
+    estado_anterior = models.CharField(max_length=15, choices=Proceso.ESTADOS_PROCESO, null=True, blank=True)
+    estado_nuevo = models.CharField(max_length=15, choices=Proceso.ESTADOS_PROCESO)
+    fecha = models.DateTimeField(default=timezone.now, db_index=True)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    permanencia_segundos = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Tiempo que el proceso permaneció en el estado anterior."
+    )
+
+    @classmethod
+    def registrar(cls, cambios, usuario=None, fecha=None):
+        """
+        Inserta una transición por cada (proceso, estado_anterior) de `cambios` con un
+        bulk_create. La permanencia en el estado anterior se calcula contra la última
+        transición registrada del proceso (una sola consulta para todo el lote) o, si no
+        hay historial, contra las columnas de fecha de fase.
+        """
+        if not cambios:
+            return []
+
+        fecha = fecha or timezone.now()
+        ids = [proceso.pk for proceso, anterior in cambios if anterior is not None]
+        ultimas = dict(
+            cls.objects.filter(proceso__in=ids)
+            .values('proceso')
+            .annotate(ultima=models.Max('fecha'))
+            .values_list('proceso', 'ultima')
+        ) if ids else {}
+
+        filas = []
+        for proceso, anterior in cambios:
+            permanencia = None
+            if anterior is not None:
+                desde = ultimas.get(proceso.pk)
+                if desde is None:
+                    fecha_fase = proceso.fecha_ingreso_fase(anterior)
+                    if fecha_fase:
+                        desde = timezone.make_aware(datetime.combine(fecha_fase, datetime.min.time()))
+                if desde is not None and desde <= fecha:
+                    permanencia = int((fecha - desde).total_seconds())
+
+            filas.append(cls(
+                proceso=proceso,
+                estado_anterior=anterior,
+                estado_nuevo=proceso.estado,
+                fecha=fecha,
+                usuario=usuario,
+                permanencia_segundos=permanencia,
+            ))
+
+        return cls.objects.bulk_create(filas)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Las transiciones de proceso no se pueden modificar.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Proceso {self.proceso_id}: {self.estado_anterior or '-'} -> {self.estado_nuevo} ({self.fecha:%Y-%m-%d %H:%M})"
+
+    class Meta:
+        verbose_name = "Transición de Proceso"
+        verbose_name_plural = "Transiciones de Proceso"
+        indexes = [
+            models.Index(fields=['proceso', 'fecha'], name='transicion_proceso_fecha_idx'),
+        ]
+
+class ResumenEmbudoDiario(models.Model):
+    """
+    Agregado precalculado por día, sede, empresa y estado a partir de ProcesoTransicion.
+    Se regenera con el comando `recalcular_resumen_embudo`.
+    """
+    fecha = models.DateField()
+    sede = models.ForeignKey('Sede', on_delete=models.CASCADE)
+    empresa = models.ForeignKey('Empresa', on_delete=models.CASCADE)
+    estado = models.CharField(max_length=15, choices=Proceso.ESTADOS_PROCESO)
+
+    entradas = models.PositiveIntegerField(default=0, help_text="Procesos que ingresaron al estado ese día.")
+    salidas = models.PositiveIntegerField(default=0, help_text="Procesos que dejaron el estado ese día.")
+    avances = models.PositiveIntegerField(default=0, help_text="Salidas hacia un estado que no es de descarte.")
+    mediana_permanencia_segundos = models.PositiveIntegerField(null=True, blank=True)
+
+    @property
+    def tasa_conversion(self):
+        return self.avances / self.salidas if self.salidas else None
+
+    def __str__(self):
+        return f"{self.fecha} {self.sede} / {self.empresa} - {self.get_estado_display()}"
+
+    class Meta:
+        verbose_name = "Resumen Diario de Embudo"
+        verbose_name_plural = "Resúmenes Diarios de Embudo"
+        unique_together = ('fecha', 'sede', 'empresa', 'estado')
+        indexes = [
+            models.Index(fields=['empresa', 'fecha'], name='resumen_embudo_empresa_idx'),
+        ]
+
+def _fecha_local(momento):
+    return timezone.localdate(momento) if timezone.is_aware(momento) else momento.date()
 
 class RegistroAsistencia(models.Model):
     proceso = models.ForeignKey('Proceso', on_delete=models.CASCADE)
@@ -349,6 +819,10 @@ class RegistroAsistencia(models.Model):
         help_text="Candidato asociado (duplicado para optimización de consultas)."
     )
     momento_registro = models.DateTimeField(default=timezone.now)
+    fecha = models.DateField(
+        null=True, blank=True, editable=False,
+        help_text="Fecha local de momento_registro (columna indexable para filtros por día)."
+    )
     
     TIPO_MOVIMIENTO = [
         ('ENTRADA', 'Entrada'),
@@ -387,8 +861,12 @@ class RegistroAsistencia(models.Model):
     estado = models.CharField(max_length=1, choices=ASISTENCIA_ESTADO, default='A')
 
     class Meta:
-        verbose_name_plural = "Registros de Asistencia"
+        verbose_name_plural = 'Asistencia'
         ordering = ['-momento_registro']
+        constraints = [
+            # Una ENTRADA y una SALIDA por proceso y día; también sirve de índice para los filtros diarios.
+            models.UniqueConstraint(fields=['proceso', 'fecha', 'movimiento'], name='asistencia_unica_por_dia'),
+        ]
 
     def __str__(self):
         dni = self.candidato.DNI if self.candidato else self.proceso.candidato.DNI
@@ -397,7 +875,30 @@ class RegistroAsistencia(models.Model):
     def save(self, *args, **kwargs):
         if not self.candidato and self.proceso_id:
             self.candidato = self.proceso.candidato
-        super().save(*args, **kwargs)
+
+        self.fecha = _fecha_local(self.momento_registro)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'momento_registro' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'fecha'}
+
+        if self._state.adding:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                ResumenAsistenciaDiaria.acumular(self)
+            return
+
+        anterior = RegistroAsistencia.objects.filter(pk=self.pk).values('proceso_id', 'fecha').first()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ResumenAsistenciaDiaria.recalcular(self.proceso_id, self.fecha)
+            if anterior and (anterior['proceso_id'], anterior['fecha']) != (self.proceso_id, self.fecha):
+                ResumenAsistenciaDiaria.recalcular(anterior['proceso_id'], anterior['fecha'])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            ResumenAsistenciaDiaria.recalcular(self.proceso_id, self.fecha)
+        return resultado
 
     def get_movimiento_color_class(self):
         """ Devuelve la clase CSS de color basada en el tipo de movimiento. """
@@ -408,9 +909,98 @@ class RegistroAsistencia(models.Model):
             return 'text-red-600 bg-red-100'   
         
         return 'text-gray-500 bg-gray-100'
-    
+
+class ResumenAsistenciaDiaria(models.Model):
+    """
+    Resumen materializado de RegistroAsistencia por candidato, proceso y día. Se mantiene
+    al escribir cada registro (RegistroAsistencia.save/delete); las actualizaciones
+    masivas con QuerySet.update()/delete() deben llamar a `recalcular`.
+    """
+    candidato = models.ForeignKey('Candidato', on_delete=models.CASCADE, related_name='resumenes_asistencia')
+    proceso = models.ForeignKey('Proceso', on_delete=models.CASCADE, related_name='resumenes_asistencia')
+    fecha = models.DateField()
+
+    registros = models.PositiveIntegerField(default=0)
+    asistencias = models.PositiveIntegerField(default=0)
+    tardanzas = models.PositiveIntegerField(default=0)
+    faltas = models.PositiveIntegerField(default=0)
+    justificados = models.PositiveIntegerField(default=0)
+
+    ultimo_momento = models.DateTimeField(null=True, blank=True)
+    ultima_fase = models.CharField(max_length=15, choices=RegistroAsistencia.FASE_ASISTENCIA, blank=True)
+    ultimo_movimiento = models.CharField(max_length=8, choices=RegistroAsistencia.TIPO_MOVIMIENTO, blank=True)
+    ultimo_estado = models.CharField(max_length=1, choices=RegistroAsistencia.ASISTENCIA_ESTADO, blank=True)
+
+    CONTADOR_POR_ESTADO = {
+        'A': 'asistencias',
+        'T': 'tardanzas',
+        'F': 'faltas',
+        'J': 'justificados',
+    }
+
+    @classmethod
+    def acumular(cls, registro):
+        """Suma un registro nuevo al resumen de su día con un UPDATE atómico (F())."""
+        resumen, _ = cls.objects.select_for_update().get_or_create(
+            proceso_id=registro.proceso_id,
+            fecha=registro.fecha,
+            defaults={'candidato_id': registro.candidato_id},
+        )
+
+        cambios = {'registros': F('registros') + 1}
+        contador = cls.CONTADOR_POR_ESTADO.get(registro.estado)
+        if contador:
+            cambios[contador] = F(contador) + 1
+
+        if resumen.ultimo_momento is None or registro.momento_registro >= resumen.ultimo_momento:
+            cambios.update(
+                ultimo_momento=registro.momento_registro,
+                ultima_fase=registro.fase_actual,
+                ultimo_movimiento=registro.movimiento,
+                ultimo_estado=registro.estado or '',
+            )
+
+        cls.objects.filter(pk=resumen.pk).update(**cambios)
+
+    @classmethod
+    def recalcular(cls, proceso_id, fecha):
+        """Reconstruye desde cero el resumen del proceso en `fecha`."""
+        registros = list(
+            RegistroAsistencia.objects.filter(proceso_id=proceso_id, fecha=fecha)
+            .order_by('momento_registro')
+            .values('proceso__candidato_id', 'momento_registro', 'fase_actual', 'movimiento', 'estado')
+        )
+
+        if not registros:
+            cls.objects.filter(proceso_id=proceso_id, fecha=fecha).delete()
+            return None
+
+        ultimo = registros[-1]
+        valores = {
+            'candidato_id': ultimo['proceso__candidato_id'],
+            'registros': len(registros),
+            'ultimo_momento': ultimo['momento_registro'],
+            'ultima_fase': ultimo['fase_actual'],
+            'ultimo_movimiento': ultimo['movimiento'],
+            'ultimo_estado': ultimo['estado'] or '',
+        }
+        for estado, contador in cls.CONTADOR_POR_ESTADO.items():
+            valores[contador] = sum(1 for r in registros if r['estado'] == estado)
+
+        resumen, _ = cls.objects.update_or_create(proceso_id=proceso_id, fecha=fecha, defaults=valores)
+        return resumen
+
+    def __str__(self):
+        return f"{self.candidato_id} - {self.fecha} ({self.registros} registros)"
+
     class Meta:
-        verbose_name_plural = 'Asistencia'
+        verbose_name = "Resumen Diario de Asistencia"
+        verbose_name_plural = "Resúmenes Diarios de Asistencia"
+        unique_together = ('proceso', 'fecha')
+        indexes = [
+            models.Index(fields=['candidato', 'fecha'], name='resumen_asist_cand_fecha_idx'),
+            models.Index(fields=['fecha', 'ultimo_estado'], name='resumen_asist_fecha_est_idx'),
+        ]
 
 class ComentarioProceso(models.Model):
     """
@@ -590,6 +1180,10 @@ class DocumentoCandidato(models.Model):
     def __str__(self):
         return f"{self.candidato.nombres_completos} - {self.get_tipo_documento_display()}"
     
+def hash_texto(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
 class MensajePlantilla(models.Model):
     """
     1. Almacena el texto base de los mensajes que se pueden reutilizar en las campañas.
@@ -609,6 +1203,8 @@ class MensajePlantilla(models.Model):
         blank=True, 
         help_text="Variables de Candidato usadas en el texto (separadas por coma), ej: DNI, telefono_whatsapp, sede_registro."
     )
+    version = models.PositiveIntegerField(default=1, editable=False)
+    hash_contenido = models.CharField(max_length=64, db_index=True, editable=False, default='')
     
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     creado_por = models.ForeignKey(
@@ -618,6 +1214,43 @@ class MensajePlantilla(models.Model):
         related_name='plantillas_creadas'
     )
 
+    @classmethod
+    def para_texto(cls, texto, **defaults):
+        """Plantilla con este texto (búsqueda por hash indexado) o una nueva con `defaults`."""
+        plantilla = cls.objects.filter(hash_contenido=hash_texto(texto)).order_by('pk').first()
+        if plantilla is None:
+            plantilla = cls.objects.create(contenido_texto=texto, **defaults)
+        return plantilla
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._contenido_original = instancia.__dict__.get('contenido_texto')
+        return instancia
+
+    def clean(self):
+        from candidatos.utils.plantillas import PlantillaInvalida, validar_texto
+        try:
+            validar_texto(self.contenido_texto)
+        except PlantillaInvalida as e:
+            raise ValidationError({'contenido_texto': str(e)})
+
+    def save(self, *args, **kwargs):
+        """Completa variables_usadas desde el texto y sube la versión si el texto cambió."""
+        from candidatos.utils.plantillas import PlantillaInvalida, validar_texto
+        try:
+            self.variables_usadas = ', '.join(validar_texto(self.contenido_texto))[:255]
+        except PlantillaInvalida:
+            pass
+
+        self.hash_contenido = hash_texto(self.contenido_texto)
+
+        original = getattr(self, '_contenido_original', None)
+        if not self._state.adding and original is not None and original != self.contenido_texto:
+            self.version += 1
+        super().save(*args, **kwargs)
+        self._contenido_original = self.contenido_texto
+
     def __str__(self):
         return self.titulo
     
@@ -626,6 +1259,14 @@ class MensajePlantilla(models.Model):
         verbose_name_plural = "Plantillas de Mensajes"
         ordering = ['titulo']
 
+class TareaEnvioMasivoQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # El motor y el webhook escriben con update(); fecha_actualizacion alimenta el
+        # ETag/Last-Modified del historial.
+        kwargs.setdefault('fecha_actualizacion', timezone.now())
+        return super().update(**kwargs)
+
+
 class TareaEnvioMasivo(models.Model):
     """
     2. Registro central de una campaña de envío masivo (el Historial que se muestra en el modal).
@@ -689,6 +1330,22 @@ class TareaEnvioMasivo(models.Model):
     
     total_entregados = models.PositiveIntegerField(default=0)
     total_fallidos = models.PositiveIntegerField(default=0)
+
+    destinatarios = models.JSONField(
+        default=list, blank=True,
+        help_text="DNIs seleccionados; los que aún no tienen DetalleEnvio quedan pendientes."
+    )
+    reanudar_en = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Si se agotó el cupo diario de Meta, momento desde el que se reanuda el envío."
+    )
+    fecha_estimada_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin Estimado")
+    fecha_actualizacion = models.DateTimeField(
+        auto_now=True,
+        help_text="Último cambio de la campaña o del estado de alguno de sus mensajes."
+    )
+
+    objects = TareaEnvioMasivoQuerySet.as_manager()
     
     def __str__(self):
         return f"Tarea #{self.pk} - {self.get_proceso_tipo_display()} ({self.get_estado_display()})"
@@ -697,6 +1354,31 @@ class TareaEnvioMasivo(models.Model):
         verbose_name = "Lista de Envío"
         verbose_name_plural = "Lista de Envíos"
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['-fecha_inicio', '-id'], name='tarea_envio_cursor_idx'),
+        ]
+
+class CuerpoMensaje(models.Model):
+    """
+    Texto de un mensaje guardado una sola vez, identificado por su SHA-256. Es la plantilla
+    tal como se envió; DetalleEnvio guarda solo el hash y las variables del destinatario.
+    """
+    hash = models.CharField(max_length=64, primary_key=True)
+    texto = models.TextField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def para_texto(cls, texto):
+        cuerpo, _ = cls.objects.get_or_create(hash=hash_texto(texto), defaults={'texto': texto})
+        return cuerpo
+
+    def __str__(self):
+        return self.hash[:12]
+
+    class Meta:
+        verbose_name = "Cuerpo de Mensaje"
+        verbose_name_plural = "Cuerpos de Mensajes"
+
 
 class DetalleEnvio(models.Model):
     """
@@ -718,8 +1400,16 @@ class DetalleEnvio(models.Model):
     
     telefono = models.CharField(max_length=20, help_text="Teléfono final usado (campo telefono_whatsapp del Candidato).")
     
-    contenido_final = models.TextField(
-        help_text="Contenido del mensaje después de la personalización de variables."
+    cuerpo = models.ForeignKey(
+        CuerpoMensaje,
+        on_delete=models.PROTECT,
+        null=True,
+        db_column='cuerpo_hash',
+        help_text="Texto base del mensaje (compartido por toda la campaña)."
+    )
+    variables = models.JSONField(
+        default=dict, blank=True,
+        help_text="Valores de las variables de la plantilla para este destinatario."
     )
     
     ESTADOS_META = [
@@ -753,10 +1443,469 @@ class DetalleEnvio(models.Model):
             dni_display = f'DNI Eliminado ({dni_guardado})'
         
         return f"Detalle {self.pk}: {dni_display} - {self.get_estado_meta_display()}"
+
+    @property
+    def contenido_final(self):
+        """Contenido del mensaje después de la personalización de variables."""
+        if self.cuerpo_id is None:
+            return ''
+        from candidatos.utils.plantillas import compilar_texto
+        return compilar_texto(self.cuerpo.texto).renderizar_variables(self.variables)
         
     
     class Meta:
         verbose_name = "Detalle de Envío"
         verbose_name_plural = "Detalles de Envíos"
         unique_together = ('tarea_envio', 'contacto')
-        ordering = ['-fecha_envio']
\ No newline at end of file
+        ordering = ['-fecha_envio']
+        indexes = [
+            models.Index(fields=['contacto', 'estado_meta'], name='detalle_contacto_estado_idx'),
+            models.Index(fields=['tarea_envio', 'estado_meta', 'id'], name='detalle_tarea_estado_idx'),
+        ]
+
+TELEFONO_MOVIL_RE = re.compile(r'^9\d{8}$')
+
+
+def telefono_e164(telefono):
+    """'987 654 321' -> '+51987654321' (con WHATSAPP_CODIGO_PAIS); '' si no es un celular válido."""
+    digitos = re.sub(r'\D', '', telefono or '')
+    codigo = settings.WHATSAPP_CODIGO_PAIS
+    if len(digitos) > 9 and digitos.startswith(codigo):
+        digitos = digitos[len(codigo):]
+    return f'+{codigo}{digitos}' if TELEFONO_MOVIL_RE.match(digitos) else ''
+
+
+class ResumenMensajeriaCandidato(models.Model):
+    """
+    Resumen de mensajería por candidato para armar audiencias sin recorrer DetalleEnvio.
+    Lo mantienen Candidato.save (teléfono), el envío masivo (registrar_envios) y el webhook
+    (registrar_estados / registrar_bajas); `recalcular` lo reconstruye desde DetalleEnvio.
+    """
+    candidato = models.OneToOneField(
+        'Candidato',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen_mensajeria'
+    )
+    telefono_e164 = models.CharField(max_length=16, blank=True, db_index=True)
+    telefono_valido = models.BooleanField(default=False)
+    opt_out = models.BooleanField(default=False, help_text="El candidato pidió no recibir más mensajes.")
+
+    envios_exitosos = models.PositiveIntegerField(default=0)
+    envios_fallidos = models.PositiveIntegerField(default=0)
+    ultimo_envio = models.DateTimeField(null=True, blank=True)
+    ultima_lectura = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def _fila(cls, candidato_id, telefono, **campos):
+        e164 = telefono_e164(telefono)
+        return cls(candidato_id=candidato_id, telefono_e164=e164, telefono_valido=bool(e164), **campos)
+
+    @classmethod
+    def actualizar_telefono(cls, candidato_id, telefono):
+        e164 = telefono_e164(telefono)
+        cls.objects.update_or_create(
+            candidato_id=candidato_id,
+            defaults={'telefono_e164': e164, 'telefono_valido': bool(e164)},
+        )
+
+    @classmethod
+    def _asegurar(cls, candidato_ids):
+        """Crea las filas que falten (candidatos anteriores al resumen o cargados en bloque)."""
+        telefonos = Candidato.objects.filter(pk__in=candidato_ids).values_list('pk', 'telefono_whatsapp')
+        cls.objects.bulk_create(
+            [cls._fila(pk, telefono) for pk, telefono in telefonos],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def _por_cantidad(conteo):
+        grupos = {}
+        for candidato_id, cantidad in conteo.items():
+            grupos.setdefault(cantidad, []).append(candidato_id)
+        return grupos.items()
+
+    @classmethod
+    def registrar_envios(cls, detalles):
+        """Suma DetalleEnvio recién creados con un UPDATE por estado (F())."""
+        exitosos, fallidos = {}, {}
+        for detalle in detalles:
+            if detalle.contacto_id:
+                conteo = fallidos if detalle.estado_meta == 'FALLIDO' else exitosos
+                conteo[detalle.contacto_id] = conteo.get(detalle.contacto_id, 0) + 1
+        if not exitosos and not fallidos:
+            return
+
+        cls._asegurar(set(exitosos) | set(fallidos))
+        ahora = timezone.now()
+        for campo, conteo in (('envios_exitosos', exitosos), ('envios_fallidos', fallidos)):
+            for cantidad, ids in cls._por_cantidad(conteo):
+                cls.objects.filter(pk__in=ids).update(**{campo: F(campo) + cantidad, 'ultimo_envio': ahora})
+
+    @classmethod
+    def registrar_estados(cls, leidos, fallidos):
+        """
+        `leidos`: candidatos con un mensaje que pasó a LEIDO; `fallidos`: {candidato: n}
+        mensajes aceptados por Meta que luego pasaron a FALLIDO.
+        """
+        if leidos:
+            cls.objects.filter(pk__in=set(leidos)).update(ultima_lectura=timezone.now())
+        for cantidad, ids in cls._por_cantidad(fallidos):
+            cls.objects.filter(pk__in=ids).update(
+                envios_exitosos=F('envios_exitosos') - cantidad,
+                envios_fallidos=F('envios_fallidos') + cantidad,
+            )
+
+    @classmethod
+    def registrar_bajas(cls, telefonos):
+        """Marca opt_out a los candidatos con esos teléfonos (en cualquier formato)."""
+        e164 = {telefono_e164(t) for t in telefonos} - {''}
+        if e164:
+            return cls.objects.filter(telefono_e164__in=e164).update(opt_out=True)
+        return 0
+
+    @classmethod
+    def recalcular(cls, candidato_ids=None, lote=2000):
+        """
+        Reconstruye el resumen desde Candidato y DetalleEnvio conservando opt_out. La última
+        lectura se aproxima con la fecha de envío del último mensaje LEIDO.
+        """
+        candidatos = Candidato.objects.order_by('pk')
+        if candidato_ids is not None:
+            candidatos = candidatos.filter(pk__in=list(candidato_ids))
+
+        total = 0
+        ids_lote = []
+
+        def escribir():
+            nonlocal total
+            telefonos = dict(Candidato.objects.filter(pk__in=ids_lote).values_list('pk', 'telefono_whatsapp'))
+            envios = {
+                fila['contacto_id']: fila for fila in
+                DetalleEnvio.objects.filter(contacto_id__in=ids_lote).values('contacto_id').annotate(
+                    exitosos=models.Count('pk', filter=~models.Q(estado_meta='FALLIDO')),
+                    fallidos=models.Count('pk', filter=models.Q(estado_meta='FALLIDO')),
+                    ultimo=models.Max('fecha_envio'),
+                    lectura=models.Max('fecha_envio', filter=models.Q(estado_meta='LEIDO')),
+                )
+            }
+            with transaction.atomic():
+                bajas = set(cls.objects.filter(pk__in=ids_lote, opt_out=True).values_list('pk', flat=True))
+                cls.objects.filter(pk__in=ids_lote).delete()
+                filas = []
+                for pk in ids_lote:
+                    envio = envios.get(pk, {})
+                    filas.append(cls._fila(
+                        pk, telefonos[pk], opt_out=pk in bajas,
+                        envios_exitosos=envio.get('exitosos', 0), envios_fallidos=envio.get('fallidos', 0),
+                        ultimo_envio=envio.get('ultimo'), ultima_lectura=envio.get('lectura'),
+                    ))
+                cls.objects.bulk_create(filas, batch_size=lote)
+            total += len(filas)
+            ids_lote.clear()
+
+        for pk in candidatos.values_list('pk', flat=True).iterator(chunk_size=lote):
+            ids_lote.append(pk)
+            if len(ids_lote) >= lote:
+                escribir()
+        if ids_lote:
+            escribir()
+        return total
+
+    def __str__(self):
+        return f"{self.candidato_id} ({self.envios_exitosos} envíos)"
+
+    class Meta:
+        verbose_name = "Resumen de Mensajería"
+        verbose_name_plural = "Resúmenes de Mensajería"
+        indexes = [
+            models.Index(fields=['telefono_valido', 'opt_out', 'ultimo_envio'], name='resumen_msj_envio_idx'),
+            models.Index(fields=['telefono_valido', 'opt_out', 'ultima_lectura'], name='resumen_msj_lectura_idx'),
+        ]
+
+
+class TrabajoExportacion(models.Model):
+    """
+    Exportación generada en segundo plano (utils/trabajos_exportacion). `clave` es el hash
+    de los filtros y del día: la misma exportación pedida el mismo día reutiliza el archivo.
+    """
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En Proceso'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    clave = models.CharField(max_length=64, db_index=True)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=15, choices=ESTADOS, default='PENDIENTE')
+
+    total_filas = models.PositiveIntegerField(default=0)
+    filas_procesadas = models.PositiveIntegerField(default=0)
+    archivo = models.FileField(upload_to='exportaciones/', null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    @property
+    def progreso(self):
+        if self.estado == 'COMPLETADO':
+            return 100
+        return int(self.filas_procesadas * 100 / self.total_filas) if self.total_filas else 0
+
+    def __str__(self):
+        return f"Exportación {self.pk} ({self.get_estado_display()})"
+
+    class Meta:
+        verbose_name = "Trabajo de Exportación"
+        verbose_name_plural = "Trabajos de Exportación"
+
+
+class CupoEnvioWhatsApp(models.Model):
+    """
+    Token bucket persistente por número de WhatsApp (phone_id), compartido por todos los
+    workers: `tokens` se recarga a `tasa_por_segundo` hasta `capacidad`, y `enviados_dia`
+    se limita a `limite_diario` (el nivel de mensajería de Meta; 0 = sin límite) por día local.
+    Una tasa de 0 (editada en el admin) pausa el número: no se recargan tokens.
+    """
+    # Segundos tras los que se vuelve a consultar un número pausado.
+    ESPERA_PAUSADO = 300
+
+    phone_id = models.CharField(max_length=50, unique=True)
+    capacidad = models.FloatField(help_text="Máximo de mensajes que se pueden enviar en ráfaga.")
+    tasa_por_segundo = models.FloatField(help_text="Mensajes por segundo permitidos para el número. 0: pausado.")
+    limite_diario = models.PositiveIntegerField(default=0, help_text="Mensajes por día según el nivel de Meta. 0: sin límite.")
+
+    tokens = models.FloatField(default=0)
+    tokens_actualizados = models.DateTimeField(default=timezone.now)
+    dia = models.DateField(null=True, blank=True)
+    enviados_dia = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def del_numero(cls, phone_id=None):
+        phone_id = phone_id or settings.WHATSAPP_PHONE_ID
+        try:
+            return cls.objects.get(phone_id=phone_id)
+        except cls.DoesNotExist:
+            pass
+
+        # La tasa de settings también fija la capacidad: con 0 el número nunca tendría tokens.
+        tasa = settings.WHATSAPP_MENSAJES_POR_SEGUNDO
+        if tasa <= 0:
+            raise ImproperlyConfigured("WHATSAPP_MENSAJES_POR_SEGUNDO debe ser mayor que 0.")
+        cupo, _ = cls.objects.get_or_create(
+            phone_id=phone_id,
+            defaults={
+                'capacidad': tasa,
+                'tasa_por_segundo': tasa,
+                'tokens': tasa,
+                'limite_diario': settings.WHATSAPP_LIMITE_DIARIO,
+            },
+        )
+        return cupo
+
+    def _recargar(self, ahora):
+        transcurrido = max((ahora - self.tokens_actualizados).total_seconds(), 0)
+        self.tokens = min(self.capacidad, self.tokens + transcurrido * max(self.tasa_por_segundo, 0))
+        self.tokens_actualizados = ahora
+
+        hoy = timezone.localdate(ahora)
+        if self.dia != hoy:
+            self.dia = hoy
+            self.enviados_dia = 0
+
+    @property
+    def pausado(self):
+        return self.tasa_por_segundo <= 0
+
+    def _segundos_hasta_manana(self, ahora):
+        manana = timezone.make_aware(datetime.combine(self.dia + timedelta(days=1), datetime.min.time()))
+        return (manana - ahora).total_seconds()
+
+    @classmethod
+    def reservar(cls, cantidad, phone_id=None):
+        """
+        Toma hasta `cantidad` tokens del número bloqueando su fila (select_for_update).
+
+        Returns:
+            tuple: (concedidos, espera) con los segundos hasta que haya al menos un token
+            disponible si no se concedió ninguno.
+        """
+        phone_id = phone_id or settings.WHATSAPP_PHONE_ID
+        cls.del_numero(phone_id)
+
+        with transaction.atomic():
+            cupo = cls.objects.select_for_update().get(phone_id=phone_id)
+            ahora = timezone.now()
+            cupo._recargar(ahora)
+
+            disponibles = int(cupo.tokens)
+            if cupo.limite_diario:
+                disponibles = min(disponibles, cupo.limite_diario - cupo.enviados_dia)
+            concedidos = max(min(cantidad, disponibles), 0)
+
+            cupo.tokens -= concedidos
+            cupo.enviados_dia += concedidos
+            cupo.save(update_fields=['tokens', 'tokens_actualizados', 'dia', 'enviados_dia'])
+
+        if concedidos:
+            return concedidos, 0.0
+        if cupo.limite_diario and cupo.enviados_dia >= cupo.limite_diario:
+            return 0, cupo._segundos_hasta_manana(ahora)
+        if cupo.pausado:
+            return 0, cls.ESPERA_PAUSADO
+        return 0, (1 - cupo.tokens) / cupo.tasa_por_segundo
+
+    def estimar_fin(self, pendientes, ahora=None):
+        """
+        Momento estimado en que se habrán enviado `pendientes` mensajes más con este cupo;
+        None si el número está pausado y los tokens que le quedan no alcanzan.
+        """
+        ahora = ahora or timezone.now()
+        self._recargar(ahora)
+
+        if self.pausado:
+            alcanza = pendientes <= int(self.tokens) and (
+                not self.limite_diario or pendientes <= self.limite_diario - self.enviados_dia
+            )
+            return ahora if alcanza else None
+
+        restante_hoy = pendientes
+        if self.limite_diario:
+            restante_hoy = min(pendientes, max(self.limite_diario - self.enviados_dia, 0))
+
+        if restante_hoy == pendientes:
+            return ahora + timedelta(
+                seconds=max(pendientes - int(self.tokens), 0) / self.tasa_por_segundo
+            )
+
+        excedente = pendientes - restante_hoy
+        dias = -(-excedente // self.limite_diario)
+        ultimo_dia = excedente - (dias - 1) * self.limite_diario
+        inicio = ahora + timedelta(seconds=self._segundos_hasta_manana(ahora)) + timedelta(days=dias - 1)
+        return inicio + timedelta(seconds=ultimo_dia / self.tasa_por_segundo)
+
+    def __str__(self):
+        return f"Cupo WhatsApp {self.phone_id}"
+
+    class Meta:
+        verbose_name = "Cupo de Envío WhatsApp"
+        verbose_name_plural = "Cupos de Envío WhatsApp"
+
+
+class EventoWebhookWhatsApp(models.Model):
+    """
+    Payload crudo recibido en WhatsappWebhookView, en cola hasta que utils/webhook_whatsapp
+    lo aplica. `lote` y `reclamado` marcan qué procesamiento lo tomó.
+    """
+    payload = models.JSONField()
+    recibido = models.DateTimeField(auto_now_add=True)
+    lote = models.CharField(max_length=32, null=True, blank=True)
+    reclamado = models.DateTimeField(null=True, blank=True)
+    procesado = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Evento webhook {self.pk} ({'procesado' if self.procesado else 'pendiente'})"
+
+    class Meta:
+        verbose_name = "Evento de Webhook WhatsApp"
+        verbose_name_plural = "Eventos de Webhook WhatsApp"
+        indexes = [
+            models.Index(fields=['procesado', 'lote'], name='webhook_pendiente_idx'),
+            models.Index(fields=['lote'], name='webhook_lote_idx'),
+        ]
+
+
+class SolicitudRegistroPublico(models.Model):
+    """
+    Clave de idempotencia de cada envío del formulario público (campo oculto generado al
+    mostrarlo). Un doble clic o un reintento con la misma clave no repite el registro.
+    """
+    clave = models.CharField(max_length=64, unique=True)
+    candidato = models.ForeignKey('Candidato', on_delete=models.CASCADE, related_name='solicitudes_registro')
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Solicitud {self.clave} ({self.candidato_id})"
+
+    class Meta:
+        verbose_name = "Solicitud de Registro Público"
+        verbose_name_plural = "Solicitudes de Registro Público"
+
+
+class SugerenciaFusionCandidato(models.Model):
+    """
+    Par de candidatos que probablemente son la misma persona (DNI mal digitado, otro tipo
+    de documento, mismo teléfono...). La genera utils/duplicados; `candidato_a` siempre
+    tiene el DNI menor para que cada par se guarde una sola vez.
+    """
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente de revisión'),
+        ('FUSIONADO', 'Fusionado'),
+        ('DESCARTADO', 'No es duplicado'),
+    ]
+
+    candidato_a = models.ForeignKey('Candidato', on_delete=models.CASCADE, related_name='sugerencias_fusion_a')
+    candidato_b = models.ForeignKey('Candidato', on_delete=models.CASCADE, related_name='sugerencias_fusion_b')
+    puntaje = models.PositiveSmallIntegerField(help_text="Similitud del par, de 0 a 100.")
+    motivos = models.JSONField(default=list, help_text="Coincidencias que suman al puntaje: telefono, nombre, dni, email.")
+    estado = models.CharField(max_length=12, choices=ESTADOS, default='PENDIENTE')
+
+    revisado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def registrar(cls, pares, candidato_ids=None):
+        """
+        Guarda `pares` {(dni_a, dni_b): (puntaje, motivos)} con dni_a < dni_b. Los pares ya
+        revisados (fusionados o descartados) no se tocan. Las sugerencias pendientes que ya no
+        aparecen en `pares` se borran: todas si `candidato_ids` es None (pasada completa) o
+        solo las de esos candidatos (pasada incremental).
+
+        Returns:
+            tuple: (creadas, actualizadas, borradas)
+        """
+        existentes = cls.objects.all()
+        if candidato_ids is not None:
+            candidato_ids = list(candidato_ids)
+            existentes = existentes.filter(
+                models.Q(candidato_a__in=candidato_ids) | models.Q(candidato_b__in=candidato_ids)
+            )
+        # En la pasada incremental cada par incluye a uno de `candidato_ids`, así que ya está aquí.
+        actuales = {
+            (s.candidato_a_id, s.candidato_b_id): s
+            for s in existentes.only('candidato_a', 'candidato_b', 'puntaje', 'motivos', 'estado')
+        }
+
+        nuevas, cambiadas = [], []
+        for (dni_a, dni_b), (puntaje, motivos) in pares.items():
+            sugerencia = actuales.get((dni_a, dni_b))
+            if sugerencia is None:
+                nuevas.append(cls(candidato_a_id=dni_a, candidato_b_id=dni_b, puntaje=puntaje, motivos=motivos))
+            elif sugerencia.estado == 'PENDIENTE' and (sugerencia.puntaje, sugerencia.motivos) != (puntaje, motivos):
+                sugerencia.puntaje, sugerencia.motivos = puntaje, motivos
+                cambiadas.append(sugerencia)
+        obsoletas = [s.pk for par, s in actuales.items() if s.estado == 'PENDIENTE' and par not in pares]
+
+        with transaction.atomic():
+            cls.objects.bulk_create(nuevas, batch_size=1000, ignore_conflicts=True)
+            cls.objects.bulk_update(cambiadas, ['puntaje', 'motivos'], batch_size=1000)
+            for inicio in range(0, len(obsoletas), 1000):
+                cls.objects.filter(pk__in=obsoletas[inicio:inicio + 1000]).delete()
+        return len(nuevas), len(cambiadas), len(obsoletas)
+
+    def __str__(self):
+        return f"{self.candidato_a_id} ~ {self.candidato_b_id} ({self.puntaje})"
+
+    class Meta:
+        verbose_name = "Sugerencia de Fusión"
+        verbose_name_plural = "Sugerencias de Fusión"
+        constraints = [
+            models.UniqueConstraint(fields=['candidato_a', 'candidato_b'], name='sugerencia_fusion_par_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['estado', '-puntaje'], name='sugerencia_fusion_estado_idx'),
+        ]
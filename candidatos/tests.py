@@ -1,3 +1,1226 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+from datetime import date, datetime, time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pandas as pd
+import requests
+from openpyxl import load_workbook
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Candidato, CupoEnvioWhatsApp, DatosCualificacion, DetalleEnvio, Empresa, EventoWebhookWhatsApp, MensajePlantilla,
+    Proceso, ProcesoTransicion, RegistroAsistencia, ResumenAsistenciaDiaria, ResumenEmbudoDiario,
+    ResumenMensajeriaCandidato, Sede, SolicitudRegistroPublico, SugerenciaFusionCandidato, Supervisor, TareaEnvioMasivo,
+    TipoDocumento, TokenBusquedaCandidato, TrabajoExportacion, normalizar_nombre, normalizar_texto,
+)
+from .utils.asistencia import (
+    RECHAZO_CICLO_COMPLETO, RECHAZO_CONCURRENTE, RECHAZO_FALTA_REGISTRADA, RECHAZO_REPETIDO, AsistenciaRechazada,
+    decidir_asistencia, registrar_asistencia,
+)
+from .utils.audiencias import FILTRO_NUNCA_CONTACTADO, fechas_disponibles, resolver_audiencia
+from .utils.busqueda import buscar_candidatos
+from .utils.duplicados import detectar_duplicados, dni_a_un_cambio, vecinos_dni
+from .utils.embudo import recalcular_resumen_dia
+from .utils.envios import ejecutar_envio_masivo, reanudar_envios_pendientes
+from .utils.exportacion import COLUMNAS_CANDIDATO, EXPORT_ANCHO_MAXIMO, escribir_xlsx, fila_candidato
+from .utils.importacion import ImportacionCandidatos
+from .utils.kiosko import mapa_procesos_activos
+from .utils.plantillas import PlantillaInvalida, validar_texto
+from .utils.registro_publico import EnvioRepetido, registrar_postulacion
+from .utils.transiciones import RESULTADO_ACTUALIZADO, aplicar_transicion_masiva
+from .utils.webhook_whatsapp import procesar_eventos_pendientes
+from .utils.whatsapp_api import ClienteWhatsApp
+
+
+def crear_candidato(dni, nombres='Ana Pérez', telefono='987654321', **campos):
+    empresa, _ = Empresa.objects.get_or_create(nombre='Empresa Prueba')
+    sede, _ = Sede.objects.get_or_create(empresa=empresa, nombre='Sede Prueba', ciudad='Lima')
+    TipoDocumento.objects.get_or_create(pk=1, defaults={'nombre': 'DNI'})
+    return Candidato.objects.create(
+        DNI=dni, nombres_completos=nombres, telefono_whatsapp=telefono, distrito='Lima', sede_registro=sede, **campos
+    )
+
+
+class ProcesoActualTests(TestCase):
+
+    def setUp(self):
+        self.candidato = crear_candidato('70000021')
+
+    def crear_proceso(self, fecha, estado='CONVOCADO'):
+        return Proceso.objects.create(
+            candidato=self.candidato, empresa_proceso=self.candidato.sede_registro.empresa,
+            sede_proceso=self.candidato.sede_registro, fecha_inicio=fecha, estado=estado,
+        )
+
+    def test_save_de_instancia_vieja_no_pisa_el_puntero(self):
+        viejo = Candidato.objects.get(pk='70000021')
+        proceso = self.crear_proceso(date(2025, 10, 1))
+
+        viejo.distrito = 'Surco'
+        viejo.save()
+
+        candidato = Candidato.objects.get(pk='70000021')
+        self.assertEqual(candidato.distrito, 'Surco')
+        self.assertEqual(candidato.proceso_actual_id, proceso.pk)
+        self.assertEqual(candidato.proceso_actual_estado, 'CONVOCADO')
+
+    def test_save_de_instancia_diferida_no_carga_campos(self):
+        proceso = self.crear_proceso(date(2025, 10, 1))
+        candidato = Candidato.objects.only('DNI', 'distrito').get(pk='70000021')
+
+        # SAVEPOINT, UPDATE de distrito, UPDATE del puntero y RELEASE.
+        with self.assertNumQueries(4):
+            candidato.distrito = 'Surco'
+            candidato.save()
+
+        candidato = Candidato.objects.get(pk='70000021')
+        self.assertEqual((candidato.distrito, candidato.nombres_completos), ('Surco', 'Ana Pérez'))
+        self.assertEqual(candidato.nombre_normalizado, 'ana perez')
+        self.assertEqual(candidato.proceso_actual_id, proceso.pk)
+
+
+    def test_proceso_activo_es_el_mas_reciente_no_final(self):
+        self.assertIsNone(Candidato.objects.get(pk='70000021').proceso_activo)
+
+        abierto = self.crear_proceso(date(2025, 9, 1))
+        candidato = Candidato.objects.select_related('proceso_actual').get(pk='70000021')
+        with self.assertNumQueries(0):
+            self.assertEqual(candidato.proceso_activo, abierto)
+
+        # El más reciente está cerrado: sigue valiendo el anterior abierto.
+        cerrado = self.crear_proceso(date(2025, 10, 1), estado='ABANDONO')
+        candidato = Candidato.objects.get(pk='70000021')
+        self.assertEqual(candidato.proceso_actual_id, cerrado.pk)
+        self.assertEqual(candidato.proceso_activo, abierto)
+
+        Proceso.objects.filter(pk=abierto.pk).update(estado='NO_APTO')
+        self.assertIsNone(Candidato.objects.get(pk='70000021').proceso_activo)
+
+
+class TransicionProcesoTests(TestCase):
+
+    def setUp(self):
+        candidato = crear_candidato('70000041')
+        proceso = Proceso.objects.create(
+            candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+            sede_proceso=candidato.sede_registro, fecha_inicio=date(2025, 10, 1),
+        )
+        self.proceso = Proceso.objects.get(pk=proceso.pk)
+
+    def test_cambio_de_estado_sin_select_previo(self):
+        self.proceso.estado = 'CONFIRMADO'
+        with CaptureQueriesContext(connection) as consultas:
+            self.proceso.save()
+
+        # La primera consulta tras el SAVEPOINT ya es el UPDATE, sin releer la fila.
+        self.assertTrue(consultas[1]['sql'].startswith('UPDATE'), consultas[1]['sql'])
+        self.assertEqual(self.proceso.estado_original, 'CONFIRMADO')
+        proceso = Proceso.objects.get(pk=self.proceso.pk)
+        self.assertEqual(proceso.fecha_confirmado, date.today())
+        self.assertEqual(
+            list(proceso.transiciones.order_by('pk').values_list('estado_anterior', 'estado_nuevo')),
+            [(None, 'CONVOCADO'), ('CONVOCADO', 'CONFIRMADO')],
+        )
+
+    def test_guardar_sin_cambio_de_estado(self):
+        self.proceso.kanban_activo = False
+        self.proceso.save()
+
+        self.assertIsNone(Proceso.objects.get(pk=self.proceso.pk).fecha_confirmado)
+        self.assertEqual(self.proceso.transiciones.count(), 1)
+
+    def test_estado_diferido_se_consulta_al_necesitarlo(self):
+        proceso = Proceso.objects.only('pk', 'candidato').get(pk=self.proceso.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(proceso.estado_original, 'CONVOCADO')
+
+
+class EmbudoTests(TestCase):
+
+    def test_permanencia_y_resumen_diario(self):
+        dia = date(2025, 10, 1)
+        primero, segundo = (crear_candidato(dni) for dni in ('70000051', '70000052'))
+        procesos = [
+            Proceso.objects.create(
+                candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+                sede_proceso=candidato.sede_registro, fecha_inicio=dia,
+            )
+            for candidato in (primero, segundo)
+        ]
+        ProcesoTransicion.objects.all().delete()
+
+        def momento(hora):
+            return timezone.make_aware(datetime(2025, 10, 1, hora))
+
+        def registrar(proceso, nuevo, hora):
+            anterior, proceso.estado = proceso.estado, nuevo
+            return ProcesoTransicion.registrar([(proceso, anterior)], fecha=momento(hora))
+
+        # Sin historial previo se mide desde la columna de fase (fecha_inicio a medianoche).
+        self.assertEqual(registrar(procesos[0], 'CONFIRMADO', 10)[0].permanencia_segundos, 10 * 3600)
+        self.assertEqual(registrar(procesos[0], 'TEORIA', 12)[0].permanencia_segundos, 2 * 3600)
+        self.assertEqual(registrar(procesos[1], 'ABANDONO', 14)[0].permanencia_segundos, 14 * 3600)
+
+        self.assertEqual(recalcular_resumen_dia(dia), 4)
+        self.assertEqual(recalcular_resumen_dia(dia), 4)
+        resumen = {
+            fila.estado: (fila.entradas, fila.salidas, fila.avances, fila.mediana_permanencia_segundos)
+            for fila in ResumenEmbudoDiario.objects.filter(fecha=dia)
+        }
+        self.assertEqual(resumen, {
+            'CONVOCADO': (0, 2, 1, 12 * 3600),
+            'CONFIRMADO': (1, 1, 1, 2 * 3600),
+            'TEORIA': (1, 0, 0, None),
+            'ABANDONO': (1, 0, 0, None),
+        })
+        self.assertEqual(ResumenEmbudoDiario.objects.get(fecha=dia, estado='CONVOCADO').tasa_conversion, 0.5)
+
+
+class TransicionMasivaTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('operador', password='x')
+        self.supervisor = Supervisor.objects.create(nombre='Supervisor Prueba')
+        self.sede = crear_candidato('70009999').sede_registro
+
+    def lote(self, inicio, cantidad):
+        return [crear_candidato(str(70001000 + inicio + i)).DNI for i in range(cantidad)]
+
+    def mover(self, dnis, estado, **extra):
+        with CaptureQueriesContext(connection) as consultas:
+            resultados = aplicar_transicion_masiva(dnis, estado, self.usuario, **extra)
+        self.assertEqual(set(resultados.values()), {RESULTADO_ACTUALIZADO})
+        return len(consultas)
+
+    def test_consultas_constantes_y_puntero_actualizado(self):
+        uno, varios = self.lote(0, 1), self.lote(100, 25)
+        convocatoria = {'fecha_inicio': date(2025, 10, 1), 'supervisor': self.supervisor, 'empresa': self.sede.empresa}
+
+        self.assertEqual(self.mover(uno, 'CONVOCADO', **convocatoria), self.mover(varios, 'CONVOCADO', **convocatoria))
+        self.assertEqual(self.mover(uno, 'CONFIRMADO'), self.mover(varios, 'CONFIRMADO'))
+
+        for candidato in Candidato.objects.filter(pk__in=uno + varios).select_related('proceso_actual'):
+            self.assertEqual(candidato.estado_actual, 'CONFIRMADO')
+            self.assertEqual(candidato.proceso_actual_estado, 'CONFIRMADO')
+            self.assertEqual(candidato.proceso_actual.fecha_confirmado, date.today())
+            self.assertEqual(
+                list(candidato.proceso_actual.transiciones.order_by('pk').values_list('estado_anterior', 'estado_nuevo')),
+                [(None, 'CONVOCADO'), ('CONVOCADO', 'CONFIRMADO')],
+            )
+        self.assertEqual(ProcesoTransicion.objects.filter(usuario=self.usuario).count(), 2 * 26)
+
+
+class KanbanPaginacionTests(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            crear_candidato(f'7000010{i}', nombres=f'Postulante {i}', telefono=f'98765432{i}')
+        crear_candidato('70000199', estado_actual='NO_APTO')
+        self.client.force_login(User.objects.create_user('reclutador'))
+
+    def pagina(self, cursor=None):
+        parametros = {'cursor': cursor} if cursor else {}
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('kanban_columna', args=['REGISTRADO']), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json(), len(consultas)
+
+    @mock.patch('candidatos.views.KANBAN_PAGE_SIZE', 2)
+    def test_columna_se_recorre_por_cursor(self):
+        paginas, consultas = [], []
+        datos, n = self.pagina()
+        while True:
+            paginas.append((datos['count'], datos['next_cursor']))
+            consultas.append(n)
+            if not datos['next_cursor']:
+                break
+            datos, n = self.pagina(datos['next_cursor'])
+
+        self.assertEqual(paginas, [(2, '70000101'), (2, '70000103'), (1, None)])
+        self.assertEqual(len(set(consultas)), 1)
+
+    @mock.patch('candidatos.views.KANBAN_PAGE_SIZE', 2)
+    def test_tablero_muestra_primera_pagina_y_totales(self):
+        respuesta = self.client.get(reverse('kanban_dashboard'))
+
+        self.assertEqual(len(respuesta.context['kanban_data']['REGISTRADO']), 2)
+        self.assertEqual(respuesta.context['kanban_cursores']['REGISTRADO'], '70000101')
+        self.assertEqual(respuesta.context['kanban_totales']['REGISTRADO'], 5)
+        self.assertEqual(respuesta.context['total_candidatos'], 5)
+
+    def test_columna_desconocida(self):
+        respuesta = self.client.get(reverse('kanban_columna', args=['NO_APTO']))
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class NombreNormalizadoTests(TestCase):
+
+    def test_normalizacion(self):
+        self.assertEqual(normalizar_texto('  Luis  VELÁSQUEZ-Peña '), 'luis velasquez pena')
+        self.assertEqual(normalizar_texto('María_José Ñuflo'), 'maria jose nuflo')
+        self.assertEqual(normalizar_nombre('Velásquez Luis'), 'luis velasquez')
+        self.assertEqual(normalizar_nombre('LUIS  velasquez'), 'luis velasquez')
+        self.assertEqual(normalizar_nombre(None), '')
+
+    def test_save_mantiene_la_columna(self):
+        candidato = crear_candidato('70000141', nombres='Pérez  Ana')
+        self.assertEqual(Candidato.objects.get(pk='70000141').nombre_normalizado, 'ana perez')
+
+        candidato.nombres_completos = 'Ana Lucía PÉREZ'
+        candidato.save(update_fields=['nombres_completos'])
+        self.assertEqual(Candidato.objects.get(pk='70000141').nombre_normalizado, 'ana lucia perez')
+        self.assertEqual(list(Candidato.con_mismo_nombre('perez ANA LUCÍA').values_list('pk', flat=True)), ['70000141'])
+        self.assertFalse(Candidato.con_mismo_nombre('  ').exists())
+
+    def test_recalculo_tras_update_masivo(self):
+        crear_candidato('70000142', nombres='Ana Pérez')
+        crear_candidato('70000143', nombres='Luis Quispe')
+        Candidato.objects.filter(pk='70000142').update(nombres_completos='José Pérez')
+
+        salida = io.StringIO()
+        call_command('normalizar_nombres_candidatos', stdout=salida)
+
+        self.assertIn('actualizados: 1', salida.getvalue())
+        self.assertEqual(Candidato.objects.get(pk='70000142').nombre_normalizado, 'jose perez')
+        self.assertEqual(Candidato.normalizar_nombres(), 0)
+
+
+class DuplicadosTests(TestCase):
+
+    def setUp(self):
+        crear_candidato('41234567', nombres='Ana Pérez', telefono='987654321')
+        # Mismo teléfono y nombre en otro orden.
+        crear_candidato('87654321', nombres='PEREZ ana', telefono='987654321')
+        # DNI con dos dígitos traspuestos y el nombre completo extendido.
+        crear_candidato('41234576', nombres='Ana Pérez Quispe', telefono='912345678')
+        # Solo comparte el teléfono (un familiar): no llega al umbral.
+        crear_candidato('55555555', nombres='Luis Torres', telefono='987654321')
+
+    def sugerencias(self):
+        return {
+            (s.candidato_a_id, s.candidato_b_id): (s.puntaje, s.motivos, s.estado)
+            for s in SugerenciaFusionCandidato.objects.all()
+        }
+
+    def test_dni_a_un_cambio(self):
+        for otro in ('41234568', '4123456', '412345678', '41234576'):
+            self.assertTrue(dni_a_un_cambio('41234567', otro), otro)
+            self.assertIn(otro, vecinos_dni('41234567'))
+        for otro in ('41234567', '41234599', '14234576'):
+            self.assertFalse(dni_a_un_cambio('41234567', otro), otro)
+        self.assertNotIn('41234567', vecinos_dni('41234567'))
+
+    def test_pasada_completa(self):
+        self.assertEqual(detectar_duplicados(), (2, 0, 0))
+        self.assertEqual(self.sugerencias(), {
+            ('41234567', '87654321'): (85, ['telefono', 'nombre'], 'PENDIENTE'),
+            ('41234567', '41234576'): (60, ['nombre_parcial', 'dni'], 'PENDIENTE'),
+        })
+
+    def test_pasada_incremental_respeta_revisiones(self):
+        detectar_duplicados()
+        SugerenciaFusionCandidato.objects.filter(candidato_b='87654321').update(estado='DESCARTADO')
+        Candidato.objects.filter(pk='41234576').update(nombre_normalizado='maria quispe')
+
+        self.assertEqual(detectar_duplicados(['41234576', '87654321']), (0, 0, 1))
+        self.assertEqual(self.sugerencias(), {
+            ('41234567', '87654321'): (85, ['telefono', 'nombre'], 'DESCARTADO'),
+        })
+
+    def test_bloque_grande_se_ignora(self):
+        # Teléfono + email: solo el bloque del teléfono (3 fichas) une a este par.
+        Candidato.objects.filter(pk__in=['41234567', '55555555']).update(email='familia@correo.pe')
+
+        with mock.patch('candidatos.utils.duplicados.MAX_BLOQUE', 2):
+            detectar_duplicados()
+        self.assertNotIn(('41234567', '55555555'), self.sugerencias())
+
+        detectar_duplicados()
+        self.assertEqual(self.sugerencias()[('41234567', '55555555')][:2], (75, ['telefono', 'email']))
+
+
+class BusquedaCandidatosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        crear_candidato('70000139', nombres='Ana Pérez', telefono='987654321')
+        crear_candidato('70000132', nombres='Anabel Pereyra', telefono='912345678')
+        crear_candidato('70000133', nombres='PÉREZ Quispe, Ana María', telefono='998877665')
+
+    def dnis(self, consulta):
+        return [fila['DNI'] for fila in buscar_candidatos(consulta)]
+
+    def test_ranking_por_palabra_completa_y_nombre_exacto(self):
+        # Nombre completo (en cualquier orden) > palabras completas > solo prefijos.
+        self.assertEqual(self.dnis('ana perez'), ['70000139', '70000133'])
+        self.assertEqual(self.dnis('PEREZ ana'), ['70000139', '70000133'])
+        self.assertEqual(self.dnis('ana pere'), ['70000133', '70000139', '70000132'])
+        self.assertEqual(self.dnis('quis'), ['70000133'])
+        self.assertEqual(self.dnis('ana lopez'), [])
+
+    def test_documento_y_telefono(self):
+        self.assertEqual(self.dnis('987 654 321'), ['70000139'])
+        self.assertEqual(self.dnis('70000132'), ['70000132'])
+        self.assertEqual(self.dnis('7000013'), ['70000132', '70000133', '70000139'])
+
+    def test_cache_se_invalida_al_reindexar(self):
+        self.assertEqual(self.dnis('luis'), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.dnis('luis'), [])
+
+        candidato = Candidato.objects.get(pk='70000132')
+        with self.captureOnCommitCallbacks(execute=True):
+            candidato.nombres_completos = 'Luis Pereyra'
+            candidato.save()
+
+        self.assertEqual(self.dnis('luis'), ['70000132'])
+        self.assertFalse(TokenBusquedaCandidato.objects.filter(candidato=candidato, token='anabel').exists())
+
+    def test_vista_de_autocompletado(self):
+        respuesta = self.client.get(reverse('candidato_search_api'), {'q': 'anab'})
+        self.assertEqual(respuesta.json(), [
+            {'DNI': '70000132', 'nombres_completos': 'Anabel Pereyra', 'telefono_whatsapp': '912345678'},
+        ])
+
+
+class ImportacionCandidatosTests(TestCase):
+
+    def setUp(self):
+        existente = crear_candidato('70000031', nombres='Ana Pérez', telefono='987654321')
+        self.sede, self.tipo_documento = existente.sede_registro, existente.tipo_documento
+
+    def importar(self, filas, **opciones):
+        importacion = ImportacionCandidatos(self.sede, self.tipo_documento, **opciones)
+        df = pd.DataFrame(filas, columns=['Documento', 'Apellidos y nombres', 'Celular'], dtype=str)
+        with CaptureQueriesContext(connection) as consultas:
+            importacion.procesar(df)
+        return importacion, len(consultas)
+
+    def filas(self, inicio, cantidad):
+        return [(str(71000000 + inicio + i), f'Postulante {inicio + i}', f'9{inicio + i:08d}') for i in range(cantidad)]
+
+    def test_consultas_fijas_por_lote(self):
+        pequeno, consultas_pequeno = self.importar(self.filas(0, 2) + [('70000031', 'Ana Pérez', '999888777')])
+        grande, consultas_grande = self.importar(self.filas(100, 40) + [('70000031', 'Ana Pérez', '999888776')])
+
+        self.assertEqual((pequeno.creados, pequeno.actualizados), (2, 1))
+        self.assertEqual((grande.creados, grande.actualizados), (40, 1))
+        self.assertEqual(consultas_pequeno, consultas_grande)
+
+    def test_simulacion_no_escribe(self):
+        lineas = []
+        importacion, _ = self.importar(
+            self.filas(0, 3) + [('70000031', 'Ana Pérez', '999888777'), ('12', 'Sin DNI', '987654321')],
+            simular=True, al_cambiar=lineas.append,
+        )
+        self.assertEqual((importacion.creados, importacion.actualizados, importacion.invalidas), (3, 1, 1))
+        self.assertEqual(Candidato.objects.count(), 1)
+        self.assertEqual(Candidato.objects.get(pk='70000031').telefono_whatsapp, '987654321')
+        self.assertEqual([linea[0] for linea in lineas], ['!', '+', '+', '+', '~'])
+
+    def test_candidato_importado_queda_indexado(self):
+        self.importar([(' 71.234.567 ', '  JOSÉ  Quispe ', '+51 912 345 678')])
+
+        candidato = Candidato.objects.get(pk='71234567')
+        self.assertEqual(candidato.nombres_completos, 'JOSÉ Quispe')
+        self.assertEqual(candidato.telefono_whatsapp, '912345678')
+        self.assertEqual(candidato.nombre_normalizado, 'jose quispe')
+        self.assertTrue(TokenBusquedaCandidato.objects.filter(candidato=candidato, token='quispe').exists())
+        resumen = ResumenMensajeriaCandidato.objects.get(candidato=candidato)
+        self.assertTrue(resumen.telefono_valido)
+        self.assertEqual(resumen.telefono_e164, '+51912345678')
+
+    def test_posible_duplicado_se_omite(self):
+        importacion, _ = self.importar([('71234567', 'PEREZ ana', '987654321')])
+        self.assertEqual((importacion.creados, importacion.posibles_duplicados), (0, 1))
+        self.assertFalse(Candidato.objects.filter(pk='71234567').exists())
+
+
+class IndicesConsultasTests(TestCase):
+    """El plan (EXPLAIN) de las consultas del Kanban, la asistencia y los procesos usa sus índices."""
+
+    def consultas(self):
+        """(consulta, índice en MySQL, texto esperado en el plan de SQLite)."""
+        hoy = date(2025, 10, 1)
+        return [
+            # Kanban / audiencia de registrados.
+            (Candidato.objects.filter(estado_actual='REGISTRADO', kanban_activo=True, fecha_registro=hoy),
+             'candidato_estado_kanban_idx', 'USING INDEX candidato_estado_kanban_idx'),
+            # Fechas de convocatoria del Kanban.
+            (Proceso.objects.filter(kanban_activo=True).values('fecha_inicio').order_by('-fecha_inicio'),
+             'proceso_fecha_kanban_idx', 'USING COVERING INDEX proceso_fecha_kanban_idx'),
+            (Proceso.objects.filter(candidato_id='70000001', estado='CONVOCADO', fecha_inicio=hoy),
+             'proceso_cand_estado_fecha_idx', 'USING INDEX proceso_cand_estado_fecha_idx'),
+            # Asistencia del día: la restricción única (proceso, fecha, movimiento) es el índice.
+            # SQLite la crea como UNIQUE de la tabla y su índice se llama sqlite_autoindex_*.
+            (RegistroAsistencia.objects.filter(proceso_id=1, fecha=hoy, movimiento='ENTRADA'),
+             'asistencia_unica_por_dia', '(proceso_id=? AND fecha=? AND movimiento=?)'),
+            (RegistroAsistencia.objects.filter(proceso_id=1, fecha=hoy, estado='F'),
+             'asistencia_unica_por_dia', '(proceso_id=? AND fecha=?)'),
+            (DetalleEnvio.objects.filter(contacto_id='70000001', estado_meta='read'),
+             'detalle_contacto_estado_idx', 'USING INDEX detalle_contacto_estado_idx'),
+        ]
+
+    @skipUnless(connection.vendor == 'sqlite', "Planes de SQLite.")
+    def test_planes_sqlite(self):
+        for consulta, _, esperado in self.consultas():
+            with self.subTest(consulta=str(consulta.query)):
+                plan = consulta.explain()
+                self.assertIn(esperado, plan)
+                self.assertNotRegex(plan, r'(?m)\bSCAN candidatos_\w+$')
+
+    @skipUnless(connection.vendor == 'mysql', "Planes de MySQL.")
+    def test_planes_mysql(self):
+        for consulta, indice, _ in self.consultas():
+            with self.subTest(consulta=str(consulta.query)):
+                self.assertIn(indice, consulta.explain(format='JSON'))
+
+
+class ExportacionTests(TestCase):
+
+    def celdas(self, candidato, proceso):
+        return dict(zip(COLUMNAS_CANDIDATO, fila_candidato(candidato, proceso)))
+
+    def test_fila_sin_cualificacion_ni_proceso(self):
+        candidato = crear_candidato('70000002', email=None)
+        celdas = self.celdas(Candidato.objects.get(pk='70000002'), None)
+
+        self.assertEqual(len(celdas), len(COLUMNAS_CANDIDATO))
+        self.assertEqual(celdas['DNI'], '70000002')
+        self.assertEqual(celdas['Email'], '')
+        self.assertEqual(celdas['Estado_Actual_Candidato'], candidato.get_estado_actual_display())
+        self.assertEqual(celdas['Sede_Registro'], 'Sede Prueba')
+        self.assertEqual(celdas['Secundaria_Completa'], '')
+        self.assertEqual(celdas['Empresa_Cliente'], '')
+        self.assertEqual(celdas['Estado_Proceso'], 'N/A')
+
+    def test_fila_con_cualificacion_y_proceso(self):
+        candidato = crear_candidato('70000003')
+        DatosCualificacion.objects.create(
+            candidato=candidato, distrito='Lima', secundaria_completa=True, experiencia_campanas_espanolas=False,
+            experiencia_ventas_tipo='CALLCENTER', conforme_beneficios='SI', disponibilidad_horario=True,
+            dificultad_habla=False,
+        )
+        proceso = Proceso.objects.create(
+            candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+            sede_proceso=candidato.sede_registro, fecha_inicio=date(2025, 10, 1), estado='TEORIA',
+        )
+        candidato = Candidato.objects.select_related('datoscualificacion').get(pk='70000003')
+        celdas = self.celdas(candidato, proceso)
+
+        self.assertEqual(celdas['Secundaria_Completa'], 'SÍ')
+        self.assertEqual(celdas['Exp_Campanas_Espanolas'], 'NO')
+        self.assertEqual(celdas['Tipo_Exp_Ventas'], 'Sí, ventas por teléfono (CALLCENTER)')
+        self.assertIsNone(celdas['Tiempo_Experiencia_Vendedor'])
+        self.assertEqual(celdas['Empresa_Cliente'], 'Empresa Prueba')
+        self.assertEqual(celdas['Fecha_Convocatoria'], '01/10/2025')
+        self.assertEqual(celdas['Fecha_Confirmado'], '')
+        self.assertEqual(celdas['Supervisor_Asignado'], '')
+        self.assertEqual(celdas['Estado_Proceso'], 'Capacitación Teórica')
+
+    def test_xlsx_en_modo_streaming(self):
+        destino = io.BytesIO()
+        filas = iter([('1', 'x' * 100), ('2', None)])
+        escribir_xlsx(filas, ['Id', 'Texto'], 'Una hoja con un nombre demasiado largo', destino, muestra=1)
+
+        hoja = load_workbook(destino).active
+        self.assertEqual(hoja.title, 'Una hoja con un nombre demasiad')
+        self.assertEqual([list(fila) for fila in hoja.iter_rows(values_only=True)], [
+            ['Id', 'Texto'], ['1', 'x' * 100], ['2', None],
+        ])
+        self.assertEqual(hoja.column_dimensions['B'].width, EXPORT_ANCHO_MAXIMO)
+
+    def test_vista_exporta_con_consultas_fijas(self):
+        self.client.force_login(User.objects.create_user('analista'))
+
+        def exportar():
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(reverse('candidatos_export'), {'estado': 'REGISTRADO'})
+                contenido = b''.join(respuesta.streaming_content)
+            filas = list(load_workbook(io.BytesIO(contenido)).active.iter_rows(values_only=True))
+            return filas, len(consultas)
+
+        crear_candidato('70000081')
+        filas, consultas_una = exportar()
+        for i in range(2, 6):
+            crear_candidato(f'7000008{i}')
+        filas, consultas_cinco = exportar()
+
+        self.assertEqual(list(filas[0]), COLUMNAS_CANDIDATO)
+        self.assertEqual([fila[0] for fila in filas[1:]], [f'7000008{i}' for i in range(1, 6)])
+        self.assertEqual(consultas_una, consultas_cinco)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TrabajoExportacionTests(TestCase):
+
+    def setUp(self):
+        crear_candidato('70000091')
+        self.autor = User.objects.create_user('autor')
+        self.otro = User.objects.create_user('otro')
+        self.staff = User.objects.create_user('staff', is_staff=True)
+
+    def encolar(self, usuario):
+        self.client.force_login(usuario)
+        with mock.patch('candidatos.utils.trabajos_exportacion.close_old_connections'), \
+                mock.patch('candidatos.utils.trabajos_exportacion._executor.submit', side_effect=lambda f, *a: f(*a)), \
+                self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('exportacion_trabajo_crear'), {'estado': 'REGISTRADO'})
+        self.assertEqual(respuesta.status_code, 202)
+        return respuesta.json()['id']
+
+    def consultar(self, usuario, trabajo_id):
+        self.client.force_login(usuario)
+        estado = self.client.get(reverse('exportacion_trabajo_estado', args=[trabajo_id]))
+        descarga = self.client.get(reverse('exportacion_trabajo_descargar', args=[trabajo_id]))
+        return estado.status_code, descarga.status_code
+
+    def test_se_reutiliza_solo_para_el_mismo_usuario(self):
+        trabajo_id = self.encolar(self.autor)
+        trabajo = TrabajoExportacion.objects.get(pk=trabajo_id)
+        self.assertEqual((trabajo.estado, trabajo.total_filas, trabajo.progreso), ('COMPLETADO', 1, 100))
+
+        self.assertEqual(self.encolar(self.autor), trabajo_id)
+        self.assertNotEqual(self.encolar(self.otro), trabajo_id)
+
+    def test_estado_y_descarga_solo_para_el_creador_o_staff(self):
+        trabajo_id = self.encolar(self.autor)
+
+        self.assertEqual(self.consultar(self.autor, trabajo_id), (200, 200))
+        self.assertEqual(self.consultar(self.staff, trabajo_id), (200, 200))
+        self.assertEqual(self.consultar(self.otro, trabajo_id), (404, 404))
+
+
+class ResumenAsistenciaTests(TestCase):
+
+    def setUp(self):
+        candidato = crear_candidato('70000061')
+        self.proceso = Proceso.objects.create(
+            candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+            sede_proceso=candidato.sede_registro, fecha_inicio=date(2025, 10, 1),
+        )
+
+    def registrar(self, dia, hora, movimiento='ENTRADA', estado='A'):
+        return RegistroAsistencia.objects.create(
+            proceso=self.proceso, momento_registro=timezone.make_aware(datetime(2025, 10, dia, hora)),
+            movimiento=movimiento, estado=estado, fase_actual='TEORIA',
+        )
+
+    def resumen(self, dia):
+        return ResumenAsistenciaDiaria.objects.filter(proceso=self.proceso, fecha=date(2025, 10, dia)).values(
+            'candidato', 'registros', 'asistencias', 'tardanzas', 'faltas', 'ultimo_movimiento', 'ultimo_estado',
+        ).first()
+
+    def test_alta_acumula_en_el_dia_local(self):
+        self.registrar(2, 8, estado='T')
+        # 20:00 en Lima ya es el día 3 en UTC; el resumen usa la fecha local.
+        self.registrar(2, 20, movimiento='SALIDA')
+
+        self.assertEqual(self.resumen(2), {
+            'candidato': '70000061', 'registros': 2, 'asistencias': 1, 'tardanzas': 1, 'faltas': 0,
+            'ultimo_movimiento': 'SALIDA', 'ultimo_estado': 'A',
+        })
+        self.assertIsNone(self.resumen(3))
+
+    def test_edicion_y_borrado_recalculan(self):
+        entrada = self.registrar(2, 8)
+        salida = self.registrar(2, 18, movimiento='SALIDA')
+
+        entrada.estado = 'F'
+        entrada.save()
+        self.assertEqual((self.resumen(2)['asistencias'], self.resumen(2)['faltas']), (1, 1))
+
+        salida.momento_registro = timezone.make_aware(datetime(2025, 10, 3, 18))
+        salida.save()
+        self.assertEqual((self.resumen(2)['registros'], self.resumen(2)['ultimo_movimiento']), (1, 'ENTRADA'))
+        self.assertEqual(self.resumen(3)['registros'], 1)
+
+        salida.delete()
+        self.assertIsNone(self.resumen(3))
+
+
+class MotorAsistenciaTests(TestCase):
+
+    HORARIO = (time(8, 0), time(14, 0))
+
+    def setUp(self):
+        candidato = crear_candidato('70000071')
+        self.proceso = Proceso.objects.create(
+            candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+            sede_proceso=candidato.sede_registro, fecha_inicio=date(2025, 10, 1), estado='TEORIA',
+        )
+
+    def registrar(self, hora, minuto=0):
+        momento = timezone.make_aware(datetime(2025, 10, 2, hora, minuto))
+        return registrar_asistencia(self.proceso, momento=momento, horario=self.HORARIO)
+
+    def assertRechazo(self, codigo, funcion, *args, **kwargs):
+        with self.assertRaises(AsistenciaRechazada) as contexto:
+            funcion(*args, **kwargs)
+        self.assertEqual(contexto.exception.codigo, codigo)
+
+    def test_decision_segun_horario(self):
+        self.assertEqual(decidir_asistencia({}, time(8, 0), self.HORARIO), ('ENTRADA', 'A', False))
+        self.assertEqual(decidir_asistencia({}, time(8, 1), self.HORARIO), ('ENTRADA', 'T', False))
+        self.assertEqual(decidir_asistencia({}, time(14, 0), self.HORARIO), ('ENTRADA', 'F', False))
+        self.assertEqual(decidir_asistencia({'ENTRADA': 'T'}, time(13, 0), self.HORARIO), ('SALIDA', 'T', True))
+        self.assertEqual(decidir_asistencia({'ENTRADA': 'A'}, time(18, 0), self.HORARIO), ('SALIDA', 'A', False))
+        self.assertRechazo(RECHAZO_FALTA_REGISTRADA, decidir_asistencia, {'ENTRADA': 'F'}, time(18, 0), self.HORARIO)
+        self.assertRechazo(
+            RECHAZO_CICLO_COMPLETO, decidir_asistencia, {'ENTRADA': 'A', 'SALIDA': 'A'}, time(18, 0), self.HORARIO
+        )
+
+    def test_entrada_salida_y_ciclo_completo(self):
+        entrada, _ = self.registrar(8, 30)
+        salida, salida_temprana = self.registrar(18)
+
+        self.assertEqual((entrada.movimiento, entrada.estado, entrada.fase_actual), ('ENTRADA', 'T', 'TEORIA'))
+        self.assertEqual((salida.movimiento, salida.estado, salida_temprana), ('SALIDA', 'T', False))
+        self.assertRechazo(RECHAZO_REPETIDO, self.registrar, 18)
+        self.assertRechazo(RECHAZO_CICLO_COMPLETO, self.registrar, 19)
+
+    def test_restriccion_unica_por_dia(self):
+        self.registrar(7, 50)
+
+        with mock.patch('candidatos.utils.asistencia.decidir_asistencia', return_value=('ENTRADA', 'A', False)):
+            self.assertRechazo(RECHAZO_CONCURRENTE, self.registrar, 7, 55)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RegistroAsistencia.objects.create(
+                proceso=self.proceso, fase_actual='TEORIA', movimiento='ENTRADA',
+                momento_registro=timezone.make_aware(datetime(2025, 10, 2, 9)),
+            )
+
+
+class KioskoAsistenciaTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user('operador', password='x')
+        self.client.login(username='operador', password='x')
+        candidato = crear_candidato('70000004')
+        self.proceso = Proceso.objects.create(
+            candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+            sede_proceso=candidato.sede_registro, fecha_inicio=date(2025, 10, 1),
+        )
+        mapa_procesos_activos.refrescar(forzar=True)
+
+    def enviar(self, escaneos):
+        respuesta = self.client.post(
+            reverse('asistencia_kiosko'), data=json.dumps({'escaneos': escaneos}), content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()['resultados']
+
+    def test_lote_en_orden_cronologico_con_distinto_desfase(self):
+        # Como texto, la salida ('...T12:00-05:00', 17:00 UTC) iría antes que la entrada ('...T13:00Z').
+        resultados = self.enviar([
+            {'id': 'salida', 'dni': '70000004', 'momento': '2025-10-02T12:00:00-05:00'},
+            {'id': 'entrada', 'dni': '70000004', 'momento': '2025-10-02T13:00:00Z'},
+        ])
+        self.assertEqual([(r['id'], r['movimiento']) for r in resultados], [('entrada', 'ENTRADA'), ('salida', 'SALIDA')])
+        entrada = RegistroAsistencia.objects.get(proceso=self.proceso, movimiento='ENTRADA')
+        self.assertEqual(timezone.localtime(entrada.momento_registro).hour, 8)
+
+    def test_dni_sin_proceso_no_queda_en_cache(self):
+        self.assertIsNone(mapa_procesos_activos.buscar('70000005'))
+
+        candidato = crear_candidato('70000005')
+        Proceso.objects.create(
+            candidato=candidato, empresa_proceso=candidato.sede_registro.empresa,
+            sede_proceso=candidato.sede_registro, fecha_inicio=date(2025, 10, 1),
+        )
+        self.assertEqual(mapa_procesos_activos.buscar('70000005')['estado'], 'CONVOCADO')
+
+    def test_guardar_proceso_o_sede_invalida_el_mapa(self):
+        sede = self.proceso.sede_proceso
+        self.assertEqual(mapa_procesos_activos.buscar('70000004')['sede_id'], sede.pk)
+        self.assertEqual(mapa_procesos_activos.horario(sede.pk)[0], time(7, 0))
+
+        otra = Sede.objects.create(empresa=sede.empresa, nombre='Sede Norte', ciudad='Lima')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.proceso.sede_proceso = otra
+            self.proceso.save()
+            sede.hora_limite_entrada = time(9, 0)
+            sede.save()
+
+        self.assertEqual(mapa_procesos_activos.buscar('70000004')['sede_id'], otra.pk)
+        self.assertEqual(mapa_procesos_activos.horario(sede.pk)[0], time(9, 0))
+
+    def test_momento_invalido_se_rechaza(self):
+        resultados = self.enviar([
+            {'id': 'bueno', 'dni': '70000004', 'momento': '2025-10-02T08:00:00'},
+            {'id': 'texto', 'dni': '70000004', 'momento': 'ayer'},
+            {'id': 'fecha', 'dni': '70000004', 'momento': '2025-13-45T08:00:00'},
+        ])
+        codigos = {r['id']: r['codigo'] for r in resultados}
+        self.assertEqual(codigos, {'bueno': 'REGISTRADO', 'texto': 'MOMENTO_INVALIDO', 'fecha': 'MOMENTO_INVALIDO'})
+        self.assertEqual(RegistroAsistencia.objects.filter(proceso=self.proceso).count(), 1)
+
+
+class CupoEnvioWhatsAppTests(TestCase):
+
+    @override_settings(WHATSAPP_MENSAJES_POR_SEGUNDO=0)
+    def test_tasa_cero_en_settings_no_crea_el_cupo(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CupoEnvioWhatsApp.del_numero('111')
+        self.assertFalse(CupoEnvioWhatsApp.objects.exists())
+
+    def test_tasa_cero_pausa_el_numero(self):
+        CupoEnvioWhatsApp.objects.create(phone_id='111', capacidad=20, tasa_por_segundo=0, tokens=3)
+
+        self.assertEqual(CupoEnvioWhatsApp.reservar(10, '111'), (3, 0.0))
+        self.assertEqual(CupoEnvioWhatsApp.reservar(10, '111'), (0, CupoEnvioWhatsApp.ESPERA_PAUSADO))
+        cupo, ahora = CupoEnvioWhatsApp.del_numero('111'), timezone.now()
+        self.assertIsNone(cupo.estimar_fin(5, ahora))
+        self.assertEqual(cupo.estimar_fin(0, ahora), ahora)
+
+
+class AudienciaTests(TestCase):
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        crear_candidato('70000011', telefono='987654321', estado_actual='REGISTRADO')
+        crear_candidato('70000012', telefono='912345678', estado_actual='REGISTRADO')
+        crear_candidato('70000013', telefono='12345', estado_actual='REGISTRADO')
+        ResumenMensajeriaCandidato.registrar_bajas(['912345678'])
+
+    def test_solo_contactables(self):
+        audiencia = resolver_audiencia('REGISTRADOS', self.hoy)
+        self.assertEqual(list(audiencia.values_list('pk', flat=True)), ['70000011'])
+        self.assertEqual(fechas_disponibles('REGISTRADOS'), [self.hoy.strftime('%Y-%m-%d')])
+
+    def test_nunca_contactado(self):
+        ResumenMensajeriaCandidato.objects.filter(pk='70000011').update(ultimo_envio=timezone.now())
+        self.assertFalse(resolver_audiencia('REGISTRADOS', self.hoy, FILTRO_NUNCA_CONTACTADO).exists())
+
+    @skipUnless(connection.vendor == 'sqlite', "Planes de SQLite.")
+    def test_procesos_de_la_fecha_usan_su_indice(self):
+        plan = Proceso.objects.filter(estado='CONVOCADO', fecha_inicio=self.hoy).values('candidato_id').explain()
+        self.assertIn('USING INDEX proceso_estado_fecha_idx', plan)
+
+    @skipUnless(connection.vendor == 'mysql', "Planes de MySQL.")
+    def test_procesos_de_la_fecha_usan_su_indice_mysql(self):
+        consulta = Proceso.objects.filter(estado='CONVOCADO', fecha_inicio=self.hoy).values('candidato_id')
+        self.assertIn('proceso_estado_fecha_idx', consulta.explain(format='JSON'))
+
+
+class EnvioMasivoTests(TransactionTestCase):
+
+    def setUp(self):
+        crear_candidato('70000005', telefono='987654321')
+        crear_candidato('70000006', telefono='912345678')
+        plantilla = MensajePlantilla.objects.create(titulo='Aviso', contenido_texto='Hola {nombres_completos}')
+        self.tarea = TareaEnvioMasivo.objects.create(
+            fecha_origen=date(2025, 10, 1), mensaje_plantilla=plantilla, total_contactos=2,
+            destinatarios=['70000005', '70000006'], estado='EN_PROCESO',
+        )
+        # Sin tokens y con una recarga lenta: la primera ejecución se pausa sin enviar nada.
+        self.cupo = CupoEnvioWhatsApp.objects.create(
+            phone_id=settings.WHATSAPP_PHONE_ID, capacidad=10, tasa_por_segundo=0.001, tokens=0,
+        )
+
+    def test_baja_entre_pausa_y_reanudacion(self):
+        cliente = mock.Mock()
+        cliente.enviar_texto.return_value = {'success': True, 'status': 200, 'data': {'messages': [{'id': 'wamid.1'}]}}
+
+        with mock.patch('candidatos.utils.envios.cliente_whatsapp', return_value=cliente), \
+                mock.patch('candidatos.utils.envios._programar_reanudacion'):
+            ejecutar_envio_masivo(self.tarea.pk)
+            self.tarea.refresh_from_db()
+            self.assertEqual(self.tarea.estado, 'PENDIENTE')
+            cliente.enviar_texto.assert_not_called()
+
+            ResumenMensajeriaCandidato.registrar_bajas(['51912345678'])
+            CupoEnvioWhatsApp.objects.filter(pk=self.cupo.pk).update(tokens=10)
+            TareaEnvioMasivo.objects.filter(pk=self.tarea.pk).update(reanudar_en=timezone.now())
+            self.assertEqual(reanudar_envios_pendientes(en_segundo_plano=False), [self.tarea.pk])
+
+        cliente.enviar_texto.assert_called_once_with('987654321', 'Hola Ana Pérez')
+        self.assertEqual(list(DetalleEnvio.objects.values_list('contacto_id', flat=True)), ['70000005'])
+        self.tarea.refresh_from_db()
+        self.assertEqual(self.tarea.estado, 'COMPLETADO')
+
+    @mock.patch('candidatos.utils.envios.ENVIO_LOTE_GUARDADO', 1)
+    def test_envio_completo_suma_resultados(self):
+        CupoEnvioWhatsApp.objects.filter(pk=self.cupo.pk).update(tokens=10)
+
+        def enviar_texto(telefono, texto):
+            if telefono == '912345678':
+                raise requests.ConnectionError('sin red')
+            return {'success': True, 'status': 200, 'data': {'messages': [{'id': 'wamid.1'}]}}
+
+        cliente = mock.Mock()
+        cliente.enviar_texto.side_effect = enviar_texto
+        with mock.patch('candidatos.utils.envios.cliente_whatsapp', return_value=cliente):
+            ejecutar_envio_masivo(self.tarea.pk)
+
+        self.tarea.refresh_from_db()
+        self.assertEqual((self.tarea.estado, self.tarea.total_entregados, self.tarea.total_fallidos), ('COMPLETADO', 1, 1))
+        self.assertEqual(
+            dict(DetalleEnvio.objects.values_list('contacto_id', 'estado_meta')),
+            {'70000005': 'ENVIADO', '70000006': 'FALLIDO'},
+        )
+        self.assertEqual(DetalleEnvio.objects.get(contacto_id='70000005').id_mensaje_meta, 'wamid.1')
+        self.assertAlmostEqual(CupoEnvioWhatsApp.objects.get(pk=self.cupo.pk).tokens, 8, places=1)
+
+
+class CompactacionCuerposTests(TransactionTestCase):
+    """Ida y vuelta de la migración 0039 (contenido_final -> CuerpoMensaje + variables)."""
+
+    antes = [('candidatos', '0038_mensajeplantilla_version')]
+    despues = [('candidatos', '0039_cuerpo_mensaje')]
+
+    def migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        self.migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_ida_y_vuelta(self):
+        apps = self.migrar(self.antes)
+        Empresa = apps.get_model('candidatos', 'Empresa')
+        Sede = apps.get_model('candidatos', 'Sede')
+        Candidato = apps.get_model('candidatos', 'Candidato')
+        Plantilla = apps.get_model('candidatos', 'MensajePlantilla')
+        Tarea = apps.get_model('candidatos', 'TareaEnvioMasivo')
+        Detalle = apps.get_model('candidatos', 'DetalleEnvio')
+
+        apps.get_model('candidatos', 'TipoDocumento').objects.create(pk=1, nombre='DNI')
+        sede = Sede.objects.create(empresa=Empresa.objects.create(nombre='E'), nombre='S', ciudad='Lima')
+        plantilla = Plantilla.objects.create(titulo='Aviso', contenido_texto='Hola {nombres_completos}, te esperamos')
+        tarea = Tarea.objects.create(fecha_origen=date(2025, 10, 1), mensaje_plantilla=plantilla, total_contactos=3)
+        textos = {
+            '70000111': 'Hola Ana, te esperamos',
+            '70000112': 'Hola Luis, te esperamos',
+            '70000113': 'Texto editado a mano {sin variable}',
+        }
+        for dni, texto in textos.items():
+            nombre = texto.split()[1].rstrip(',')
+            contacto = Candidato.objects.create(
+                DNI=dni, nombres_completos=nombre, telefono_whatsapp='987654321', distrito='Lima', sede_registro=sede,
+            )
+            Detalle.objects.create(tarea_envio=tarea, contacto=contacto, telefono='987654321', contenido_final=texto)
+
+        apps = self.migrar(self.despues)
+        Detalle = apps.get_model('candidatos', 'DetalleEnvio')
+        compactados = {d.contacto_id: (d.cuerpo.texto, d.variables) for d in Detalle.objects.select_related('cuerpo')}
+        self.assertEqual(compactados, {
+            '70000111': ('Hola {nombres_completos}, te esperamos', {'nombres_completos': 'Ana'}),
+            '70000112': ('Hola {nombres_completos}, te esperamos', {'nombres_completos': 'Luis'}),
+            '70000113': ('Texto editado a mano {{sin variable}}', {}),
+        })
+        self.assertEqual(apps.get_model('candidatos', 'CuerpoMensaje').objects.count(), 2)
+
+        apps = self.migrar(self.antes)
+        Detalle = apps.get_model('candidatos', 'DetalleEnvio')
+        self.assertEqual(dict(Detalle.objects.values_list('contacto_id', 'contenido_final')), textos)
+
+
+class HistorialEnviosTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('coordinador'))
+        plantilla = MensajePlantilla.objects.create(titulo='Aviso', contenido_texto='Hola')
+        self.tareas = []
+        for dia in (1, 2, 3):
+            tarea = TareaEnvioMasivo.objects.create(
+                fecha_origen=date(2025, 10, dia), mensaje_plantilla=plantilla, estado='COMPLETADO',
+            )
+            TareaEnvioMasivo.objects.filter(pk=tarea.pk).update(
+                fecha_inicio=timezone.make_aware(datetime(2025, 10, dia, 9)),
+            )
+            self.tareas.append(tarea.pk)
+
+    def historial(self, **parametros):
+        cabeceras = {}
+        if 'etag' in parametros:
+            cabeceras['HTTP_IF_NONE_MATCH'] = parametros.pop('etag')
+        return self.client.get(reverse('api_historial_envios'), parametros, **cabeceras)
+
+    def test_paginas_por_cursor(self):
+        primera = self.historial(limite=2, campos='id,estado').json()
+        segunda = self.historial(limite=2, campos='id,estado', cursor=primera['siguiente']).json()
+
+        self.assertEqual([t['id'] for t in primera['historialData']], self.tareas[:0:-1])
+        self.assertEqual(primera['historialData'][0], {'id': self.tareas[2], 'estado': 'COMPLETADO'})
+        self.assertEqual([t['id'] for t in segunda['historialData']], self.tareas[:1])
+        self.assertIsNone(segunda['siguiente'])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.historial(campos='id,clave').status_code, 400)
+        self.assertEqual(self.historial(cursor='no-es-un-cursor').status_code, 400)
+        self.assertEqual(self.historial(estado='BORRADOR').status_code, 400)
+
+    def test_campanas_terminadas_responden_304(self):
+        respuesta = self.historial(limite=2)
+        etag = respuesta['ETag']
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        self.assertEqual(self.historial(limite=2, etag=etag).status_code, 304)
+
+        # Un webhook sobre una campaña de la página cambia su fecha_actualizacion.
+        TareaEnvioMasivo.objects.filter(pk=self.tareas[2]).update(fecha_actualizacion=timezone.now())
+        self.assertEqual(self.historial(limite=2, etag=etag).status_code, 200)
+
+    def test_solo_campanas_terminadas_llevan_etag(self):
+        TareaEnvioMasivo.objects.filter(pk=self.tareas[2]).update(estado='EN_PROCESO')
+        respuesta = self.historial(limite=2)
+
+        self.assertNotIn('ETag', respuesta)
+        detalle = self.client.get(reverse('api_detalle_tarea', args=[self.tareas[2]]))
+        self.assertNotIn('ETag', detalle)
+        detalle = self.client.get(reverse('api_detalle_tarea', args=[self.tareas[1]]))
+        self.assertEqual(
+            self.client.get(
+                reverse('api_detalle_tarea', args=[self.tareas[1]]), HTTP_IF_NONE_MATCH=detalle['ETag']
+            ).status_code,
+            304,
+        )
+
+    def test_detalles_por_cursor(self):
+        tarea = TareaEnvioMasivo.objects.get(pk=self.tareas[0])
+        for i, estado in enumerate(['LEIDO', 'ENVIADO', 'FALLIDO', 'ENVIADO']):
+            contacto = crear_candidato(f'7000012{i}')
+            DetalleEnvio.objects.create(tarea_envio=tarea, contacto=contacto, telefono='987654321', estado_meta=estado)
+
+        url = reverse('api_detalle_tarea', args=[tarea.pk])
+        primera = self.client.get(url, {'limite': 3, 'campos': 'dni,estado_codigo'}).json()
+        segunda = self.client.get(url, {'limite': 3, 'campos': 'dni,estado_codigo', 'cursor': primera['siguiente']}).json()
+
+        self.assertEqual(primera['total'], 4)
+        self.assertNotIn('total', segunda)
+        self.assertEqual(
+            [(d['estado_codigo'], d['dni']) for d in primera['detalles'] + segunda['detalles']],
+            [('ENVIADO', '70000121'), ('ENVIADO', '70000123'), ('FALLIDO', '70000122'), ('LEIDO', '70000120')],
+        )
+        self.assertIsNone(segunda['siguiente'])
+
+
+class ClienteWhatsAppTests(TestCase):
+
+    def setUp(self):
+        self.cliente = ClienteWhatsApp(api_url='https://graph.example/', phone_id='1', token='t', reintentos=2, backoff=0)
+
+    def respuesta(self, status, contenido):
+        respuesta = requests.Response()
+        respuesta.status_code = status
+        respuesta._content = contenido
+        return respuesta
+
+    def enviar(self, **simulado):
+        with mock.patch.object(self.cliente.sesion, 'post', **simulado) as post:
+            with self.assertLogs('candidatos.utils.whatsapp_api', 'WARNING'):
+                resultado = self.cliente.enviar_texto('51987654321', 'Hola')
+        return resultado, post.call_count
+
+    def test_respuesta_exitosa_que_no_es_json(self):
+        resultado, llamadas = self.enviar(return_value=self.respuesta(200, b'<html>Bad gateway</html>'))
+        self.assertEqual(resultado['success'], False)
+        self.assertEqual(resultado['status'], 200)
+        self.assertEqual(llamadas, 1)
+        self.assertEqual(self.cliente.metricas()['fallidos'], 1)
+
+    def test_error_de_requests_no_reintentable(self):
+        for error in (requests.TooManyRedirects('redirecciones'), requests.exceptions.InvalidURL('url')):
+            with self.subTest(error=type(error).__name__):
+                resultado, llamadas = self.enviar(side_effect=error)
+                self.assertEqual(resultado['success'], False)
+                self.assertIsNone(resultado['status'])
+                self.assertEqual(llamadas, 1)
+
+    def test_error_de_red_se_reintenta(self):
+        resultado, llamadas = self.enviar(side_effect=requests.ConnectionError('sin red'))
+        self.assertEqual(resultado['success'], False)
+        self.assertEqual(llamadas, 3)
+
+
+class WebhookWhatsAppTests(TestCase):
+
+    def test_payload_invalido_no_bloquea_el_lote(self):
+        crear_candidato('70000001', telefono='987654321')
+        baja = {'entry': [{'changes': [{'value': {'messages': [{'from': '51987654321', 'text': {'body': 'BAJA'}}]}}]}]}
+        for payload in ([1, 2], 5, 'texto', {'entry': [1]}, {'entry': [{'changes': [{'value': {'statuses': ['x']}}]}]}, baja):
+            EventoWebhookWhatsApp.objects.create(payload=payload)
+
+        with self.assertLogs('candidatos.utils.webhook_whatsapp', 'WARNING') as registro:
+            self.assertEqual(procesar_eventos_pendientes(), 6)
+        self.assertEqual(len(registro.output), 5)
+        self.assertFalse(EventoWebhookWhatsApp.objects.filter(procesado__isnull=True).exists())
+        self.assertTrue(ResumenMensajeriaCandidato.objects.get(candidato_id='70000001').opt_out)
+
+    def test_webhook_descarta_payload_que_no_es_objeto(self):
+        respuesta = self.client.post(reverse('whatsapp_webhook'), data='[1, 2]', content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(EventoWebhookWhatsApp.objects.exists())
+
+
+class PlantillaTests(TestCase):
+
+    def test_llave_suelta_es_plantilla_invalida(self):
+        for texto in ('Hola {nombres_completos} :}', 'Hola { amigo', '}'):
+            with self.assertRaises(PlantillaInvalida):
+                validar_texto(texto)
+
+    def test_formato_de_variable_se_valida_al_compilar(self):
+        for texto in ('{nombres_completos:d}', '{nombres_completos!x}', '{nombres_completos:.2f}'):
+            with self.assertRaises(PlantillaInvalida):
+                validar_texto(texto)
+        self.assertEqual(validar_texto('{nombres_completos:>20} {{llaves}}'), ['nombres_completos'])
+
+    def test_solo_variables_permitidas(self):
+        for texto in (
+            'Hola {usuario_ultima_modificacion.password}',
+            '{usuario_ultima_modificacion.email}',
+            '{usuario_ultima_modificacion}',
+            '{proceso.candidato.usuario_ultima_modificacion.password}',
+            '{tipo_documento.nombre}',
+            '{nombre_normalizado}',
+        ):
+            with self.subTest(texto=texto), self.assertRaises(PlantillaInvalida):
+                validar_texto(texto)
+
+        texto = '{nombres_completos} {proceso.fecha_inicio} {sede.nombre} {empresa.nombre} {sede_registro.ciudad}'
+        self.assertEqual(
+            validar_texto(texto),
+            ['nombres_completos', 'proceso.fecha_inicio', 'sede.nombre', 'empresa.nombre', 'sede_registro.ciudad'],
+        )
+
+    def test_guardar_plantilla_con_llave_suelta(self):
+        plantilla = MensajePlantilla.objects.create(titulo='Llaves', contenido_texto='Hola {nombres_completos} :}')
+        self.assertEqual(plantilla.variables_usadas, '')
+
+    def test_envio_masivo_con_llave_suelta_responde_400(self):
+        User.objects.create_user('operador', password='x')
+        self.client.login(username='operador', password='x')
+        respuesta = self.client.post(reverse('iniciar_envio_masivo'), {
+            'mensaje_contenido': 'Hola {nombres_completos} :}',
+            'proceso_filtro': 'CONVOCADO',
+            'fecha_filtro': '2025-10-01',
+            'candidatos_seleccionados[]': ['70000001'],
+        })
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(respuesta.json()['success'])
+
+
+class RegistroPublicoTests(TransactionTestCase):
+    """registrar_postulacion: reenvíos con la misma clave y envíos simultáneos del mismo DNI."""
+    DNI = '71234567'
+    HILOS = 8
+
+    def setUp(self):
+        sede = crear_candidato('70000009').sede_registro
+        self.datos_candidato = {
+            'nombres_completos': 'Postulante Concurrente',
+            'edad': 25,
+            'telefono_whatsapp': '912345678',
+            'email': None,
+            'distrito': 'Lima',
+            'sede_registro': sede,
+            'tipo_documento': TipoDocumento.objects.get(pk=1),
+            'estado_actual': 'REGISTRADO',
+        }
+        self.datos_cualificacion = {
+            'distrito': 'Lima',
+            'secundaria_completa': True,
+            'experiencia_campanas_espanolas': False,
+            'experiencia_ventas_tipo': 'NO',
+            'conforme_beneficios': 'SI',
+            'disponibilidad_horario': True,
+            'dificultad_habla': False,
+        }
+
+    def registrar(self, clave):
+        return registrar_postulacion(clave, self.DNI, dict(self.datos_candidato), dict(self.datos_cualificacion))
+
+    def assertUnRegistro(self, solicitudes=1):
+        self.assertEqual(Candidato.objects.filter(pk=self.DNI).count(), 1)
+        self.assertEqual(DatosCualificacion.objects.filter(candidato_id=self.DNI).count(), 1)
+        self.assertEqual(SolicitudRegistroPublico.objects.filter(candidato_id=self.DNI).count(), solicitudes)
+
+    def test_reenvio_con_la_misma_clave(self):
+        candidato, creado = self.registrar('clave-1')
+        self.assertTrue(creado)
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(EnvioRepetido):
+                self.registrar('clave-1')
+        self.assertUnRegistro()
+
+    def test_mismo_dni_con_otra_clave_actualiza(self):
+        self.registrar('clave-1')
+
+        # exists de la clave, SELECT FOR UPDATE del candidato, clave, fecha_registro y
+        # update_or_create de DatosCualificacion (con sus savepoints).
+        with self.assertNumQueries(12):
+            candidato, creado = self.registrar('clave-2')
+        self.assertFalse(creado)
+        self.assertUnRegistro(solicitudes=2)
+
+    def test_insert_concurrente_del_mismo_dni(self):
+        # Simula el envío paralelo que inserta el DNI entre el SELECT FOR UPDATE y el INSERT.
+        original = Candidato.con_mismo_nombre
+
+        def otro_envio(nombres):
+            Candidato.objects.create(DNI=self.DNI, **self.datos_candidato)
+            return original(nombres)
+
+        Candidato.con_mismo_nombre = otro_envio
+        try:
+            candidato, creado = self.registrar('clave-1')
+        finally:
+            Candidato.con_mismo_nombre = original
+        self.assertFalse(creado)
+        self.assertUnRegistro()
+
+    def _en_paralelo(self, claves):
+        barrera = threading.Barrier(len(claves))
+        resultados, errores = [], []
+
+        def enviar(clave):
+            try:
+                barrera.wait()
+                resultados.append(self.registrar(clave)[1])
+            except EnvioRepetido:
+                resultados.append(None)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=enviar, args=(clave,)) for clave in claves]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        return resultados
+
+    @skipUnless(connection.vendor == 'mysql', "SQLite no tiene bloqueo por fila: los escritores concurrentes fallan con 'database is locked'.")
+    def test_envios_simultaneos_misma_clave(self):
+        resultados = self._en_paralelo(['misma-clave'] * self.HILOS)
+        self.assertEqual(resultados.count(True), 1)
+        self.assertEqual(resultados.count(None), self.HILOS - 1)
+        self.assertUnRegistro()
+
+    @skipUnless(connection.vendor == 'mysql', "SQLite no tiene bloqueo por fila: los escritores concurrentes fallan con 'database is locked'.")
+    def test_envios_simultaneos_mismo_dni(self):
+        resultados = self._en_paralelo([f'clave-{i}' for i in range(self.HILOS)])
+        self.assertEqual(resultados.count(True), 1)
+        self.assertEqual(resultados.count(False), self.HILOS - 1)
+        self.assertUnRegistro(solicitudes=self.HILOS)
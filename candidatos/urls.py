@@ -10,6 +10,7 @@ urlpatterns = [
     
     # --- Tableros ---
     path('kanban/', views.KanbanDashboardView.as_view(), name='kanban_dashboard'),
+    path('kanban/columna/<str:estado>/', views.KanbanColumnaView.as_view(), name='kanban_columna'),
     path('asistencia/', views.asistencia_dashboard, name='asistencia_dashboard'),
     
     # --- Gestión de Candidatos ---
@@ -20,6 +21,9 @@ urlpatterns = [
     path('candidato/update-status-multiple/', views.UpdateStatusMultipleView.as_view(), name='update_candidato_status_multiple'),
     path('candidatos/', views.CandidatoListView.as_view(), name='candidatos_list'),
     path('candidatos/exportar/', views.CandidatoExportView.as_view(), name='candidatos_export'),
+    path('candidatos/exportar/trabajos/', views.ExportacionTrabajoCrearView.as_view(), name='exportacion_trabajo_crear'),
+    path('candidatos/exportar/trabajos/<int:pk>/', views.ExportacionTrabajoEstadoView.as_view(), name='exportacion_trabajo_estado'),
+    path('candidatos/exportar/trabajos/<int:pk>/descargar/', views.ExportacionTrabajoDescargarView.as_view(), name='exportacion_trabajo_descargar'),
     path('candidatos/ocultar/', views.OcultarCandidatosView.as_view(), name='ocultar_candidatos'),
     path('candidatos/mostrar/', views.MostrarCandidatosView.as_view(), name='mostrar_candidatos'),
     path('candidatos/gestion/lista/', views.ListaCandidatosPorFechaView.as_view(), name='lista_candidatos_por_fecha'),
@@ -43,6 +47,7 @@ urlpatterns = [
 
     # --- Asistencia ---
     path('asistencia/registrar/', views.registrar_asistencia_rapida, name='registrar_asistencia_rapida'),
+    path('asistencia/kiosko/', views.KioskoAsistenciaView.as_view(), name='asistencia_kiosko'),
     path('api/asistencia-check/', views.AsistenciaDiariaCheckView.as_view(), name='api_asistencia_check'),
     path('candidatos/asistencia/', views.CandidatoAsistenciaListView.as_view(), name='candidatos_asistencia_list'),
     path('candidatos/asistencia/<str:pk>/detalle/', views.RegistroAsistenciaDetailView.as_view(), name='registro_asistencia_detalle'),
@@ -0,0 +1,130 @@
+# utils/asistencia.py
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from candidatos.models import RegistroAsistencia
+
+# Fase de asistencia por defecto según el estado del proceso.
+FASE_POR_ESTADO = {
+    'CONVOCADO': 'CONVOCADO',
+    'CONFIRMADO': 'CONFIRMADO',
+    'TEORIA': 'TEORIA',
+    'PRACTICA': 'PRACTICA',
+}
+FASE_POR_DEFECTO = 'PRACTICA'
+
+# Motivos de rechazo.
+RECHAZO_FALTA_REGISTRADA = 'FALTA_REGISTRADA'
+RECHAZO_CICLO_COMPLETO = 'CICLO_COMPLETO'
+RECHAZO_CONCURRENTE = 'REGISTRO_CONCURRENTE'
+RECHAZO_REPETIDO = 'ESCANEO_REPETIDO'
+
+
+class AsistenciaRechazada(Exception):
+    def __init__(self, codigo, mensaje):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+def _hora(valor):
+    return datetime.strptime(valor, '%H:%M').time()
+
+
+def horario_sede(sede):
+    """
+    Devuelve (hora_limite_entrada, hora_limite_tardanza) de la sede, con los valores de
+    settings para los campos vacíos.
+    """
+    entrada = sede.hora_limite_entrada if sede else None
+    tardanza = sede.hora_limite_tardanza if sede else None
+    return (
+        entrada or _hora(getattr(settings, 'HORA_LIMITE_ASISTENCIA', '7:00')),
+        tardanza or _hora(getattr(settings, 'HORA_LIMITE_TARDANZA', '14:00')),
+    )
+
+
+def decidir_asistencia(movimientos_hoy, hora, horario):
+    """
+    Decide el próximo movimiento a partir de los movimientos ya registrados hoy
+    ({movimiento: estado}) y la hora local del registro.
+
+    Returns:
+        tuple: (movimiento, estado, salida_temprana)
+    """
+    limite_entrada, limite_tardanza = horario
+
+    if 'F' in movimientos_hoy.values():
+        raise AsistenciaRechazada(RECHAZO_FALTA_REGISTRADA, "El candidato ya fue marcado como FALTA hoy.")
+
+    if 'ENTRADA' not in movimientos_hoy:
+        if hora >= limite_tardanza:
+            estado = 'F'
+        elif hora > limite_entrada:
+            estado = 'T'
+        else:
+            estado = 'A'
+        return 'ENTRADA', estado, False
+
+    if 'SALIDA' not in movimientos_hoy:
+        return 'SALIDA', movimientos_hoy['ENTRADA'], hora < limite_tardanza
+
+    raise AsistenciaRechazada(RECHAZO_CICLO_COMPLETO, "El candidato ya tiene su ciclo de ENTRADA/SALIDA completo hoy.")
+
+
+def registrar_asistencia(proceso, usuario=None, fase=None, momento=None, horario=None):
+    """
+    Motor único de asistencia: lee los movimientos de hoy del proceso en una consulta,
+    decide ENTRADA/SALIDA y A/T/F con el horario de su sede e inserta el registro. La
+    restricción única (proceso, fecha, movimiento) impide que dos escáneres simultáneos
+    registren el mismo movimiento.
+
+    Un reintento con el mismo `momento` exacto de un registro existente (escaneos en cola
+    reenviados) se rechaza como RECHAZO_REPETIDO. `horario` evita leer la sede si el
+    llamador ya lo tiene.
+
+    Returns:
+        tuple: (registro, salida_temprana)
+
+    Raises:
+        AsistenciaRechazada: si ya hay FALTA, el ciclo está completo o hubo un registro concurrente.
+    """
+    momento = timezone.localtime(momento or timezone.now())
+
+    registros_hoy = list(
+        RegistroAsistencia.objects.filter(
+            proceso=proceso, fecha=momento.date()
+        ).values_list('movimiento', 'estado', 'momento_registro')
+    )
+
+    for movimiento, estado, momento_existente in registros_hoy:
+        if momento_existente == momento:
+            raise AsistenciaRechazada(RECHAZO_REPETIDO, f"La {movimiento} de este escaneo ya estaba registrada.")
+
+    movimiento, estado, salida_temprana = decidir_asistencia(
+        {movimiento: estado for movimiento, estado, _ in registros_hoy},
+        momento.time(),
+        horario or horario_sede(proceso.sede_proceso),
+    )
+
+    try:
+        with transaction.atomic():
+            registro = RegistroAsistencia.objects.create(
+                proceso=proceso,
+                candidato_id=proceso.candidato_id,
+                fase_actual=fase or FASE_POR_ESTADO.get(proceso.estado, FASE_POR_DEFECTO),
+                movimiento=movimiento,
+                estado_asistencia=estado,
+                estado=estado,
+                registrado_por=usuario,
+                momento_registro=momento,
+            )
+    except IntegrityError:
+        raise AsistenciaRechazada(
+            RECHAZO_CONCURRENTE, f"La {movimiento} de hoy ya fue registrada desde otro punto de control."
+        )
+
+    return registro, salida_temprana
@@ -0,0 +1,80 @@
+# utils/audiencias.py
+
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from candidatos.models import Candidato, Proceso
+
+PROCESO_ESTADO_MAP = {
+    'REGISTRADOS': 'REGISTRADO',
+    'CONVOCADOS': 'CONVOCADO',
+    'CONFIRMADOS': 'CONFIRMADO',
+    'TEORIA': 'TEORIA',
+    'PRACTICA': 'PRACTICA',
+    'CONTRATADOS': 'CONTRATADO',
+}
+
+FILTRO_NUNCA_CONTACTADO = 'nunca_contactado'
+FILTRO_SIN_LECTURA = 'sin_lectura'
+FILTROS_AUDIENCIA = (FILTRO_NUNCA_CONTACTADO, FILTRO_SIN_LECTURA)
+DIAS_SIN_LECTURA = 7
+
+# Solo candidatos con celular válido y sin baja; ResumenMensajeriaCandidato es 1 a 1 con
+# Candidato, así que el filtro es un join por clave primaria.
+CONTACTABLE = Q(resumen_mensajeria__telefono_valido=True, resumen_mensajeria__opt_out=False)
+
+
+def fechas_disponibles(proceso_tipo):
+    """Fechas (YYYY-MM-DD, de la más reciente) con candidatos contactables en la etapa."""
+    estado = PROCESO_ESTADO_MAP[proceso_tipo]
+    if proceso_tipo == 'REGISTRADOS':
+        fechas = Candidato.objects.filter(
+            CONTACTABLE, estado_actual=estado, kanban_activo=True,
+        ).dates('fecha_registro', 'day', order='DESC')
+    else:
+        fechas = Proceso.objects.filter(
+            estado=estado,
+            candidato__resumen_mensajeria__telefono_valido=True,
+            candidato__resumen_mensajeria__opt_out=False,
+        ).dates('fecha_inicio', 'day', order='DESC')
+
+    return [f.strftime('%Y-%m-%d') for f in fechas]
+
+
+def resolver_audiencia(proceso_tipo, fecha, filtro=None, dias=DIAS_SIN_LECTURA):
+    """
+    Candidatos contactables de la etapa `proceso_tipo` en `fecha`, opcionalmente solo los
+    nunca contactados (FILTRO_NUNCA_CONTACTADO) o los que no leyeron ningún mensaje en
+    los últimos `dias` (FILTRO_SIN_LECTURA).
+    """
+    estado = PROCESO_ESTADO_MAP[proceso_tipo]
+    if proceso_tipo == 'REGISTRADOS':
+        qs = Candidato.objects.filter(estado_actual=estado, fecha_registro=fecha, kanban_activo=True)
+    else:
+        qs = Candidato.objects.filter(
+            pk__in=Proceso.objects.filter(estado=estado, fecha_inicio=fecha).values('candidato_id')
+        )
+    qs = qs.filter(CONTACTABLE)
+
+    if filtro == FILTRO_NUNCA_CONTACTADO:
+        qs = qs.filter(resumen_mensajeria__ultimo_envio__isnull=True)
+    elif filtro == FILTRO_SIN_LECTURA:
+        limite = timezone.now() - timedelta(days=dias)
+        qs = qs.filter(
+            Q(resumen_mensajeria__ultima_lectura__isnull=True) | Q(resumen_mensajeria__ultima_lectura__lt=limite)
+        )
+    return qs
+
+
+def contactos_audiencia(proceso_tipo, fecha, filtro=None, dias=DIAS_SIN_LECTURA):
+    """Filas para el selector de destinatarios con el historial del resumen."""
+    return list(
+        resolver_audiencia(proceso_tipo, fecha, filtro, dias).values(
+            'pk', 'DNI', 'nombres_completos', 'telefono_whatsapp',
+            conteo_envios_exitosos=F('resumen_mensajeria__envios_exitosos'),
+            ultimo_envio=F('resumen_mensajeria__ultimo_envio'),
+            ultima_lectura=F('resumen_mensajeria__ultima_lectura'),
+        )
+    )
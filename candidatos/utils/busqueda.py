@@ -0,0 +1,106 @@
+# utils/busqueda.py
+
+import re
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from candidatos.models import TokenBusquedaCandidato, normalizar_texto
+
+BUSQUEDA_RESULTADOS = 10
+# Las respuestas se guardan por consulta normalizada; reindexar cambia la versión de la
+# clave, así que el TTL solo acota la memoria (y el desfase entre procesos con LocMemCache).
+BUSQUEDA_CACHE_SEGUNDOS = 60
+BUSQUEDA_MAX_PALABRAS = 5
+
+# Puntaje por palabra: coincidencia exacta con DNI/teléfono > palabra completa > prefijo.
+PUNTAJE_EXACTO_DOCUMENTO = 8
+PUNTAJE_EXACTO = 3
+PUNTAJE_PREFIJO = 1
+# Extra cuando la consulta es el nombre completo del candidato (en cualquier orden).
+PUNTAJE_NOMBRE_COMPLETO = 10
+
+_SOLO_NUMERO_RE = re.compile(r'^[\d\s+().-]+$')
+
+
+def palabras_busqueda(query):
+    """
+    Palabras normalizadas de la consulta. Un número escrito con espacios o guiones
+    ("987 654 321") se trata como una sola palabra para que coincida con el teléfono.
+    """
+    query = (query or '').strip()
+    if query and _SOLO_NUMERO_RE.match(query):
+        digitos = re.sub(r'\D', '', query)
+        return [digitos] if digitos else []
+    return normalizar_texto(query).split()[:BUSQUEDA_MAX_PALABRAS]
+
+
+def _prefijo(palabra):
+    # Rango [palabra, palabra con el último carácter + 1): usa el índice en MySQL y SQLite
+    # (un LIKE 'x%' no lo usa en SQLite sin case_sensitive_like).
+    return Q(token__gte=palabra, token__lt=palabra[:-1] + chr(ord(palabra[-1]) + 1))
+
+
+def coincidencias(palabras, *campos):
+    """
+    Candidatos cuyos tokens empiezan con todas las `palabras`, con su puntaje, en una sola
+    consulta agrupada sobre TokenBusquedaCandidato: values('candidato_id', *campos, 'puntaje').
+    `campos` son columnas de Candidato (candidato__...) traídas en el mismo join.
+    """
+    coincide = {f'p{i}': Max(Case(When(_prefijo(p), then=1), default=0)) for i, p in enumerate(palabras)}
+    exactas = When(token__in=palabras, tipo__in=[TokenBusquedaCandidato.DNI, TokenBusquedaCandidato.TELEFONO],
+                   then=PUNTAJE_EXACTO_DOCUMENTO)
+    nombre_completo = When(candidato__nombre_normalizado=' '.join(sorted(palabras)), then=PUNTAJE_NOMBRE_COMPLETO)
+
+    return (
+        TokenBusquedaCandidato.objects.filter(reduce(or_, (_prefijo(p) for p in palabras)))
+        .values('candidato_id', *campos)
+        .annotate(
+            **coincide,
+            puntaje=Sum(Case(
+                exactas,
+                When(token__in=palabras, then=PUNTAJE_EXACTO),
+                default=PUNTAJE_PREFIJO,
+                output_field=IntegerField(),
+            )) + Max(Case(nombre_completo, default=0, output_field=IntegerField())),
+        )
+        .filter(**{clave: 1 for clave in coincide})
+    )
+
+
+def filtrar_por_busqueda(queryset, query):
+    """Aplica la búsqueda a un queryset de Candidato (Kanban y listados)."""
+    palabras = palabras_busqueda(query)
+    if not palabras:
+        return queryset.none()
+    return queryset.filter(pk__in=coincidencias(palabras).values('candidato_id'))
+
+
+def buscar_candidatos(query, limite=BUSQUEDA_RESULTADOS):
+    """
+    Autocompletado: hasta `limite` candidatos ordenados por puntaje, como dicts con DNI,
+    nombres_completos y telefono_whatsapp. Las consultas repetidas (teclear, borrar y
+    volver a teclear) se sirven desde la caché.
+    """
+    palabras = palabras_busqueda(query)
+    if not palabras:
+        return []
+
+    clave = f"busqueda_candidatos:{TokenBusquedaCandidato.version_cache()}:{limite}:{'+'.join(palabras)}"
+    resultados = cache.get(clave)
+    if resultados is not None:
+        return resultados
+
+    filas = coincidencias(palabras, 'candidato__nombres_completos', 'candidato__telefono_whatsapp')
+    resultados = [
+        {
+            'DNI': fila['candidato_id'],
+            'nombres_completos': fila['candidato__nombres_completos'],
+            'telefono_whatsapp': fila['candidato__telefono_whatsapp'],
+        }
+        for fila in filas.order_by('-puntaje', 'candidato_id')[:limite]
+    ]
+    cache.set(clave, resultados, BUSQUEDA_CACHE_SEGUNDOS)
+    return resultados
@@ -0,0 +1,180 @@
+# utils/duplicados.py
+
+from collections import defaultdict, namedtuple
+from itertools import combinations
+
+from django.db.models import Q
+
+from candidatos.models import Candidato, SugerenciaFusionCandidato, telefono_e164
+
+# Puntaje de un par (tope 100). Una sola coincidencia no alcanza el umbral: dos hermanos
+# comparten teléfono y hay homónimos; hacen falta dos señales (p. ej. teléfono + nombre o
+# nombre + DNI a un dígito de distancia).
+PUNTOS_TELEFONO = 45
+PUNTOS_NOMBRE = 40
+PUNTOS_NOMBRE_PARCIAL = 30
+PUNTOS_DNI = 30
+PUNTOS_EMAIL = 30
+UMBRAL_SUGERENCIA = 60
+
+# Un bloque más grande que esto (p. ej. el teléfono de un reclutador cargado en cientos de
+# fichas) no identifica a una persona y se ignora, para no comparar todos contra todos.
+MAX_BLOQUE = 30
+# Candidatos por partición de las claves de DNI en la pasada completa (acota la memoria).
+CANDIDATOS_POR_PARTICION = 50000
+
+DIGITOS = '0123456789'
+
+Ficha = namedtuple('Ficha', 'dni nombre palabras telefono email')
+
+
+def _fichas(queryset):
+    filas = queryset.values_list('DNI', 'nombre_normalizado', 'telefono_whatsapp', 'email')
+    for dni, nombre, telefono, email in filas.iterator(chunk_size=5000):
+        yield Ficha(dni, nombre, frozenset(nombre.split()), telefono_e164(telefono), (email or '').strip().lower())
+
+
+# ---- DNI a un cambio de distancia ----
+
+def variantes_borrado(dni):
+    """El DNI y sus borrados de un carácter: dos DNI a un cambio comparten al menos una."""
+    return {dni} | {dni[:i] + dni[i + 1:] for i in range(len(dni))}
+
+
+def vecinos_dni(dni):
+    """Todos los documentos numéricos a un cambio de `dni` (para buscarlos por clave primaria)."""
+    vecinos = set()
+    for i in range(len(dni) + 1):
+        vecinos.update(dni[:i] + d + dni[i:] for d in DIGITOS)
+    for i in range(len(dni)):
+        vecinos.add(dni[:i] + dni[i + 1:])
+        vecinos.update(dni[:i] + d + dni[i + 1:] for d in DIGITOS)
+        if i + 1 < len(dni):
+            vecinos.add(dni[:i] + dni[i + 1] + dni[i] + dni[i + 2:])
+    vecinos.discard(dni)
+    return vecinos
+
+
+def dni_a_un_cambio(a, b):
+    """True si `b` sale de `a` con una sustitución, inserción, borrado o trasposición de vecinos."""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+
+
+# ---- puntaje ----
+
+def _puntos_nombre_parcial(a, b):
+    comunes = len(a & b)
+    if comunes < 2:
+        return 0
+    if comunes == min(len(a), len(b)):
+        # "luis perez" dentro de "luis alberto perez garcia".
+        return PUNTOS_NOMBRE_PARCIAL
+    return round(PUNTOS_NOMBRE_PARCIAL * comunes / len(a | b))
+
+
+def puntuar(a, b):
+    """(puntaje 0-100, motivos) del par de fichas."""
+    puntaje, motivos = 0, []
+    if a.telefono and a.telefono == b.telefono:
+        puntaje += PUNTOS_TELEFONO
+        motivos.append('telefono')
+    if a.nombre and a.nombre == b.nombre:
+        puntaje += PUNTOS_NOMBRE
+        motivos.append('nombre')
+    else:
+        parcial = _puntos_nombre_parcial(a.palabras, b.palabras)
+        if parcial:
+            puntaje += parcial
+            motivos.append('nombre_parcial')
+    if dni_a_un_cambio(a.dni, b.dni):
+        puntaje += PUNTOS_DNI
+        motivos.append('dni')
+    if a.email and a.email == b.email:
+        puntaje += PUNTOS_EMAIL
+        motivos.append('email')
+    return min(puntaje, 100), motivos
+
+
+# ---- bloqueo ----
+
+def _bloques(fichas, particiones=1):
+    """
+    Grupos de DNI que comparten teléfono, nombre normalizado o una variante de borrado del
+    DNI. Solo se comparan pares dentro de un mismo bloque, así que el costo crece con el
+    tamaño de los bloques (acotado por MAX_BLOQUE) y no con el cuadrado de la tabla.
+    """
+    por_telefono, por_nombre = defaultdict(list), defaultdict(list)
+    for ficha in fichas:
+        if ficha.telefono:
+            por_telefono[ficha.telefono].append(ficha.dni)
+        if ficha.nombre:
+            por_nombre[ficha.nombre].append(ficha.dni)
+    yield from por_telefono.values()
+    yield from por_nombre.values()
+    del por_telefono, por_nombre
+
+    for particion in range(particiones):
+        por_dni = defaultdict(list)
+        for ficha in fichas:
+            for variante in variantes_borrado(ficha.dni):
+                if hash(variante) % particiones == particion:
+                    por_dni[variante].append(ficha.dni)
+        yield from por_dni.values()
+
+
+def _comparar(fichas, umbral, incluir=None):
+    """Pares {(dni_a, dni_b): (puntaje, motivos)} sobre el umbral; con `incluir`, solo los que lo tocan."""
+    particiones = max(1, -(-len(fichas) // CANDIDATOS_POR_PARTICION))
+    pares = {}
+    for bloque in _bloques(list(fichas.values()), particiones):
+        if len(bloque) < 2 or len(bloque) > MAX_BLOQUE:
+            continue
+        for dni_a, dni_b in combinations(sorted(set(bloque)), 2):
+            if (dni_a, dni_b) in pares or (incluir is not None and dni_a not in incluir and dni_b not in incluir):
+                continue
+            puntaje, motivos = puntuar(fichas[dni_a], fichas[dni_b])
+            if puntaje >= umbral:
+                pares[(dni_a, dni_b)] = (puntaje, motivos)
+    return pares
+
+
+def detectar_duplicados(candidato_ids=None, umbral=UMBRAL_SUGERENCIA):
+    """
+    Actualiza SugerenciaFusionCandidato.
+
+    Con `candidato_ids` (registro nuevo) trae en una consulta a los candidatos con el mismo
+    teléfono, el mismo nombre normalizado o un DNI a un cambio de distancia y solo evalúa
+    los pares de esos candidatos. Sin `candidato_ids` recorre toda la tabla.
+
+    Returns:
+        tuple: (creadas, actualizadas, borradas) de SugerenciaFusionCandidato.registrar
+    """
+    if candidato_ids is None:
+        fichas = {ficha.dni: ficha for ficha in _fichas(Candidato.objects.all())}
+        return SugerenciaFusionCandidato.registrar(_comparar(fichas, umbral))
+
+    candidato_ids = set(candidato_ids)
+    propias = list(_fichas(Candidato.objects.filter(pk__in=candidato_ids)))
+    filtro = Q(pk__in=candidato_ids)
+    for ficha in propias:
+        filtro |= Q(pk__in=vecinos_dni(ficha.dni))
+        if ficha.nombre:
+            filtro |= Q(nombre_normalizado=ficha.nombre)
+    telefonos = [ficha.telefono[-9:] for ficha in propias if ficha.telefono]
+    if telefonos:
+        filtro |= Q(telefono_whatsapp__in=telefonos)
+
+    fichas = {ficha.dni: ficha for ficha in _fichas(Candidato.objects.filter(filtro))}
+    pares = _comparar(fichas, umbral, incluir=candidato_ids)
+    return SugerenciaFusionCandidato.registrar(pares, candidato_ids=candidato_ids)
@@ -0,0 +1,68 @@
+# utils/embudo.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from statistics import median
+
+from django.db import transaction
+from django.utils import timezone
+
+from candidatos.models import ProcesoTransicion, ResumenEmbudoDiario
+
+# Una salida hacia estos estados no cuenta como avance en el embudo.
+ESTADOS_DESCARTE = ['NO_APTO', 'ABANDONO']
+
+
+def _rango_dia(fecha):
+    inicio = timezone.make_aware(datetime.combine(fecha, datetime.min.time()))
+    return inicio, inicio + timedelta(days=1)
+
+
+def recalcular_resumen_dia(fecha):
+    """
+    Regenera las filas de ResumenEmbudoDiario de `fecha` leyendo solo las transiciones de
+    ese día (índice sobre ProcesoTransicion.fecha). Devuelve la cantidad de filas escritas.
+    """
+    inicio, fin = _rango_dia(fecha)
+
+    transiciones = ProcesoTransicion.objects.filter(
+        fecha__gte=inicio, fecha__lt=fin
+    ).values_list(
+        'proceso__sede_proceso', 'proceso__empresa_proceso',
+        'estado_anterior', 'estado_nuevo', 'permanencia_segundos',
+    )
+
+    grupos = defaultdict(lambda: {'entradas': 0, 'salidas': 0, 'avances': 0, 'permanencias': []})
+
+    for sede_id, empresa_id, anterior, nuevo, permanencia in transiciones.iterator():
+        grupos[(sede_id, empresa_id, nuevo)]['entradas'] += 1
+
+        if anterior is None:
+            continue
+
+        grupo = grupos[(sede_id, empresa_id, anterior)]
+        grupo['salidas'] += 1
+        if nuevo not in ESTADOS_DESCARTE:
+            grupo['avances'] += 1
+        if permanencia is not None:
+            grupo['permanencias'].append(permanencia)
+
+    filas = [
+        ResumenEmbudoDiario(
+            fecha=fecha,
+            sede_id=sede_id,
+            empresa_id=empresa_id,
+            estado=estado,
+            entradas=datos['entradas'],
+            salidas=datos['salidas'],
+            avances=datos['avances'],
+            mediana_permanencia_segundos=int(median(datos['permanencias'])) if datos['permanencias'] else None,
+        )
+        for (sede_id, empresa_id, estado), datos in grupos.items()
+    ]
+
+    with transaction.atomic():
+        ResumenEmbudoDiario.objects.filter(fecha=fecha).delete()
+        ResumenEmbudoDiario.objects.bulk_create(filas)
+
+    return len(filas)
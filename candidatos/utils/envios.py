@@ -0,0 +1,191 @@
+# utils/envios.py
+
+import logging
+import threading
+import time as reloj
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from candidatos.models import (
+    Candidato, CuerpoMensaje, CupoEnvioWhatsApp, DetalleEnvio, ResumenMensajeriaCandidato, TareaEnvioMasivo,
+)
+from .audiencias import CONTACTABLE
+from .plantillas import plantilla_compilada
+from .whatsapp_api import cliente_whatsapp
+
+logger = logging.getLogger(__name__)
+
+# Resultados acumulados antes de guardar los DetalleEnvio y los contadores de la tarea.
+ENVIO_LOTE_GUARDADO = 50
+# Tokens pedidos como máximo al cupo en cada reserva.
+ENVIO_RESERVA_MAXIMA = 100
+# Si el cupo no tendrá tokens antes de esta espera (en segundos; cupo diario agotado), la
+# campaña se pausa y se reprograma en lugar de dejar el hilo dormido.
+ENVIO_ESPERA_MAXIMA = 60
+
+# Hilos que hacen las llamadas HTTP (compartidos por todas las campañas del proceso).
+_pool_envios = ThreadPoolExecutor(max_workers=settings.WHATSAPP_ENVIO_WORKERS, thread_name_prefix='whatsapp')
+# Hilos que coordinan cada campaña y escriben en la base de datos.
+_pool_tareas = ThreadPoolExecutor(max_workers=2, thread_name_prefix='envio-masivo')
+
+
+def _detalle(tarea_id, cuerpo_hash, dni, telefono, variables, resultado):
+    id_meta = None
+    if resultado['success']:
+        mensajes = resultado['data'].get('messages') or [{}]
+        id_meta = mensajes[0].get('id')
+
+    return DetalleEnvio(
+        tarea_envio_id=tarea_id,
+        contacto_id=dni,
+        telefono=telefono,
+        cuerpo_id=cuerpo_hash,
+        variables=variables,
+        estado_meta='ENVIADO' if resultado['success'] else 'FALLIDO',
+        id_mensaje_meta=id_meta,
+    )
+
+
+def _guardar_lote(tarea_id, detalles):
+    entregados = sum(1 for d in detalles if d.estado_meta != 'FALLIDO')
+    with transaction.atomic():
+        DetalleEnvio.objects.bulk_create(detalles)
+        TareaEnvioMasivo.objects.filter(pk=tarea_id).update(
+            total_entregados=F('total_entregados') + entregados,
+            total_fallidos=F('total_fallidos') + len(detalles) - entregados,
+        )
+        ResumenMensajeriaCandidato.registrar_envios(detalles)
+
+
+class _Resultados:
+    """Recoge los envíos terminados y los guarda en lotes de ENVIO_LOTE_GUARDADO."""
+
+    def __init__(self, tarea_id, cuerpo_hash):
+        self.tarea_id = tarea_id
+        self.cuerpo_hash = cuerpo_hash
+        self.en_vuelo = {}
+        self.lote = []
+
+    def agregar(self, futuro, destinatario):
+        self.en_vuelo[futuro] = destinatario
+
+    def recoger(self, esperar=False):
+        if esperar:
+            wait(self.en_vuelo)
+        for futuro in [f for f in self.en_vuelo if f.done()]:
+            dni, telefono, variables = self.en_vuelo.pop(futuro)
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                resultado = {'success': False, 'message': str(e)}
+            self.lote.append(_detalle(self.tarea_id, self.cuerpo_hash, dni, telefono, variables, resultado))
+
+        if self.lote and (esperar or len(self.lote) >= ENVIO_LOTE_GUARDADO):
+            _guardar_lote(self.tarea_id, self.lote)
+            self.lote = []
+
+
+def ejecutar_envio_masivo(tarea_id):
+    """
+    Envía los destinatarios pendientes de la campaña `tarea_id` que siguen contactables
+    (sin baja y con teléfono válido). Cada mensaje consume un token del cupo persistente
+    del número (CupoEnvioWhatsApp, compartido entre workers); los resultados se guardan por
+    lotes sumándolos a total_entregados/total_fallidos. Si se agota el cupo diario, la
+    campaña queda PENDIENTE con `reanudar_en` y su fin estimado.
+    """
+    close_old_connections()
+    try:
+        tarea = TareaEnvioMasivo.objects.select_related('mensaje_plantilla').get(pk=tarea_id)
+        plantilla = plantilla_compilada(tarea.mensaje_plantilla)
+
+        ya_enviados = DetalleEnvio.objects.filter(tarea_envio_id=tarea_id).values('contacto_id')
+        cuerpo = CuerpoMensaje.para_texto(plantilla.texto)
+        pendientes = deque(
+            (dni, telefono, variables, contenido)
+            for (dni, telefono), variables, contenido in plantilla.renderizar_candidatos(
+                # CONTACTABLE otra vez en cada ejecución: una campaña pausada por cupo no escribe
+                # a quien se dio de baja (o quedó sin teléfono válido) antes de reanudarse.
+                Candidato.objects.filter(CONTACTABLE, pk__in=tarea.destinatarios).exclude(pk__in=ya_enviados),
+                'DNI', 'telefono_whatsapp',
+            )
+        )
+
+        cupo = CupoEnvioWhatsApp.del_numero()
+        TareaEnvioMasivo.objects.filter(pk=tarea_id).update(
+            estado='EN_PROCESO', reanudar_en=None, fecha_estimada_fin=cupo.estimar_fin(len(pendientes)),
+        )
+
+        resultados = _Resultados(tarea_id, cuerpo.hash)
+        cliente = cliente_whatsapp()
+        espera = 0.0
+
+        while pendientes:
+            concedidos, espera = CupoEnvioWhatsApp.reservar(min(len(pendientes), ENVIO_RESERVA_MAXIMA))
+            if not concedidos:
+                if espera > ENVIO_ESPERA_MAXIMA:
+                    break
+                reloj.sleep(espera)
+            for _ in range(concedidos):
+                dni, telefono, variables, contenido = pendientes.popleft()
+                resultados.agregar(_pool_envios.submit(cliente.enviar_texto, telefono, contenido), (dni, telefono, variables))
+            resultados.recoger()
+
+        resultados.recoger(esperar=True)
+
+        if pendientes:
+            reanudar_en = timezone.now() + timedelta(seconds=espera)
+            cupo.refresh_from_db()
+            TareaEnvioMasivo.objects.filter(pk=tarea_id).update(
+                estado='PENDIENTE', reanudar_en=reanudar_en, fecha_estimada_fin=cupo.estimar_fin(len(pendientes)),
+            )
+            _programar_reanudacion(espera)
+            logger.info("Envío masivo %s pausado por cupo del número; %s pendientes desde %s", tarea_id, len(pendientes), reanudar_en)
+        else:
+            TareaEnvioMasivo.objects.filter(pk=tarea_id).update(estado='COMPLETADO', fecha_estimada_fin=timezone.now())
+            logger.info("Envío masivo %s completado. Métricas del cliente: %s", tarea_id, cliente.metricas())
+    except Exception:
+        logger.exception("Error en el envío masivo %s", tarea_id)
+        TareaEnvioMasivo.objects.filter(pk=tarea_id).update(estado='FALLIDO')
+    finally:
+        close_old_connections()
+
+
+def reanudar_envios_pendientes(en_segundo_plano=True):
+    """
+    Reanuda las campañas pausadas cuyo `reanudar_en` ya pasó. El UPDATE condicionado al
+    estado hace que solo un worker (o el comando reanudar_envios_masivos) tome cada una.
+    """
+    close_old_connections()
+    try:
+        vencidas = list(
+            TareaEnvioMasivo.objects.filter(estado='PENDIENTE', reanudar_en__lte=timezone.now())
+            .values_list('pk', flat=True)
+        )
+        reanudadas = []
+        for tarea_id in vencidas:
+            if TareaEnvioMasivo.objects.filter(pk=tarea_id, estado='PENDIENTE').update(estado='EN_PROCESO'):
+                if en_segundo_plano:
+                    _pool_tareas.submit(ejecutar_envio_masivo, tarea_id)
+                else:
+                    ejecutar_envio_masivo(tarea_id)
+                reanudadas.append(tarea_id)
+        return reanudadas
+    finally:
+        close_old_connections()
+
+
+def _programar_reanudacion(segundos):
+    temporizador = threading.Timer(segundos + 1, reanudar_envios_pendientes)
+    temporizador.daemon = True
+    temporizador.start()
+
+
+def encolar_envio_masivo(tarea_id):
+    """Programa la campaña en segundo plano al confirmarse la transacción actual."""
+    transaction.on_commit(lambda: _pool_tareas.submit(ejecutar_envio_masivo, tarea_id))
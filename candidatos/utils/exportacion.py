@@ -0,0 +1,318 @@
+# utils/exportacion.py
+
+import csv
+import io
+import tempfile
+from datetime import datetime
+from itertools import chain, islice
+from operator import attrgetter
+
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from candidatos.models import Candidato, DatosCualificacion, Proceso
+from .busqueda import filtrar_por_busqueda
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Filas leídas por consulta al recorrer el queryset.
+EXPORT_CHUNK = 2000
+# Filas usadas para estimar el ancho de las columnas.
+EXPORT_MUESTRA_ANCHOS = 500
+EXPORT_ANCHO_MAXIMO = 40
+
+
+# Parámetros GET de CandidatoExportView que definen el contenido de la exportación.
+FILTROS_EXPORT_CANDIDATOS = ['search', 'estado', 'descarte', 'fecha_inicio', 'fecha_final']
+
+
+def parametros_export_candidatos(query_params):
+    return {k: query_params.get(k) for k in FILTROS_EXPORT_CANDIDATOS if query_params.get(k)}
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def candidatos_para_exportar(parametros):
+    """Queryset de CandidatoExportView para los filtros de `parametros_export_candidatos`."""
+    candidatos_qs = Candidato.objects.all()
+
+    if parametros.get('search'):
+        candidatos_qs = filtrar_por_busqueda(candidatos_qs, parametros['search'])
+
+    if parametros.get('estado'):
+        candidatos_qs = candidatos_qs.filter(estado_actual=parametros['estado'])
+
+    if parametros.get('descarte'):
+        candidatos_qs = candidatos_qs.filter(motivo_descarte=parametros['descarte'])
+
+    fecha_inicio = _fecha(parametros.get('fecha_inicio'))
+    if fecha_inicio:
+        candidatos_qs = candidatos_qs.filter(fecha_registro__gte=fecha_inicio)
+
+    fecha_final = _fecha(parametros.get('fecha_final'))
+    if fecha_final:
+        candidatos_qs = candidatos_qs.filter(fecha_registro__lte=fecha_final)
+
+    # El último proceso sale del puntero desnormalizado; se recorre por bloques.
+    return candidatos_qs.order_by('fecha_registro').select_related(
+        'sede_registro',
+        'datoscualificacion',
+        'proceso_actual__empresa_proceso',
+        'proceso_actual__supervisor',
+    )
+
+
+def filas_candidatos(candidatos_qs):
+    return (
+        fila_candidato(c, c.proceso_actual)
+        for c in candidatos_qs.iterator(chunk_size=EXPORT_CHUNK)
+    )
+
+
+def format_date(date_field):
+    return date_field.strftime('%d/%m/%Y') if date_field else ''
+
+
+def format_bool(bool_field):
+    if bool_field is True: return 'SÍ'
+    if bool_field is False: return 'NO'
+    return 'N/A'
+
+
+def format_texto(valor):
+    return valor if valor else ''
+
+
+class ColumnaExport:
+    """
+    Columna declarativa de una exportación.
+
+    `ruta` es la cadena de atributos (separada por puntos) leída desde el objeto de
+    `origen` (índice en los objetos que recibe la fila). Si el objeto de origen o algún
+    intermedio falta, la celda vale `vacio`. `modelo` indica un campo con choices: su
+    etiqueta se resuelve con una tabla precalculada en lugar de get_FOO_display().
+    """
+
+    def __init__(self, encabezado, ruta, origen=0, formato=None, vacio='', modelo=None):
+        self.encabezado = encabezado
+        self.ruta = ruta
+        self.origen = origen
+        self.formato = formato
+        self.vacio = vacio
+        self.modelo = modelo
+
+    def formato_final(self):
+        """Formato de la celda, con la tabla de etiquetas de choices ya resuelta."""
+        if self.modelo is None:
+            return self.formato
+
+        campo = self.modelo._meta.get_field(self.ruta.rsplit('.', 1)[-1])
+        etiquetas = {valor: str(etiqueta) for valor, etiqueta in campo.flatchoices}
+        if self.formato is None:
+            return lambda valor: etiquetas.get(valor, valor)
+        formato = self.formato
+        return lambda valor: formato(etiquetas.get(valor, valor))
+
+
+def _leer_campos(campos):
+    """Lector de `campos` de un objeto que siempre devuelve una tupla (attrgetter de uno no lo hace)."""
+    if len(campos) == 1:
+        leer = attrgetter(campos[0])
+        return lambda objeto: (leer(objeto),)
+    return attrgetter(*campos)
+
+
+def compilar_fila(columnas):
+    """
+    Prepara una vez el constructor de filas de `columnas`: la función resultante recibe los
+    objetos de origen, resuelve cada objeto intermedio (p. ej. datoscualificacion) una sola
+    vez por fila y lee todos los campos de cada objeto con un único attrgetter.
+    """
+    # Objetos de la fila: primero los de origen, luego los intermedios en orden de resolución.
+    origenes = max(columna.origen for columna in columnas) + 1
+    indices = {(origen, ()): origen for origen in range(origenes)}
+    pasos = []
+
+    def objeto(origen, intermedios):
+        clave = (origen, intermedios)
+        if clave not in indices:
+            padre = objeto(origen, intermedios[:-1])
+            pasos.append((padre, intermedios[-1]))
+            indices[clave] = origenes + len(pasos) - 1
+        return indices[clave]
+
+    campos_por_objeto = {}
+    for posicion, columna in enumerate(columnas):
+        *intermedios, campo = columna.ruta.split('.')
+        indice = objeto(columna.origen, tuple(intermedios))
+        campos_por_objeto.setdefault(indice, []).append((campo, posicion, columna.formato_final(), columna.vacio))
+
+    grupos = [
+        (indice, _leer_campos([campo for campo, _, _, _ in campos]), [destino for _, *destino in campos])
+        for indice, campos in campos_por_objeto.items()
+    ]
+    total = len(columnas)
+
+    def fila(*objetos):
+        objetos = list(objetos)
+        for padre, atributo in pasos:
+            padre = objetos[padre]
+            objetos.append(getattr(padre, atributo, None) if padre is not None else None)
+
+        celdas = [None] * total
+        for indice, leer, destinos in grupos:
+            actual = objetos[indice]
+            if actual is None:
+                for posicion, _, vacio in destinos:
+                    celdas[posicion] = vacio
+                continue
+            for (posicion, formato, _), valor in zip(destinos, leer(actual)):
+                celdas[posicion] = formato(valor) if formato is not None else valor
+        return tuple(celdas)
+
+    return fila
+
+
+# Orígenes de las columnas de candidatos: fila_candidato(candidato, ultimo_proceso).
+CANDIDATO, PROCESO = 0, 1
+
+EXPORT_CANDIDATO = [
+    ColumnaExport('DNI', 'DNI'),
+    ColumnaExport('Nombres_Completos', 'nombres_completos'),
+    ColumnaExport('Telefono_Whatsapp', 'telefono_whatsapp'),
+    ColumnaExport('Email', 'email', formato=format_texto),
+    ColumnaExport('Edad', 'edad'),
+    ColumnaExport('Distrito_Candidato', 'distrito'),
+    ColumnaExport('Estado_Actual_Candidato', 'estado_actual', modelo=Candidato),
+    ColumnaExport('Fecha_Registro', 'fecha_registro', formato=format_date),
+    ColumnaExport('Sede_Registro', 'sede_registro.nombre', vacio='N/A'),
+
+    ColumnaExport('Secundaria_Completa', 'datoscualificacion.secundaria_completa', formato=format_bool),
+    ColumnaExport('Exp_Campanas_Espanolas', 'datoscualificacion.experiencia_campanas_espanolas', formato=format_bool),
+    ColumnaExport('Tipo_Exp_Ventas', 'datoscualificacion.experiencia_ventas_tipo', modelo=DatosCualificacion),
+    ColumnaExport('Empresa_Exp_Ventas', 'datoscualificacion.empresa_vendedor'),
+    ColumnaExport('Tiempo_Experiencia_Vendedor', 'datoscualificacion.tiempo_experiencia_vendedor', modelo=DatosCualificacion),
+    ColumnaExport('Conforme_Beneficios', 'datoscualificacion.conforme_beneficios', modelo=DatosCualificacion),
+    ColumnaExport('Detalle_Beneficios_Otro', 'datoscualificacion.detalle_beneficios_otro'),
+    ColumnaExport('Disponibilidad_Horario', 'datoscualificacion.disponibilidad_horario', formato=format_bool),
+    ColumnaExport('Discapacidad_Enfermedad_Cronica', 'datoscualificacion.discapacidad_enfermedad_cronica'),
+    ColumnaExport('Dificultad_Habla', 'datoscualificacion.dificultad_habla', formato=format_bool),
+
+    ColumnaExport('Empresa_Cliente', 'empresa_proceso.nombre', origen=PROCESO),
+    ColumnaExport('Fecha_Convocatoria', 'fecha_inicio', origen=PROCESO, formato=format_date),
+    ColumnaExport('Fecha_Confirmado', 'fecha_confirmado', origen=PROCESO, formato=format_date),
+    ColumnaExport('Fecha_Teorico', 'fecha_teorico', origen=PROCESO, formato=format_date),
+    ColumnaExport('Fecha_Practico', 'fecha_practico', origen=PROCESO, formato=format_date),
+    ColumnaExport('Fecha_Contratacion', 'fecha_contratacion', origen=PROCESO, formato=format_date),
+    ColumnaExport('Supervisor_Asignado', 'supervisor.nombre', origen=PROCESO),
+    ColumnaExport('Estado_Proceso', 'estado', origen=PROCESO, vacio='N/A', modelo=Proceso),
+]
+
+COLUMNAS_CANDIDATO = [columna.encabezado for columna in EXPORT_CANDIDATO]
+
+# fila_candidato(c, ultimo_proceso) -> tupla en el orden de COLUMNAS_CANDIDATO.
+fila_candidato = compilar_fila(EXPORT_CANDIDATO)
+
+
+def escribir_xlsx(filas, columnas, nombre_hoja, destino, muestra=EXPORT_MUESTRA_ANCHOS):
+    """
+    Escribe `filas` (iterable de tuplas) en `destino` con el modo write-only de openpyxl,
+    que vuelca cada fila a disco en lugar de mantener la hoja en memoria. Los anchos de
+    columna se estiman con las primeras `muestra` filas.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(nombre_hoja[:31])
+
+    filas = iter(filas)
+    primeras = list(islice(filas, muestra))
+
+    for idx, columna in enumerate(columnas):
+        largo = max([len(columna)] + [len(str(fila[idx])) for fila in primeras if fila[idx] is not None])
+        hoja.column_dimensions[get_column_letter(idx + 1)].width = min(largo + 2, EXPORT_ANCHO_MAXIMO)
+
+    hoja.append(columnas)
+    for fila in chain(primeras, filas):
+        hoja.append(fila)
+
+    libro.save(destino)
+
+
+def escribir_csv(filas, columnas, nombre_hoja, destino):
+    """CSV en UTF-8 con BOM (para que Excel respete los acentos), escrito fila a fila."""
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto)
+    escritor.writerow(columnas)
+    escritor.writerows(filas)
+    texto.flush()
+    texto.detach()
+
+
+def escribir_parquet(filas, columnas, nombre_hoja, destino):
+    """
+    Parquet por bloques de EXPORT_CHUNK filas con pyarrow. Todas las columnas se guardan
+    como texto, igual que en XLSX/CSV (fechas ya formateadas, etiquetas de choices).
+    """
+    esquema = pa.schema([(columna, pa.string()) for columna in columnas])
+    filas = iter(filas)
+
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        while True:
+            bloque = list(islice(filas, EXPORT_CHUNK))
+            if not bloque:
+                break
+            valores = zip(*bloque)
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array([None if v is None else str(v) for v in col], pa.string()) for col in valores],
+                schema=esquema,
+            ))
+
+
+# formato -> (content type, extensión, escritor(filas, columnas, nombre_hoja, destino)).
+FORMATOS_EXPORT = {
+    'xlsx': (CONTENT_TYPE_XLSX, 'xlsx', escribir_xlsx),
+    'csv': ('text/csv', 'csv', escribir_csv),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', escribir_parquet),
+}
+FORMATO_EXPORT_POR_DEFECTO = 'xlsx'
+
+
+def formatos_disponibles():
+    return [formato for formato in FORMATOS_EXPORT if formato != 'parquet' or pq is not None]
+
+
+def formato_export(query_params):
+    """Lee `formato=` de la petición; None si no es válido o no está disponible."""
+    formato = (query_params.get('formato') or FORMATO_EXPORT_POR_DEFECTO).lower()
+    return formato if formato in formatos_disponibles() else None
+
+
+def escribir_exportacion(formato, filas, columnas, nombre_hoja, destino):
+    FORMATOS_EXPORT[formato][2](filas, columnas, nombre_hoja, destino)
+
+
+def respuesta_exportacion(filas, columnas, nombre_hoja, nombre_base, formato=FORMATO_EXPORT_POR_DEFECTO):
+    """
+    Genera la exportación en un archivo temporal y la devuelve como FileResponse (streaming
+    por bloques), de modo que la memoria del worker no crece con la cantidad de filas.
+    """
+    content_type, extension, escritor = FORMATOS_EXPORT[formato]
+
+    archivo = tempfile.TemporaryFile()
+    escritor(filas, columnas, nombre_hoja, archivo)
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo, as_attachment=True, filename=f"{nombre_base}.{extension}", content_type=content_type
+    )
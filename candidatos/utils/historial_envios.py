@@ -0,0 +1,225 @@
+# utils/historial_envios.py
+
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from candidatos.models import DetalleEnvio, TareaEnvioMasivo
+
+HISTORIAL_LIMITE = 50
+DETALLE_LIMITE = 500
+LIMITE_MAXIMO = 2000
+
+# Una campaña en estos estados ya no recibe envíos: su historial solo cambia si llega un
+# webhook, que actualiza fecha_actualizacion.
+ESTADOS_TERMINADOS = ('COMPLETADO', 'FALLIDO')
+
+ETIQUETAS_ESTADO_TAREA = {valor: str(etiqueta) for valor, etiqueta in TareaEnvioMasivo.ESTADOS_TAREA}
+ETIQUETAS_PROCESO = {valor: str(etiqueta) for valor, etiqueta in TareaEnvioMasivo.PROCESO_CHOICES}
+ETIQUETAS_ESTADO_META = {valor: str(etiqueta) for valor, etiqueta in DetalleEnvio.ESTADOS_META}
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def _local(valor, formato):
+    return timezone.localtime(valor).strftime(formato) if valor else None
+
+
+def _tasa_exito(t):
+    return round(t['total_entregados'] * 100.0 / t['total_contactos'], 1) if t['total_contactos'] else 0.0
+
+
+# clave en la respuesta -> (columnas de values() que necesita, valor a partir de la fila)
+CAMPOS_HISTORIAL = {
+    'id': (('id',), lambda t: t['id']),
+    'proceso': (('proceso_tipo',), lambda t: t['proceso_tipo']),
+    'proceso_display': (('proceso_tipo',), lambda t: ETIQUETAS_PROCESO.get(t['proceso_tipo'], t['proceso_tipo'])),
+    'fechaOrigen': (('fecha_origen',), lambda t: t['fecha_origen'].strftime('%Y-%m-%d')),
+    'enviados': (('total_entregados',), lambda t: t['total_entregados']),
+    'total': (('total_contactos',), lambda t: t['total_contactos']),
+    'tasa_exito': (('total_entregados', 'total_contactos'), _tasa_exito),
+    'fechaEnvio': (('fecha_inicio',), lambda t: _local(t['fecha_inicio'], '%d/%m/%Y %H:%M')),
+    'estado': (('estado',), lambda t: t['estado']),
+    'estado_display': (('estado',), lambda t: ETIQUETAS_ESTADO_TAREA.get(t['estado'], t['estado'])),
+    'finEstimado': (('fecha_estimada_fin',), lambda t: _local(t['fecha_estimada_fin'], '%d/%m/%Y %H:%M')),
+    'plantilla': (('mensaje_plantilla__titulo',), lambda t: t['mensaje_plantilla__titulo']),
+}
+
+CAMPOS_DETALLE = {
+    'dni': (('contacto_id',), lambda d: d['contacto_id'] or '---'),
+    'nombre': (('contacto__nombres_completos',), lambda d: d['contacto__nombres_completos'] or 'Contacto Eliminado'),
+    'telefono': (('telefono',), lambda d: d['telefono']),
+    'estado': (('estado_meta',), lambda d: ETIQUETAS_ESTADO_META.get(d['estado_meta'], d['estado_meta'])),
+    'estado_codigo': (('estado_meta',), lambda d: d['estado_meta']),
+    'fecha_hora': (('fecha_envio',), lambda d: _local(d['fecha_envio'], '%H:%M:%S')),
+}
+
+
+# ---- parámetros ----
+
+def _lista(valor):
+    return [v.strip() for v in (valor or '').split(',') if v.strip()]
+
+
+def _campos(query_params, disponibles):
+    pedidos = _lista(query_params.get('campos')) or list(disponibles)
+    desconocidos = [c for c in pedidos if c not in disponibles]
+    if desconocidos:
+        raise ParametroInvalido(f"Campos no disponibles: {', '.join(desconocidos)}")
+    return pedidos
+
+
+def _limite(query_params, por_defecto):
+    try:
+        limite = int(query_params.get('limite') or por_defecto)
+    except ValueError:
+        raise ParametroInvalido("El límite debe ser un número.")
+    return min(max(limite, 1), LIMITE_MAXIMO)
+
+
+def _estados(query_params, validos):
+    estados = _lista(query_params.get('estado'))
+    invalidos = [e for e in estados if e not in validos]
+    if invalidos:
+        raise ParametroInvalido(f"Estados no válidos: {', '.join(invalidos)}")
+    return estados
+
+
+def codificar_cursor(*valores):
+    crudo = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores])
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, n):
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ParametroInvalido("Cursor inválido.")
+    if not isinstance(valores, list) or len(valores) != n:
+        raise ParametroInvalido("Cursor inválido.")
+    return valores
+
+
+def _columnas(campos, especificacion, fijas):
+    columnas = list(fijas)
+    for campo in campos:
+        columnas.extend(c for c in especificacion[campo][0] if c not in columnas)
+    return columnas
+
+
+def _serializar(filas, campos, especificacion):
+    return [{campo: especificacion[campo][1](fila) for campo in campos} for fila in filas]
+
+
+# ---- historial de campañas ----
+
+def pagina_historial(query_params):
+    """
+    Página del historial ordenada por (-fecha_inicio, -id) con paginación por cursor.
+
+    Parámetros: limite, cursor, campos (coma), estado (coma), proceso, fecha_origen
+    (YYYY-MM-DD), fecha_envio (YYYY-MM-DD, día local) y mes_envio (MM/YYYY).
+
+    Returns:
+        tuple: (filas serializadas, cursor siguiente o None, filas crudas)
+    """
+    campos = _campos(query_params, CAMPOS_HISTORIAL)
+    limite = _limite(query_params, HISTORIAL_LIMITE)
+    estados = _estados(query_params, ETIQUETAS_ESTADO_TAREA)
+
+    qs = TareaEnvioMasivo.objects.all()
+    if estados:
+        qs = qs.filter(estado__in=estados)
+    if query_params.get('proceso'):
+        qs = qs.filter(proceso_tipo=query_params['proceso'])
+
+    try:
+        if query_params.get('fecha_origen'):
+            qs = qs.filter(fecha_origen=date.fromisoformat(query_params['fecha_origen']))
+        if query_params.get('fecha_envio'):
+            qs = qs.filter(fecha_inicio__date=date.fromisoformat(query_params['fecha_envio']))
+        if query_params.get('mes_envio'):
+            mes, anio = (int(p) for p in query_params['mes_envio'].split('/'))
+            qs = qs.filter(fecha_inicio__year=anio, fecha_inicio__month=mes)
+    except ValueError:
+        raise ParametroInvalido("Formato de fecha inválido.")
+
+    if query_params.get('cursor'):
+        fecha, pk = _decodificar_cursor(query_params['cursor'], 2)
+        try:
+            fecha = datetime.fromisoformat(fecha)
+        except (TypeError, ValueError):
+            raise ParametroInvalido("Cursor inválido.")
+        qs = qs.filter(Q(fecha_inicio__lt=fecha) | Q(fecha_inicio=fecha, id__lt=pk))
+
+    columnas = _columnas(campos, CAMPOS_HISTORIAL, ('id', 'fecha_inicio', 'estado', 'fecha_actualizacion'))
+    filas = list(qs.order_by('-fecha_inicio', '-id').values(*columnas)[:limite + 1])
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1]['fecha_inicio'], filas[-1]['id'])
+    return _serializar(filas, campos, CAMPOS_HISTORIAL), siguiente, filas
+
+
+# ---- destinatarios de una campaña ----
+
+def pagina_detalles(tarea_id, query_params):
+    """
+    Página de DetalleEnvio de la campaña ordenada por (estado_meta, id).
+    Parámetros: limite, cursor, campos (coma) y estado (coma, códigos de ESTADOS_META).
+    """
+    campos = _campos(query_params, CAMPOS_DETALLE)
+    limite = _limite(query_params, DETALLE_LIMITE)
+    estados = _estados(query_params, ETIQUETAS_ESTADO_META)
+
+    qs = DetalleEnvio.objects.filter(tarea_envio_id=tarea_id)
+    if estados:
+        qs = qs.filter(estado_meta__in=estados)
+    if query_params.get('cursor'):
+        estado, pk = _decodificar_cursor(query_params['cursor'], 2)
+        qs = qs.filter(Q(estado_meta__gt=estado) | Q(estado_meta=estado, id__gt=pk))
+
+    columnas = _columnas(campos, CAMPOS_DETALLE, ('id', 'estado_meta'))
+    filas = list(qs.order_by('estado_meta', 'id').values(*columnas)[:limite + 1])
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1]['estado_meta'], filas[-1]['id'])
+    return _serializar(filas, campos, CAMPOS_DETALLE), siguiente
+
+
+# ---- validación condicional (ETag / Last-Modified) ----
+
+def validadores(request, versiones):
+    """
+    ETag y Last-Modified para `versiones` [(id, fecha_actualizacion)] de campañas
+    terminadas, combinados con la consulta (campos, filtros y cursor).
+    """
+    huella = hashlib.sha1(request.get_full_path().encode())
+    for pk, actualizada in versiones:
+        huella.update(f'{pk}:{actualizada.timestamp()};'.encode())
+    ultima = max(actualizada for _, actualizada in versiones)
+    return quote_etag(huella.hexdigest()), int(ultima.timestamp())
+
+
+def respuesta_condicional(request, etag, ultima_modificacion):
+    """HttpResponseNotModified si el cliente ya tiene esta versión; None en caso contrario."""
+    return get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+
+
+def con_validadores(response, etag, ultima_modificacion):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_modificacion)
+    # Sin frescura heurística: el navegador siempre revalida y recibe 304 si nada cambió.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,277 @@
+# utils/importacion.py
+
+import csv
+from pathlib import Path
+
+import pandas as pd
+from django.db import transaction
+from openpyxl import load_workbook
+
+from candidatos.models import (
+    Candidato, ResumenMensajeriaCandidato, TokenBusquedaCandidato, normalizar_nombre, normalizar_texto,
+)
+
+IMPORTACION_CHUNK = 5000
+
+# Encabezado normalizado (normalizar_texto) -> campo de Candidato.
+ALIAS_COLUMNAS = {
+    'dni': 'DNI',
+    'documento': 'DNI',
+    'numero de documento': 'DNI',
+    'nombres completos': 'nombres_completos',
+    'nombres': 'nombres_completos',
+    'nombre': 'nombres_completos',
+    'apellidos y nombres': 'nombres_completos',
+    'telefono whatsapp': 'telefono_whatsapp',
+    'telefono': 'telefono_whatsapp',
+    'celular': 'telefono_whatsapp',
+    'whatsapp': 'telefono_whatsapp',
+    'email': 'email',
+    'correo': 'email',
+    'correo electronico': 'email',
+    'distrito': 'distrito',
+    'edad': 'edad',
+}
+COLUMNAS_OBLIGATORIAS = ('DNI', 'nombres_completos', 'telefono_whatsapp')
+# Campos opcionales: una celda vacía no borra el valor que ya tiene el candidato.
+COLUMNAS_OPCIONALES = ('email', 'distrito', 'edad')
+
+
+class ArchivoInvalido(ValueError):
+    pass
+
+
+# ---- limpieza (vectorizada sobre columnas de pandas) ----
+
+def _texto(serie):
+    return serie.fillna('').astype(str).str.strip()
+
+
+def limpiar_dni(serie):
+    """Solo dígitos; None si no quedan exactamente 8."""
+    dni = _texto(serie).str.replace(r'\D', '', regex=True)
+    return dni.where(dni.str.len() == 8, None)
+
+
+def limpiar_telefono(serie):
+    """Solo dígitos, conservando los últimos 9 (quita el prefijo de país)."""
+    return _texto(serie).str.replace(r'\D', '', regex=True).str[-9:]
+
+
+def limpiar_edad(serie):
+    edad = pd.to_numeric(_texto(serie), errors='coerce')
+    valida = edad.between(14, 99) & (edad % 1 == 0)
+    return edad.fillna(0).astype(int).astype(object).where(valida, None)
+
+
+# ---- lectura por lotes ----
+
+def _lotes_csv(ruta, tamano):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        muestra = archivo.read(4096)
+    try:
+        separador = csv.Sniffer().sniff(muestra, delimiters=',;\t').delimiter
+    except csv.Error:
+        separador = ','
+    yield from pd.read_csv(
+        ruta, sep=separador, dtype=str, keep_default_na=False,
+        encoding='utf-8-sig', chunksize=tamano,
+    )
+
+
+def _celda(valor):
+    # Excel guarda DNI y teléfonos como números: 75397940.0 -> '75397940'.
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return valor
+
+
+def _lotes_xlsx(ruta, tamano):
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = [str(c) if c is not None else '' for c in next(filas, ())]
+        lote = []
+        for fila in filas:
+            if any(c is not None for c in fila):
+                lote.append([_celda(c) for c in fila[:len(encabezado)]])
+            if len(lote) >= tamano:
+                yield pd.DataFrame(lote, columns=encabezado, dtype=object)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=encabezado, dtype=object)
+    finally:
+        libro.close()
+
+
+def leer_lotes(ruta, tamano=IMPORTACION_CHUNK):
+    """DataFrames de hasta `tamano` filas de un CSV (separador , ; o tab) o de la primera hoja de un XLSX."""
+    extension = Path(ruta).suffix.lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return _lotes_xlsx(ruta, tamano)
+    if extension in ('.csv', '.txt'):
+        return _lotes_csv(ruta, tamano)
+    raise ArchivoInvalido(f"Formato no soportado: '{extension}'. Use CSV o XLSX.")
+
+
+def preparar_lote(df):
+    """Renombra los encabezados a campos de Candidato y limpia las columnas."""
+    df = df.rename(columns=lambda c: ALIAS_COLUMNAS.get(normalizar_texto(str(c)), c))
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in df.columns]
+    if faltantes:
+        raise ArchivoInvalido(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+    limpio = pd.DataFrame({
+        'DNI_original': _texto(df['DNI']),
+        'DNI': limpiar_dni(df['DNI']),
+        'nombres_completos': _texto(df['nombres_completos']).str.split().str.join(' ').str[:255],
+        'telefono_whatsapp': limpiar_telefono(df['telefono_whatsapp']),
+    })
+    if 'email' in df.columns:
+        limpio['email'] = _texto(df['email']).str.lower().str[:255]
+    if 'distrito' in df.columns:
+        limpio['distrito'] = _texto(df['distrito']).str[:200]
+    if 'edad' in df.columns:
+        limpio['edad'] = limpiar_edad(df['edad'])
+    # Los vacíos llegan como NaN según el dtype de pandas; las filas se comparan con None.
+    limpio = limpio.astype(object)
+    return limpio.where(limpio.notna(), None)
+
+
+# ---- importación ----
+
+class ImportacionCandidatos:
+    """
+    Crea o actualiza candidatos por DNI, lote a lote, con un número fijo de consultas por
+    lote (in_bulk + bulk_create/bulk_update). Con `simular=True` solo calcula las diferencias.
+
+    Un DNI nuevo cuyo nombre normalizado y teléfono ya pertenecen a otro candidato (o a una
+    fila anterior del archivo) se omite como posible duplicado, igual que en el registro público.
+    """
+    CAMPOS_COMPARADOS = ('nombres_completos', 'telefono_whatsapp') + COLUMNAS_OPCIONALES
+
+    def __init__(self, sede, tipo_documento, simular=False, al_cambiar=None):
+        self.sede = sede
+        self.tipo_documento = tipo_documento
+        self.simular = simular
+        # Recibe cada línea del reporte de diferencias.
+        self.al_cambiar = al_cambiar or (lambda linea: None)
+        self.vistos = set()
+        self.nombres_telefonos = {}
+        self.leidas = self.creados = self.actualizados = self.sin_cambios = 0
+        self.invalidas = self.repetidas = self.posibles_duplicados = 0
+
+    def _informar(self, linea):
+        self.al_cambiar(linea)
+
+    def _filas_validas(self, df):
+        for fila in df.to_dict('records'):
+            if not fila['DNI'] or not fila['nombres_completos']:
+                self.invalidas += 1
+                self._informar(f"! DNI '{fila['DNI_original']}': DNI (8 dígitos) o nombre inválido")
+                continue
+            if fila['DNI'] in self.vistos:
+                self.repetidas += 1
+                continue
+            self.vistos.add(fila['DNI'])
+            yield fila
+
+    def _cambios(self, candidato, fila):
+        cambios = {}
+        for campo in self.CAMPOS_COMPARADOS:
+            if campo not in fila:
+                continue
+            nuevo = fila[campo]
+            if campo in COLUMNAS_OPCIONALES and nuevo in ('', None):
+                continue
+            if getattr(candidato, campo) != nuevo:
+                cambios[campo] = (getattr(candidato, campo), nuevo)
+        return cambios
+
+    def procesar(self, df):
+        df = preparar_lote(df)
+        self.leidas += len(df)
+        filas = list(self._filas_validas(df))
+        if not filas:
+            return
+
+        existentes = Candidato.objects.only(*self.CAMPOS_COMPARADOS).in_bulk([f['DNI'] for f in filas])
+        nuevas = [f for f in filas if f['DNI'] not in existentes]
+        for fila in nuevas:
+            fila['nombre_normalizado'] = normalizar_nombre(fila['nombres_completos'])
+        claves = {f['nombre_normalizado'] for f in nuevas if f['nombre_normalizado']}
+        if claves:
+            ocupados = Candidato.objects.filter(nombre_normalizado__in=claves).values_list(
+                'nombre_normalizado', 'telefono_whatsapp', 'DNI',
+            )
+            for clave, telefono, dni in ocupados:
+                self.nombres_telefonos.setdefault((clave, telefono), dni)
+
+        a_crear, a_actualizar, campos, reindexar = [], [], set(), []
+        for fila in nuevas:
+            otro = self.nombres_telefonos.get((fila['nombre_normalizado'], fila['telefono_whatsapp']))
+            if otro:
+                self.posibles_duplicados += 1
+                self._informar(f"? {fila['DNI']} {fila['nombres_completos']}: mismo nombre y teléfono que {otro}")
+                continue
+            self.nombres_telefonos[(fila['nombre_normalizado'], fila['telefono_whatsapp'])] = fila['DNI']
+            a_crear.append(Candidato(
+                DNI=fila['DNI'],
+                nombres_completos=fila['nombres_completos'],
+                nombre_normalizado=fila['nombre_normalizado'],
+                telefono_whatsapp=fila['telefono_whatsapp'],
+                email=fila.get('email') or None,
+                distrito=fila.get('distrito') or '',
+                edad=fila.get('edad'),
+                sede_registro=self.sede,
+                tipo_documento=self.tipo_documento,
+                estado_actual='REGISTRADO',
+            ))
+            reindexar.append((fila['DNI'], fila['nombres_completos'], fila['telefono_whatsapp']))
+            self._informar(f"+ {fila['DNI']} {fila['nombres_completos']} {fila['telefono_whatsapp']}")
+
+        for fila in filas:
+            candidato = existentes.get(fila['DNI'])
+            if candidato is None:
+                continue
+            cambios = self._cambios(candidato, fila)
+            if not cambios:
+                self.sin_cambios += 1
+                continue
+            for campo, (_, nuevo) in cambios.items():
+                setattr(candidato, campo, nuevo)
+            campos.update(cambios)
+            if 'nombres_completos' in cambios:
+                candidato.nombre_normalizado = normalizar_nombre(candidato.nombres_completos)
+                campos.add('nombre_normalizado')
+            if set(cambios) & set(Candidato.CAMPOS_INDEXADOS):
+                reindexar.append((candidato.DNI, candidato.nombres_completos, candidato.telefono_whatsapp))
+            a_actualizar.append(candidato)
+            detalle = ', '.join(f"{campo}: {anterior!r} -> {nuevo!r}" for campo, (anterior, nuevo) in cambios.items())
+            self._informar(f"~ {candidato.DNI} {detalle}")
+
+        self.creados += len(a_crear)
+        self.actualizados += len(a_actualizar)
+        if self.simular:
+            return
+
+        # bulk_create/bulk_update no pasan por Candidato.save(): el índice de búsqueda y el
+        # resumen de mensajería se actualizan aquí, una vez por lote.
+        with transaction.atomic():
+            Candidato.objects.bulk_create(a_crear, batch_size=1000)
+            if a_actualizar:
+                Candidato.objects.bulk_update(a_actualizar, sorted(campos), batch_size=1000)
+            if reindexar:
+                TokenBusquedaCandidato.indexar(reindexar)
+                ResumenMensajeriaCandidato.recalcular([dni for dni, _, _ in reindexar])
+
+    def resumen(self):
+        return {
+            'Filas leídas': self.leidas,
+            'Candidatos creados': self.creados,
+            'Candidatos actualizados': self.actualizados,
+            'Sin cambios': self.sin_cambios,
+            'DNI repetidos en el archivo': self.repetidas,
+            'Posibles duplicados omitidos': self.posibles_duplicados,
+            'Filas inválidas': self.invalidas,
+        }
@@ -0,0 +1,161 @@
+# utils/kiosko.py
+
+import threading
+import time as reloj
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from candidatos.models import Candidato, Proceso, ProcesoTransicion, Sede
+from .asistencia import horario_sede
+
+# Segundos entre refrescos incrementales del mapa DNI -> proceso activo.
+KIOSKO_REFRESCO_SEGUNDOS = 30
+
+ESTADOS_CON_ASISTENCIA = ['CONVOCADO', 'CONFIRMADO', 'TEORIA', 'PRACTICA']
+
+CAMPOS_ENTRADA = (
+    'DNI', 'nombres_completos', 'proceso_actual', 'proceso_actual_estado',
+    'proceso_actual__sede_proceso',
+)
+
+
+class MapaProcesosActivos:
+    """
+    Caché en memoria del proceso (por worker) de DNI -> proceso activo para el modo kiosko.
+
+    Se carga completo una vez por día y luego se refresca de forma incremental con las
+    filas nuevas de ProcesoTransicion (que registra toda creación o cambio de estado de un
+    proceso) y releyendo los horarios de las sedes. Un DNI que no esté en el mapa se busca
+    en la base de datos y se agrega solo si tiene un proceso con asistencia. Guardar o
+    borrar un Proceso o una Sede invalida su entrada en este worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._horarios = {}
+        self._dia = None
+        self._marca = None
+        self._ultimo_refresco = 0.0
+
+    def _entrada(self, fila):
+        dni, nombre, proceso_id, estado, sede_id = fila
+        if not proceso_id or estado not in ESTADOS_CON_ASISTENCIA:
+            return None
+        return {
+            'dni': dni,
+            'nombre': nombre,
+            'proceso_id': proceso_id,
+            'estado': estado,
+            'sede_id': sede_id,
+        }
+
+    def _cargar_horarios(self):
+        self._horarios = {sede.pk: horario_sede(sede) for sede in Sede.objects.all()}
+
+    def _guardar(self, dni, entrada):
+        if entrada is None:
+            self._entradas.pop(dni, None)
+        else:
+            self._entradas[dni] = entrada
+
+    def _cargar(self):
+        self._marca = timezone.now()
+        self._cargar_horarios()
+
+        filas = Candidato.objects.filter(
+            proceso_actual_estado__in=ESTADOS_CON_ASISTENCIA
+        ).values_list(*CAMPOS_ENTRADA)
+        self._entradas = {fila[0]: self._entrada(fila) for fila in filas.iterator()}
+        self._dia = timezone.localdate()
+
+    def _refrescar_incremental(self):
+        desde, self._marca = self._marca, timezone.now()
+        self._cargar_horarios()
+
+        dnis = set(
+            ProcesoTransicion.objects.filter(fecha__gte=desde)
+            .values_list('proceso__candidato_id', flat=True)
+        )
+        if not dnis:
+            return
+
+        filas = Candidato.objects.filter(DNI__in=dnis).values_list(*CAMPOS_ENTRADA)
+        for fila in filas:
+            self._guardar(fila[0], self._entrada(fila))
+
+    def refrescar(self, forzar=False):
+        with self._lock:
+            if forzar or self._dia != timezone.localdate():
+                self._cargar()
+            elif reloj.monotonic() - self._ultimo_refresco >= KIOSKO_REFRESCO_SEGUNDOS:
+                self._refrescar_incremental()
+            else:
+                return
+            self._ultimo_refresco = reloj.monotonic()
+
+    def buscar(self, dni):
+        """Devuelve la entrada del DNI o None si no tiene un proceso con asistencia."""
+        self.refrescar()
+
+        with self._lock:
+            entrada = self._entradas.get(dni)
+        if entrada is not None:
+            return entrada
+
+        fila = Candidato.objects.filter(DNI=dni).values_list(*CAMPOS_ENTRADA).first()
+        entrada = self._entrada(fila) if fila else None
+
+        with self._lock:
+            self._guardar(dni, entrada)
+        return entrada
+
+    def horario(self, sede_id):
+        with self._lock:
+            horario = self._horarios.get(sede_id)
+        if horario is not None:
+            return horario
+
+        horario = horario_sede(Sede.objects.filter(pk=sede_id).first())
+
+        with self._lock:
+            self._horarios[sede_id] = horario
+        return horario
+
+    def proceso(self, entrada):
+        """Instancia mínima de Proceso para registrar asistencia sin volver a leerlo."""
+        proceso = Proceso(
+            pk=entrada['proceso_id'],
+            candidato_id=entrada['dni'],
+            estado=entrada['estado'],
+            sede_proceso_id=entrada['sede_id'],
+        )
+        proceso._state.adding = False
+        return proceso
+
+    def invalidar(self, dni):
+        with self._lock:
+            self._entradas.pop(dni, None)
+
+    def invalidar_horario(self, sede_id):
+        with self._lock:
+            self._horarios.pop(sede_id, None)
+
+
+mapa_procesos_activos = MapaProcesosActivos()
+
+
+@receiver([post_save, post_delete], sender=Proceso)
+def _invalidar_proceso(sender, instance, **kwargs):
+    # Tras el commit, para que una búsqueda concurrente no vuelva a leer la fila anterior.
+    dni = instance.candidato_id
+    transaction.on_commit(lambda: mapa_procesos_activos.invalidar(dni))
+
+
+@receiver([post_save, post_delete], sender=Sede)
+def _invalidar_sede(sender, instance, **kwargs):
+    sede_id = instance.pk
+    transaction.on_commit(lambda: mapa_procesos_activos.invalidar_horario(sede_id))
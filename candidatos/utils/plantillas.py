@@ -0,0 +1,185 @@
+# utils/plantillas.py
+
+from datetime import date, datetime, time
+from functools import lru_cache
+from string import Formatter
+
+from django.utils import timezone
+
+from candidatos.models import Candidato
+
+# Variables que una plantilla puede usar -> lookup de Candidato.values(). Es una lista
+# cerrada: una ruta libre por las relaciones de Candidato llegaría a cualquier modelo
+# (p. ej. usuario_ultima_modificacion.password). proceso., sede. y empresa. son los del
+# proceso actual del candidato.
+VARIABLES_PLANTILLA = {
+    'DNI': 'DNI',
+    'nombres_completos': 'nombres_completos',
+    'edad': 'edad',
+    'telefono_whatsapp': 'telefono_whatsapp',
+    'email': 'email',
+    'distrito': 'distrito',
+    'fecha_registro': 'fecha_registro',
+    'estado_actual': 'estado_actual',
+    'sede_registro.nombre': 'sede_registro__nombre',
+    'sede_registro.ciudad': 'sede_registro__ciudad',
+
+    'proceso.estado': 'proceso_actual__estado',
+    'proceso.fecha_inicio': 'proceso_actual__fecha_inicio',
+    'proceso.fecha_confirmado': 'proceso_actual__fecha_confirmado',
+    'proceso.fecha_teorico': 'proceso_actual__fecha_teorico',
+    'proceso.fecha_practico': 'proceso_actual__fecha_practico',
+    'proceso.fecha_contratacion': 'proceso_actual__fecha_contratacion',
+    'proceso.supervisor.nombre': 'proceso_actual__supervisor__nombre',
+
+    'sede.nombre': 'proceso_actual__sede_proceso__nombre',
+    'sede.ciudad': 'proceso_actual__sede_proceso__ciudad',
+    'sede.hora_limite_entrada': 'proceso_actual__sede_proceso__hora_limite_entrada',
+    'sede.hora_limite_tardanza': 'proceso_actual__sede_proceso__hora_limite_tardanza',
+
+    'empresa.nombre': 'proceso_actual__empresa_proceso__nombre',
+}
+
+PLANTILLAS_EN_CACHE = 256
+
+
+class PlantillaInvalida(ValueError):
+    def __init__(self, variables, mensaje=None):
+        self.variables = variables
+        super().__init__(mensaje or f"Variables no reconocidas en la plantilla: {', '.join(variables)}")
+
+
+def _formatear(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).strftime('%d/%m/%Y %H:%M') if timezone.is_aware(valor) else valor.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    return str(valor)
+
+
+def resolver_variable(nombre):
+    """
+    Traduce una variable de VARIABLES_PLANTILLA ({proceso.fecha_inicio}) a su lookup de
+    Candidato.values() ('proceso_actual__fecha_inicio') y a su función de formato.
+
+    Returns:
+        tuple: (lookup, formato) o None si la variable no está permitida.
+    """
+    lookup = VARIABLES_PLANTILLA.get(nombre)
+    if lookup is None:
+        return None
+
+    modelo = Candidato
+    for parte in lookup.split('__'):
+        campo = modelo._meta.get_field(parte)
+        modelo = campo.related_model
+
+    if campo.choices:
+        etiquetas = {valor: str(etiqueta) for valor, etiqueta in campo.flatchoices}
+        return lookup, lambda valor: _formatear(etiquetas.get(valor, valor))
+    return lookup, _formatear
+
+
+class PlantillaCompilada:
+    """
+    Texto de una plantilla convertido a un formato posicional ("Hola {0}") más la lista de
+    lookups que lo alimentan, para renderizar cada destinatario con un solo str.format.
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.variables = []
+        lookups = []
+        formatos = []
+        partes = []
+
+        invalidas = []
+        indices = {}
+        try:
+            segmentos = list(Formatter().parse(texto))
+        except ValueError:
+            # Llave suelta ("Hola {nombres_completos} :}"): las llaves literales se escriben dobles.
+            raise PlantillaInvalida([], "La plantilla tiene una llave '{' o '}' sin cerrar. Para escribirlas como texto use '{{' o '}}'.")
+
+        for literal, campo, especificacion, conversion in segmentos:
+            partes.append(literal.replace('{', '{{').replace('}', '}}'))
+            if campo is None:
+                continue
+
+            if campo not in indices:
+                resuelta = resolver_variable(campo)
+                if resuelta is None:
+                    invalidas.append(campo)
+                    continue
+                indices[campo] = len(lookups)
+                self.variables.append(campo)
+                lookups.append(resuelta[0])
+                formatos.append(resuelta[1])
+
+            partes.append('{%d%s%s}' % (
+                indices[campo],
+                f'!{conversion}' if conversion else '',
+                f':{especificacion}' if especificacion else '',
+            ))
+
+        if invalidas:
+            raise PlantillaInvalida(invalidas)
+
+        self.lookups = tuple(lookups)
+        self._formatos = tuple(formatos)
+        self._formato = ''.join(partes)
+
+        # Los valores siempre llegan como texto (formatear): si el formato acepta un texto de
+        # prueba acepta cualquiera, así que un "{edad:d}" se rechaza aquí y no en el envío.
+        try:
+            self.componer(['x'] * len(self.lookups))
+        except (ValueError, TypeError, IndexError, KeyError) as e:
+            raise PlantillaInvalida(self.variables, f"Formato de variable no válido en la plantilla: {e}")
+
+    def formatear(self, valores):
+        """`valores`: tupla en el orden de `lookups` (de un values_list) -> textos formateados."""
+        return [f(v) for f, v in zip(self._formatos, valores)]
+
+    def componer(self, formateados):
+        return self._formato.format(*formateados)
+
+    def renderizar(self, valores):
+        return self.componer(self.formatear(valores))
+
+    def renderizar_variables(self, variables):
+        """Texto final a partir de {variable: valor ya formateado} (DetalleEnvio.variables)."""
+        return self.componer([variables.get(nombre, '') for nombre in self.variables])
+
+    def renderizar_candidatos(self, candidatos_qs, *campos_extra):
+        """
+        Recorre `candidatos_qs` con un solo values_list de `campos_extra` más las columnas
+        que usa la plantilla y produce (valores_extra, variables, texto) por candidato.
+        """
+        n = len(campos_extra)
+        for fila in candidatos_qs.values_list(*campos_extra, *self.lookups).iterator(chunk_size=2000):
+            formateados = self.formatear(fila[n:])
+            yield fila[:n], dict(zip(self.variables, formateados)), self.componer(formateados)
+
+
+@lru_cache(maxsize=PLANTILLAS_EN_CACHE)
+def compilar_texto(texto):
+    return PlantillaCompilada(texto)
+
+
+def validar_texto(texto):
+    """Devuelve la lista de variables del texto o lanza PlantillaInvalida."""
+    return PlantillaCompilada(texto).variables
+
+
+def plantilla_compilada(plantilla):
+    """
+    Compilación de `plantilla` desde la caché de compilar_texto, que se indexa por el texto:
+    una edición (que sube la versión) cambia el texto y compila de nuevo.
+    """
+    return compilar_texto(plantilla.contenido_texto)
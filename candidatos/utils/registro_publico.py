@@ -0,0 +1,81 @@
+# utils/registro_publico.py
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from candidatos.models import Candidato, DatosCualificacion, SolicitudRegistroPublico
+from .duplicados import detectar_duplicados
+
+
+class EnvioRepetido(Exception):
+    """La clave del formulario ya se procesó (doble clic o reintento del navegador)."""
+
+
+class PosibleDuplicado(Exception):
+    """DNI nuevo con el nombre normalizado y el teléfono de otro candidato."""
+
+
+def _bloquear_candidato(dni, datos_candidato):
+    """
+    Candidato del DNI bloqueado (SELECT ... FOR UPDATE) hasta el final de la transacción;
+    si no existe lo crea. Dos envíos simultáneos del mismo DNI quedan en fila: el INSERT del
+    segundo espera al primero, falla por clave primaria y sigue por la rama de actualización.
+    """
+    candidato = Candidato.objects.select_for_update().filter(pk=dni).first()
+    if candidato is not None:
+        return candidato, False
+
+    duplicado = (
+        Candidato.con_mismo_nombre(datos_candidato['nombres_completos'])
+        .filter(telefono_whatsapp=datos_candidato['telefono_whatsapp'])
+        .exclude(pk=dni)
+        .exists()
+    )
+    if duplicado:
+        raise PosibleDuplicado()
+
+    try:
+        with transaction.atomic():
+            return Candidato.objects.create(DNI=dni, **datos_candidato), True
+    except IntegrityError:
+        return Candidato.objects.select_for_update().get(pk=dni), False
+
+
+def registrar_postulacion(clave, dni, datos_candidato, datos_cualificacion):
+    """
+    Registra la postulación pública en una sola transacción con un número fijo de consultas:
+    crea al candidato o, si ya existía, renueva su fecha de postulación, y crea o reemplaza
+    sus DatosCualificacion. Reenviar el mismo formulario (`clave`) no repite nada.
+
+    Returns:
+        tuple: (candidato, creado)
+
+    Raises:
+        EnvioRepetido: la clave ya se había registrado.
+        PosibleDuplicado: DNI nuevo con nombre y teléfono de otro candidato.
+    """
+    if clave and SolicitudRegistroPublico.objects.filter(clave=clave).exists():
+        raise EnvioRepetido()
+
+    with transaction.atomic():
+        candidato, creado = _bloquear_candidato(dni, datos_candidato)
+
+        if clave:
+            try:
+                with transaction.atomic():
+                    SolicitudRegistroPublico.objects.create(clave=clave, candidato=candidato)
+            except IntegrityError:
+                # El mismo envío entró en paralelo y ya confirmó: se descarta este intento.
+                raise EnvioRepetido()
+
+        if not creado:
+            candidato.fecha_registro = timezone.localdate()
+            candidato.save(update_fields=['fecha_registro'])
+
+        DatosCualificacion.objects.update_or_create(candidato=candidato, defaults=datos_cualificacion)
+
+        if creado:
+            # Fuera de la transacción del registro: solo deja sugerencias para revisión.
+            transaction.on_commit(lambda: detectar_duplicados([candidato.pk]))
+
+    return candidato, creado
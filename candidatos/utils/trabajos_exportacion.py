@@ -0,0 +1,113 @@
+# utils/trabajos_exportacion.py
+
+import hashlib
+import json
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from candidatos.models import TrabajoExportacion
+from .exportacion import (
+    COLUMNAS_CANDIDATO, FORMATOS_EXPORT, FORMATO_EXPORT_POR_DEFECTO,
+    candidatos_para_exportar, escribir_exportacion, filas_candidatos,
+)
+
+logger = logging.getLogger(__name__)
+
+# Exportaciones simultáneas por proceso de Django.
+EXPORT_WORKERS = 2
+# Filas entre cada actualización de `filas_procesadas`.
+EXPORT_PASO_PROGRESO = 1000
+# Un trabajo sin avance durante este tiempo se considera abandonado (reinicio del worker).
+EXPORT_TRABAJO_VENCIDO = timedelta(minutes=15)
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='exportacion')
+
+
+def clave_exportacion(parametros, dia=None):
+    """Hash de los filtros normalizados y del día, usado como nombre del archivo en caché."""
+    base = json.dumps(
+        {'parametros': parametros, 'dia': (dia or timezone.localdate()).isoformat()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def encolar_exportacion(parametros, usuario=None):
+    """
+    Devuelve el trabajo de exportación de `usuario` para `parametros`: uno completado hoy
+    cuyo archivo sigue en MEDIA_ROOT, uno en curso con los mismos filtros o uno nuevo
+    enviado al pool al confirmarse la transacción. Solo se reutilizan trabajos del mismo
+    usuario, porque el estado y la descarga están restringidos a su creador.
+    """
+    clave = clave_exportacion(parametros)
+    vigentes = TrabajoExportacion.objects.filter(clave=clave, usuario=usuario).order_by('-fecha_creacion')
+
+    for trabajo in vigentes.filter(estado='COMPLETADO'):
+        if trabajo.archivo and default_storage.exists(trabajo.archivo.name):
+            return trabajo
+
+    en_curso = vigentes.filter(
+        estado__in=['PENDIENTE', 'EN_PROCESO'],
+        fecha_actualizacion__gte=timezone.now() - EXPORT_TRABAJO_VENCIDO,
+    ).first()
+    if en_curso:
+        return en_curso
+
+    trabajo = TrabajoExportacion.objects.create(clave=clave, parametros=parametros, usuario=usuario)
+    transaction.on_commit(lambda: _executor.submit(_ejecutar, trabajo.pk))
+    return trabajo
+
+
+def _con_progreso(filas, trabajo_id):
+    procesadas = 0
+    for fila in filas:
+        yield fila
+        procesadas += 1
+        if procesadas % EXPORT_PASO_PROGRESO == 0:
+            TrabajoExportacion.objects.filter(pk=trabajo_id).update(
+                filas_procesadas=procesadas, fecha_actualizacion=timezone.now()
+            )
+
+
+def _ejecutar(trabajo_id):
+    close_old_connections()
+    try:
+        trabajo = TrabajoExportacion.objects.get(pk=trabajo_id)
+        candidatos_qs = candidatos_para_exportar(trabajo.parametros)
+
+        trabajo.estado = 'EN_PROCESO'
+        trabajo.total_filas = candidatos_qs.count()
+        trabajo.save(update_fields=['estado', 'total_filas', 'fecha_actualizacion'])
+
+        formato = trabajo.parametros.get('formato', FORMATO_EXPORT_POR_DEFECTO)
+        extension = FORMATOS_EXPORT[formato][1]
+
+        with tempfile.TemporaryFile() as temporal:
+            escribir_exportacion(
+                formato, _con_progreso(filas_candidatos(candidatos_qs), trabajo_id),
+                COLUMNAS_CANDIDATO, "Candidatos_Reporte", temporal,
+            )
+            temporal.seek(0)
+
+            nombre = f'exportaciones/{trabajo.clave}.{extension}'
+            if default_storage.exists(nombre):
+                default_storage.delete(nombre)
+            trabajo.archivo.save(f'{trabajo.clave}.{extension}', File(temporal), save=False)
+
+        trabajo.estado = 'COMPLETADO'
+        trabajo.filas_procesadas = trabajo.total_filas
+        trabajo.save(update_fields=['estado', 'filas_procesadas', 'archivo', 'fecha_actualizacion'])
+    except Exception as e:
+        logger.exception("Error en la exportación %s", trabajo_id)
+        TrabajoExportacion.objects.filter(pk=trabajo_id).update(
+            estado='ERROR', error=str(e), fecha_actualizacion=timezone.now()
+        )
+    finally:
+        close_old_connections()
@@ -0,0 +1,151 @@
+# utils/transiciones.py
+
+from datetime import date
+
+from django.db import transaction
+
+from candidatos.models import Candidato, Proceso, ProcesoTransicion
+
+# Estado maestro del candidato -> estado del proceso asociado.
+PROCESO_ESTADO_MAP = {
+    'CONVOCADO': 'CONVOCADO',
+    'CONFIRMADO': 'CONFIRMADO',
+    'CAPACITACION_TEORICA': 'TEORIA',
+    'CAPACITACION_PRACTICA': 'PRACTICA',
+    'CONTRATADO': 'CONTRATADO',
+    'NO_APTO': 'NO_APTO',
+}
+
+# Estados a los que siempre se puede mover, aunque retrocedan en el orden del Kanban.
+ESTADOS_SIEMPRE_PERMITIDOS = ['CONTRATADO', 'NO_APTO', 'DESISTE']
+
+ESTADO_ORDEN = {estado[0]: i for i, estado in enumerate(Candidato.ESTADOS)}
+
+# Resultados posibles por DNI.
+RESULTADO_ACTUALIZADO = 'ACTUALIZADO'
+RESULTADO_NO_ENCONTRADO = 'NO_ENCONTRADO'
+RESULTADO_NO_PERMITIDO = 'NO_PERMITIDO'
+RESULTADO_SIN_PROCESO = 'SIN_PROCESO'
+RESULTADO_DUPLICADO = 'PROCESO_DUPLICADO'
+
+CAMPOS_PROCESO_BULK = ['estado'] + list(Proceso.FECHAS_POR_ESTADO.values())
+CAMPOS_CANDIDATO_BULK = ['estado_actual', 'motivo_descarte', 'usuario_ultima_modificacion']
+
+
+def transicion_permitida(estado_actual, nuevo_estado):
+    return (
+        ESTADO_ORDEN.get(nuevo_estado, -1) > ESTADO_ORDEN.get(estado_actual, -1)
+        or nuevo_estado in ESTADOS_SIEMPRE_PERMITIDOS
+    )
+
+
+def aplicar_transicion_masiva(dni_list, nuevo_estado, usuario, fecha_inicio=None,
+                              motivo_descarte=None, supervisor=None, empresa=None):
+    """
+    Mueve un lote de candidatos (y sus procesos actuales) a `nuevo_estado` con un número
+    constante de consultas: una lectura, un bulk_create, dos bulk_update, la
+    sincronización de Candidato.proceso_actual y el registro en ProcesoTransicion.
+
+    Las transiciones se calculan en memoria con las mismas reglas que
+    UpdateStatusMultipleView aplicaba candidato por candidato, incluido el sellado de
+    fechas de fase de Proceso.save.
+
+    Returns:
+        dict: DNI -> código de resultado (RESULTADO_*).
+    """
+    resultados = {dni: RESULTADO_NO_ENCONTRADO for dni in dni_list}
+    proceso_estado = PROCESO_ESTADO_MAP.get(nuevo_estado)
+    es_convocatoria = nuevo_estado == 'CONVOCADO'
+    hoy = date.today()
+
+    procesos_a_crear = []
+    procesos_a_actualizar = []
+    candidatos_a_actualizar = []
+    transiciones = []
+
+    with transaction.atomic():
+        candidatos = list(
+            Candidato.objects.filter(DNI__in=dni_list).select_related('proceso_actual')
+        )
+
+        existentes = set()
+        if es_convocatoria and fecha_inicio:
+            existentes = set(
+                Proceso.objects.filter(
+                    candidato__in=[c.pk for c in candidatos],
+                    fecha_inicio=fecha_inicio,
+                    empresa_proceso=empresa,
+                ).values_list('candidato_id', flat=True)
+            )
+
+        for candidato in candidatos:
+            if not transicion_permitida(candidato.estado_actual, nuevo_estado):
+                resultados[candidato.DNI] = RESULTADO_NO_PERMITIDO
+                continue
+
+            proceso_activo = candidato.proceso_actual
+
+            if candidato.estado_actual == 'REGISTRADO' and es_convocatoria:
+                if candidato.pk in existentes:
+                    resultados[candidato.DNI] = RESULTADO_DUPLICADO
+                    continue
+
+                procesos_a_crear.append(Proceso(
+                    candidato=candidato,
+                    fecha_inicio=fecha_inicio,
+                    supervisor=supervisor,
+                    empresa_proceso=empresa,
+                    sede_proceso_id=candidato.sede_registro_id,
+                    estado='CONVOCADO',
+                ))
+
+            elif proceso_estado:
+                if not proceso_activo:
+                    resultados[candidato.DNI] = RESULTADO_SIN_PROCESO
+                    continue
+
+                estado_anterior = proceso_activo.estado
+                if estado_anterior != proceso_estado:
+                    proceso_activo.estado = proceso_estado
+                    proceso_activo.sellar_fecha_fase(estado_anterior, hoy)
+                    procesos_a_actualizar.append(proceso_activo)
+                    transiciones.append((proceso_activo, estado_anterior))
+
+            elif nuevo_estado == 'DESISTE':
+                if motivo_descarte:
+                    candidato.motivo_descarte = motivo_descarte
+
+            else:
+                resultados[candidato.DNI] = RESULTADO_NO_PERMITIDO
+                continue
+
+            candidato.estado_actual = nuevo_estado
+            candidato.usuario_ultima_modificacion = usuario
+            candidatos_a_actualizar.append(candidato)
+            resultados[candidato.DNI] = RESULTADO_ACTUALIZADO
+
+        if procesos_a_crear:
+            Proceso.objects.bulk_create(procesos_a_crear)
+            if any(p.pk is None for p in procesos_a_crear):
+                # Backends sin RETURNING en inserciones masivas (MySQL): recuperar los ids.
+                ids = dict(
+                    Proceso.objects.filter(
+                        candidato__in=[p.candidato_id for p in procesos_a_crear],
+                        fecha_inicio=fecha_inicio,
+                        empresa_proceso=empresa,
+                    ).values_list('candidato_id', 'pk')
+                )
+                for proceso in procesos_a_crear:
+                    proceso.pk = ids.get(proceso.candidato_id)
+            transiciones.extend((proceso, None) for proceso in procesos_a_crear)
+        if procesos_a_actualizar:
+            Proceso.objects.bulk_update(procesos_a_actualizar, CAMPOS_PROCESO_BULK)
+        if candidatos_a_actualizar:
+            Candidato.objects.bulk_update(candidatos_a_actualizar, CAMPOS_CANDIDATO_BULK)
+        if procesos_a_crear or procesos_a_actualizar:
+            Candidato.sincronizar_proceso_actual(
+                [p.candidato_id for p in procesos_a_crear + procesos_a_actualizar]
+            )
+        ProcesoTransicion.registrar(transiciones, usuario=usuario)
+
+    return resultados
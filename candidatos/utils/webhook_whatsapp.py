@@ -0,0 +1,201 @@
+# utils/webhook_whatsapp.py
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from candidatos.models import DetalleEnvio, EventoWebhookWhatsApp, ResumenMensajeriaCandidato, TareaEnvioMasivo
+
+logger = logging.getLogger(__name__)
+
+# Eventos tomados por cada ronda de procesamiento.
+WEBHOOK_LOTE = 500
+# Un lote reclamado hace más de esto sin terminar (worker caído) vuelve a la cola.
+WEBHOOK_RECLAMO_VENCIDO = timedelta(minutes=10)
+# Un estado cuyo mensaje aún no tiene DetalleEnvio (el envío guarda por lotes) se reintenta
+# mientras el evento sea más reciente que esto.
+WEBHOOK_REINTENTO_HUERFANOS = timedelta(minutes=30)
+
+# Respuestas de texto que dan de baja al candidato (se comparan en mayúsculas y sin espacios).
+PALABRAS_BAJA = {'BAJA', 'STOP', 'SALIR', 'NO ENVIAR'}
+
+ESTADO_POR_STATUS_META = {
+    'sent': 'ENVIADO',
+    'delivered': 'ENTREGADO',
+    'read': 'LEIDO',
+    'failed': 'FALLIDO',
+}
+# Los estados solo avanzan: aplicar el máximo hace que los duplicados y el desorden de
+# Meta den el mismo resultado. FALLIDO es terminal.
+RANGO_ESTADO = {'ENVIADO': 0, 'ENTREGADO': 1, 'LEIDO': 2, 'FALLIDO': 3}
+
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='webhook-whatsapp')
+_programado = threading.Event()
+
+
+def encolar_evento(payload):
+    """Guarda el payload crudo y programa su procesamiento al confirmar la transacción."""
+    EventoWebhookWhatsApp.objects.create(payload=payload)
+    transaction.on_commit(programar_procesamiento)
+
+
+def programar_procesamiento():
+    # Una sola ronda en cola a la vez; los eventos que lleguen mientras tanto entran en ella.
+    if not _programado.is_set():
+        _programado.set()
+        _pool.submit(_procesar_en_segundo_plano)
+
+
+def _procesar_en_segundo_plano():
+    _programado.clear()
+    close_old_connections()
+    try:
+        procesar_eventos_pendientes()
+    except Exception:
+        logger.exception("Error procesando eventos del webhook de WhatsApp")
+    finally:
+        close_old_connections()
+
+
+def estados_del_payload(payload):
+    """Extrae [(id_mensaje_meta, estado_meta)] de los `statuses` de un payload de Meta."""
+    estados = []
+    for entrada in payload.get('entry') or []:
+        for cambio in entrada.get('changes') or []:
+            for status in (cambio.get('value') or {}).get('statuses') or []:
+                estado = ESTADO_POR_STATUS_META.get(status.get('status'))
+                if status.get('id') and estado:
+                    estados.append((status['id'], estado))
+    return estados
+
+
+def bajas_del_payload(payload):
+    """Teléfonos ('from') de los mensajes entrantes cuyo texto es una palabra de PALABRAS_BAJA."""
+    telefonos = []
+    for entrada in payload.get('entry') or []:
+        for cambio in entrada.get('changes') or []:
+            for mensaje in (cambio.get('value') or {}).get('messages') or []:
+                texto = ((mensaje.get('text') or {}).get('body') or '').strip().upper()
+                if mensaje.get('from') and texto in PALABRAS_BAJA:
+                    telefonos.append(mensaje['from'])
+    return telefonos
+
+
+def _leer_evento(pk, payload):
+    """
+    (estados, bajas) del evento. Un payload con otra forma (lista, null, `entry` que no son
+    objetos...) se registra en el log y se trata como vacío: queda procesado sin detener el
+    resto del lote.
+    """
+    try:
+        return estados_del_payload(payload), bajas_del_payload(payload)
+    except (AttributeError, TypeError, KeyError):
+        logger.warning("Evento de webhook %s con payload inválido; se marca como procesado", pk)
+        return [], []
+
+
+def _reclamar_lote():
+    vencido = timezone.now() - WEBHOOK_RECLAMO_VENCIDO
+    pendientes = EventoWebhookWhatsApp.objects.filter(procesado__isnull=True).filter(
+        Q(lote__isnull=True) | Q(reclamado__lt=vencido)
+    )
+    ids = list(pendientes.order_by('pk').values_list('pk', flat=True)[:WEBHOOK_LOTE])
+    if not ids:
+        return None, []
+
+    lote = uuid.uuid4().hex
+    pendientes.filter(pk__in=ids).update(lote=lote, reclamado=timezone.now())
+    return lote, list(EventoWebhookWhatsApp.objects.filter(lote=lote).values_list('pk', 'payload', 'recibido'))
+
+
+def aplicar_estados(estados):
+    """
+    Aplica [(id_mensaje_meta, estado_meta)] a DetalleEnvio con un bulk_update y suma a
+    TareaEnvioMasivo los mensajes que pasaron a FALLIDO con un UPDATE por tarea (F()); las
+    lecturas y fallos también se reflejan en ResumenMensajeriaCandidato.
+
+    Returns:
+        set: ids de mensaje que no tienen DetalleEnvio.
+    """
+    objetivo = {}
+    for id_meta, estado in estados:
+        if RANGO_ESTADO[estado] > RANGO_ESTADO.get(objetivo.get(id_meta), -1):
+            objetivo[id_meta] = estado
+    if not objetivo:
+        return set()
+
+    with transaction.atomic():
+        detalles = list(
+            DetalleEnvio.objects.select_for_update()
+            .filter(id_mensaje_meta__in=objetivo)
+            .only('pk', 'id_mensaje_meta', 'estado_meta', 'tarea_envio_id', 'contacto_id')
+        )
+
+        cambiados = []
+        tareas_cambiadas = set()
+        nuevos_fallidos = {}
+        leidos = []
+        fallidos_por_candidato = {}
+        for detalle in detalles:
+            nuevo = objetivo[detalle.id_mensaje_meta]
+            if RANGO_ESTADO[nuevo] <= RANGO_ESTADO.get(detalle.estado_meta, -1):
+                continue
+            if nuevo == 'FALLIDO':
+                nuevos_fallidos[detalle.tarea_envio_id] = nuevos_fallidos.get(detalle.tarea_envio_id, 0) + 1
+                if detalle.contacto_id:
+                    fallidos_por_candidato[detalle.contacto_id] = fallidos_por_candidato.get(detalle.contacto_id, 0) + 1
+            elif nuevo == 'LEIDO' and detalle.contacto_id:
+                leidos.append(detalle.contacto_id)
+            detalle.estado_meta = nuevo
+            cambiados.append(detalle)
+            tareas_cambiadas.add(detalle.tarea_envio_id)
+
+        DetalleEnvio.objects.bulk_update(cambiados, ['estado_meta'], batch_size=500)
+
+        # total_entregados cuenta los mensajes aceptados por Meta; solo un fallo posterior
+        # mueve uno de entregados a fallidos.
+        for tarea_id, cantidad in nuevos_fallidos.items():
+            TareaEnvioMasivo.objects.filter(pk=tarea_id).update(
+                total_entregados=F('total_entregados') - cantidad,
+                total_fallidos=F('total_fallidos') + cantidad,
+            )
+        # Las demás tareas con mensajes que cambiaron de estado solo renuevan fecha_actualizacion.
+        TareaEnvioMasivo.objects.filter(pk__in=tareas_cambiadas - set(nuevos_fallidos)).update()
+        ResumenMensajeriaCandidato.registrar_estados(leidos, fallidos_por_candidato)
+
+    return set(objetivo) - {detalle.id_mensaje_meta for detalle in detalles}
+
+
+def procesar_eventos_pendientes():
+    """Procesa la cola de eventos en lotes de WEBHOOK_LOTE. Devuelve los eventos procesados."""
+    total = 0
+    while True:
+        lote, eventos = _reclamar_lote()
+        if not eventos:
+            return total
+
+        leidos = {pk: _leer_evento(pk, payload) for pk, payload, _ in eventos}
+        estados_por_evento = {pk: estados for pk, (estados, _) in leidos.items()}
+        huerfanos = aplicar_estados([e for estados in estados_por_evento.values() for e in estados])
+        ResumenMensajeriaCandidato.registrar_bajas([t for _, bajas in leidos.values() for t in bajas])
+
+        # Los eventos recientes con mensajes aún sin DetalleEnvio vuelven a la cola (aplicar
+        # de nuevo sus otros estados no cambia nada); el resto queda procesado.
+        limite_reintento = timezone.now() - WEBHOOK_REINTENTO_HUERFANOS
+        reintentar = [
+            pk for pk, _, recibido in eventos
+            if recibido > limite_reintento and any(id_meta in huerfanos for id_meta, _ in estados_por_evento[pk])
+        ]
+
+        EventoWebhookWhatsApp.objects.filter(lote=lote, pk__in=reintentar).update(lote=None, reclamado=None)
+        EventoWebhookWhatsApp.objects.filter(lote=lote).exclude(pk__in=reintentar).update(procesado=timezone.now())
+        total += len(eventos) - len(reintentar)
+
+        if len(eventos) == len(reintentar) or len(eventos) < WEBHOOK_LOTE:
+            return total
@@ -1,54 +1,230 @@
 # utils/whatsapp_api.py
 
+import logging
+import threading
+import time as reloj
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# (conexión, lectura) en segundos.
+WHATSAPP_TIMEOUT = (5, 20)
+WHATSAPP_REINTENTOS = 3
+WHATSAPP_BACKOFF_BASE = 0.5
+WHATSAPP_BACKOFF_MAXIMO = 30
+
+# Respuestas que vale la pena reintentar: límite de tasa y errores del servidor.
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ClienteWhatsApp:
+    """
+    Cliente de la Meta Cloud API con una sesión keep-alive compartida por todos los hilos
+    (un pool de `pool` conexiones), timeouts explícitos y reintentos con backoff exponencial
+    ante 429/5xx o errores de red, respetando Retry-After si Meta lo envía.
+
+    Todos los envíos devuelven un dict con 'success' (bool), 'status' (código HTTP o None)
+    y 'data' (respuesta de Meta) o 'message' (detalle del error).
+    """
+
+    def __init__(self, api_url=None, phone_id=None, token=None, pool=None,
+                 timeout=WHATSAPP_TIMEOUT, reintentos=WHATSAPP_REINTENTOS, backoff=WHATSAPP_BACKOFF_BASE):
+        api_url = api_url or settings.WHATSAPP_API_URL
+        self.url = f"{api_url}{phone_id or settings.WHATSAPP_PHONE_ID}/messages"
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.pool = pool or settings.WHATSAPP_ENVIO_WORKERS
+
+        self.sesion = requests.Session()
+        self.sesion.headers.update({
+            "Authorization": f"Bearer {token or settings.WHATSAPP_ACCESS_TOKEN}",
+            "Content-Type": "application/json",
+        })
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.mount('http://', adaptador)
+
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self.reiniciar_metricas()
+
+    # ---- métricas ----
+
+    def reiniciar_metricas(self):
+        with self._lock:
+            self._contadores = {
+                'solicitudes': 0,
+                'exitosos': 0,
+                'fallidos': 0,
+                'reintentos': 0,
+                'errores_por_codigo': {},
+                'latencia_total': 0.0,
+                'latencia_maxima': 0.0,
+            }
+
+    def _medir(self, latencia, status, reintento):
+        with self._lock:
+            c = self._contadores
+            c['solicitudes'] += 1
+            c['latencia_total'] += latencia
+            c['latencia_maxima'] = max(c['latencia_maxima'], latencia)
+            if reintento:
+                c['reintentos'] += 1
+            if status is None or status >= 400:
+                codigo = str(status or 'red')
+                c['errores_por_codigo'][codigo] = c['errores_por_codigo'].get(codigo, 0) + 1
+
+    def _contar_resultado(self, exito):
+        with self._lock:
+            self._contadores['exitosos' if exito else 'fallidos'] += 1
+
+    def metricas(self):
+        """Copia de los contadores, con la latencia promedio y máxima en milisegundos."""
+        with self._lock:
+            c = dict(self._contadores, errores_por_codigo=dict(self._contadores['errores_por_codigo']))
+        solicitudes = c.pop('solicitudes')
+        latencia_total = c.pop('latencia_total')
+        c['solicitudes'] = solicitudes
+        c['latencia_promedio_ms'] = round(latencia_total * 1000 / solicitudes, 1) if solicitudes else 0.0
+        c['latencia_maxima_ms'] = round(c.pop('latencia_maxima') * 1000, 1)
+        return c
+
+    # ---- envío ----
+
+    def _espera(self, intento, respuesta):
+        retry_after = respuesta.headers.get('Retry-After') if respuesta is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), WHATSAPP_BACKOFF_MAXIMO)
+            except ValueError:
+                try:
+                    segundos = (parsedate_to_datetime(retry_after) - timezone.now()).total_seconds()
+                    return min(max(segundos, 0), WHATSAPP_BACKOFF_MAXIMO)
+                except (TypeError, ValueError):
+                    pass
+        return min(self.backoff * (2 ** intento), WHATSAPP_BACKOFF_MAXIMO)
+
+    def _post(self, payload):
+        destinatario = payload.get('to')
+
+        for intento in range(self.reintentos + 1):
+            respuesta = None
+            inicio = reloj.monotonic()
+            try:
+                respuesta = self.sesion.post(self.url, json=payload, timeout=self.timeout)
+                error = None
+            except requests.RequestException as e:
+                error = e
+            self._medir(reloj.monotonic() - inicio, respuesta.status_code if respuesta is not None else None, intento > 0)
+
+            if respuesta is not None and respuesta.ok:
+                try:
+                    datos = respuesta.json()
+                except ValueError:
+                    # Meta aceptó la solicitud: no se reintenta para no duplicar el mensaje.
+                    self._contar_resultado(False)
+                    logger.error("Respuesta no JSON de la API de WhatsApp (%s) para %s: %s", respuesta.status_code, destinatario, respuesta.text)
+                    return {'success': False, 'status': respuesta.status_code, 'message': f"Respuesta inválida de la API: {respuesta.text}"}
+                self._contar_resultado(True)
+                return {'success': True, 'status': respuesta.status_code, 'data': datos}
+
+            # Sin respuesta, solo los errores de red o de timeout pueden resolverse reintentando
+            # (no así una URL inválida o demasiadas redirecciones).
+            if respuesta is None:
+                reintentable = isinstance(error, (requests.ConnectionError, requests.Timeout))
+            else:
+                reintentable = respuesta.status_code in CODIGOS_REINTENTABLES
+            if not reintentable or intento == self.reintentos:
+                break
+
+            espera = self._espera(intento, respuesta)
+            logger.warning(
+                "WhatsApp %s a %s, reintento %s en %.1fs",
+                respuesta.status_code if respuesta is not None else error, destinatario, intento + 1, espera,
+            )
+            reloj.sleep(espera)
+
+        self._contar_resultado(False)
+        if respuesta is not None:
+            logger.error("Error HTTP de la API de WhatsApp (%s) para %s: %s", respuesta.status_code, destinatario, respuesta.text)
+            return {'success': False, 'status': respuesta.status_code, 'message': f"API Error: {respuesta.text}"}
+
+        logger.error("Error de conexión con la API de WhatsApp para %s: %s", destinatario, error)
+        return {'success': False, 'status': None, 'message': f"Error de conexión: {error}"}
+
+    def enviar_texto(self, telefono, mensaje):
+        return self._post({
+            "messaging_product": "whatsapp",
+            "to": telefono,
+            "type": "text",
+            "text": {"body": mensaje},
+        })
+
+    def enviar_plantilla(self, telefono, nombre, idioma='es', parametros=None, componentes=None):
+        """
+        Envía una plantilla aprobada en Meta. `parametros` (lista de textos) arma el
+        componente 'body'; `componentes` permite pasar la estructura completa de Meta.
+        """
+        plantilla = {"name": nombre, "language": {"code": idioma}}
+        if componentes is None and parametros:
+            componentes = [{
+                "type": "body",
+                "parameters": [{"type": "text", "text": str(valor)} for valor in parametros],
+            }]
+        if componentes:
+            plantilla["components"] = componentes
+
+        return self._post({
+            "messaging_product": "whatsapp",
+            "to": telefono,
+            "type": "template",
+            "template": plantilla,
+        })
+
+    def enviar_lote(self, mensajes, hilos=None):
+        """
+        Envía en paralelo (sobre la misma sesión) una lista de (telefono, mensaje) o de
+        dicts con los argumentos de enviar_plantilla. Devuelve los resultados en el mismo orden.
+        """
+        def enviar(mensaje):
+            if isinstance(mensaje, dict):
+                return self.enviar_plantilla(**mensaje)
+            return self.enviar_texto(*mensaje)
+
+        with ThreadPoolExecutor(max_workers=hilos or self.pool, thread_name_prefix='whatsapp-lote') as pool:
+            return list(pool.map(enviar, mensajes))
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def cliente_whatsapp():
+    """Cliente compartido del proceso (una sola sesión y pool de conexiones)."""
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = ClienteWhatsApp()
+    return _cliente
+
 
 def enviar_mensaje_whatsapp(destinatario_telefono, mensaje):
     """
     Función para enviar un mensaje de texto simple usando la Meta Cloud API.
-    
+
     Args:
         destinatario_telefono (str): Número con código de país (ej. 51999888777).
         mensaje (str): Contenido del mensaje de texto.
-    
+
     Returns:
         dict: Diccionario con 'success' (bool) y el detalle de la respuesta/error.
     """
-    
-    url = f"{settings.WHATSAPP_API_URL}{settings.WHATSAPP_PHONE_ID}/messages"
-    
-    headers = {
-        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "messaging_product": "whatsapp",
-        "to": destinatario_telefono,
-        "type": "text",
-        "text": {
-            "body": mensaje
-        }
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status() 
-        
-        return {
-            'success': True, 
-            'data': response.json()
-        }
-    
-    except requests.exceptions.HTTPError as err:
-        print(f"Error HTTP de la API de WhatsApp: {err}")
-        return {
-            'success': False, 
-            'message': f"API Error: {response.text}"
-        }
-    except Exception as e:
-        print(f"Error general al enviar mensaje: {e}")
-        return {
-            'success': False, 
-            'message': f"Error de conexión: {e}"
-        }
\ No newline at end of file
+    return cliente_whatsapp().enviar_texto(destinatario_telefono, mensaje)
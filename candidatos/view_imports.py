@@ -1,13 +1,39 @@
 import io
 import json
+import uuid
 from datetime import date, datetime, timedelta, time
 from django.conf import settings
 from django.utils.timezone import make_aware, get_current_timezone
 import locale
 from django.shortcuts import redirect
-from random import choice, randint
 from django.core.exceptions import ObjectDoesNotExist
 from .utils.whatsapp_api import enviar_mensaje_whatsapp
+from .utils.envios import encolar_envio_masivo
+from .utils.webhook_whatsapp import encolar_evento
+from .utils.plantillas import validar_texto, PlantillaInvalida
+from .utils.historial_envios import (
+    pagina_historial, pagina_detalles, ParametroInvalido, ESTADOS_TERMINADOS,
+    validadores, respuesta_condicional, con_validadores
+)
+from .utils.busqueda import buscar_candidatos, filtrar_por_busqueda
+from .utils.duplicados import detectar_duplicados
+from .utils.registro_publico import registrar_postulacion, EnvioRepetido, PosibleDuplicado
+from .utils.audiencias import (
+    PROCESO_ESTADO_MAP, FILTROS_AUDIENCIA, DIAS_SIN_LECTURA, fechas_disponibles, contactos_audiencia
+)
+from .utils.transiciones import aplicar_transicion_masiva, RESULTADO_ACTUALIZADO
+from .utils.asistencia import (
+    registrar_asistencia, AsistenciaRechazada, RECHAZO_FALTA_REGISTRADA, RECHAZO_CICLO_COMPLETO,
+    RECHAZO_CONCURRENTE, RECHAZO_REPETIDO
+)
+from .utils.kiosko import mapa_procesos_activos
+from .utils.exportacion import (
+    respuesta_exportacion, fila_candidato, COLUMNAS_CANDIDATO, EXPORT_CHUNK,
+    FORMATOS_EXPORT, FORMATO_EXPORT_POR_DEFECTO, formato_export, formatos_disponibles,
+    parametros_export_candidatos, candidatos_para_exportar, filas_candidatos
+)
+from .utils.trabajos_exportacion import encolar_exportacion
+from django.utils.dateparse import parse_datetime
 
 import pandas as pd
 import re
@@ -30,9 +56,10 @@ from django.db import IntegrityError, DatabaseError, OperationalError
 from django.db import models
 from django.db import transaction
 from django.db.models.functions import Cast
-from django.db.models import Q, Count, Max, Prefetch, OuterRef, Subquery, When, Case, Exists, DateField, F, FloatField, ExpressionWrapper, IntegerField
+from django.db.models import Q, Count, Sum, Max, Prefetch, OuterRef, Subquery, When, Case, Exists, DateField, F, FloatField, ExpressionWrapper, IntegerField
+from django.db.models.functions import Coalesce
 
-from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, HttpResponseBadRequest, HttpRequest
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, HttpResponseBadRequest, HttpRequest, FileResponse, Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_http_methods
@@ -44,5 +71,6 @@ import platform
 from .models import (
     Candidato, Proceso, Empresa, Sede, Supervisor, 
     RegistroAsistencia, DatosCualificacion, ComentarioProceso, 
-    RegistroTest, MOTIVOS_DESCARTE, DocumentoCandidato, TipoDocumento, TareaEnvioMasivo, MensajePlantilla, DetalleEnvio
+    RegistroTest, MOTIVOS_DESCARTE, DocumentoCandidato, TipoDocumento, TareaEnvioMasivo, MensajePlantilla, DetalleEnvio,
+    ResumenAsistenciaDiaria, TrabajoExportacion, CupoEnvioWhatsApp
 )
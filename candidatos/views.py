@@ -62,15 +62,19 @@ class RegistroCandidatoView(LoginRequiredMixin, View):
             )
 
             if created:
+                detectar_duplicados([candidato.pk])
                 messages.success(request, f'Candidato {candidato.nombres_completos} registrado con éxito en la sede **{sede.nombre}**.')
             else:
-                Candidato.objects.filter(DNI=dni).update(
-                    nombres_completos=nombres_completos,
-                    telefono_whatsapp=telefono_whatsapp,
-                    email=correo_electronico if correo_electronico else None,
-                    sede_registro=sede,
-                    tipo_documento=tipo_documento, 
-                )
+                # save() y no update(): mantiene nombre_normalizado, el índice de búsqueda y
+                # el resumen de mensajería al día con el nombre y teléfono nuevos.
+                candidato.nombres_completos = nombres_completos
+                candidato.telefono_whatsapp = telefono_whatsapp
+                candidato.email = correo_electronico if correo_electronico else None
+                candidato.sede_registro = sede
+                candidato.tipo_documento = tipo_documento
+                candidato.save(update_fields=[
+                    'nombres_completos', 'telefono_whatsapp', 'email', 'sede_registro', 'tipo_documento',
+                ])
                 messages.warning(request, f'Candidato {candidato.nombres_completos} ya existía. Datos actualizados.')
 
             return redirect('kanban_dashboard')
@@ -123,7 +127,8 @@ class IniciarProcesoView(LoginRequiredMixin, View):
                 fecha_inicio=fecha_inicio,
                 empresa_proceso=empresa_proceso,
                 sede_proceso=sede_registro,
-                estado='CONVOCADO'
+                estado='CONVOCADO',
+                usuario_transicion=request.user,
             )
 
             candidato.estado_actual = 'CONVOCADO'
@@ -170,6 +175,7 @@ class ActualizarProcesoView(LoginRequiredMixin, View):
             with transaction.atomic():
                 
                 proceso.estado = nuevo_estado_proceso
+                proceso.usuario_transicion = request.user
 
                 if nuevo_estado_proceso in ['CONTRATADO', 'NO_APTO']:
                     proceso.objetivo_ventas_alcanzado = objetivo_ventas
@@ -201,6 +207,91 @@ class ActualizarProcesoView(LoginRequiredMixin, View):
         return redirect('kanban_dashboard')
     
 ESTADOS_FINALES_OCULTOS = ['NO_APTO', 'DESISTE']
+
+KANBAN_PAGE_SIZE = 40
+
+KANBAN_COLUMNAS = {
+    'REGISTRADO': 'border-red-500',
+    'CONVOCADO': 'border-indigo-500',
+    'CONFIRMADO': 'border-cyan-500',
+    'CAPACITACION_TEORICA': 'border-yellow-500',
+    'CAPACITACION_PRACTICA': 'border-orange-500',
+    'CONTRATADO': 'border-green-500',
+}
+
+def _candidatos_kanban_queryset(search_query=None, fecha_inicio=None):
+    """
+    Queryset base (sin paginar ni prefetch) de los candidatos visibles en el Kanban,
+    con los filtros de búsqueda y fecha de convocatoria ya aplicados.
+    """
+    candidatos = Candidato.objects.exclude(estado_actual__in=ESTADOS_FINALES_OCULTOS)
+    filtro_registrado = Q(estado_actual='REGISTRADO', kanban_activo=True)
+    filtro_activo = Q(procesos__kanban_activo=True)
+    candidatos = candidatos.filter(filtro_registrado | filtro_activo).distinct()
+
+    if fecha_inicio:
+        candidatos = candidatos.filter(procesos__fecha_inicio=fecha_inicio).distinct()
+
+    if search_query:
+        candidatos = filtrar_por_busqueda(candidatos, search_query)
+
+    return candidatos
+
+def _tarjeta_kanban(candidato):
+    """Construye el diccionario que consume includes/kanban_card.html."""
+    proceso_actual = candidato.proceso_actual
+    if proceso_actual and not proceso_actual.kanban_activo:
+        proceso_actual = None
+
+    proceso_status_display = 'N/A'
+    proceso_id = None
+    empresa_nombre = 'N/A'
+    supervisor_nombre = 'N/A'
+    objetivo_alcanzado = 'false'
+    factor_actitud = 'false'
+    fecha_inicio = None
+
+    if proceso_actual:
+        proceso_status_display = proceso_actual.get_estado_display()
+        proceso_id = proceso_actual.pk
+        empresa_nombre = proceso_actual.empresa_proceso.nombre if proceso_actual.empresa_proceso else 'N/A'
+        supervisor_nombre = proceso_actual.supervisor.nombre if proceso_actual.supervisor else 'N/A'
+        objetivo_alcanzado = 'true' if proceso_actual.objetivo_ventas_alcanzado else 'false'
+        factor_actitud = 'true' if proceso_actual.factor_aptitud_aplica else 'false'
+        fecha_inicio = proceso_actual.fecha_inicio
+
+    return {
+        'candidato': candidato,
+        'proceso': proceso_actual,
+        'proceso_status': proceso_status_display,
+        'proceso_id': proceso_id,
+        'empresa_nombre': empresa_nombre,
+        'supervisor_nombre': supervisor_nombre,
+        'objetivo_alcanzado': objetivo_alcanzado,
+        'factor_actitud': factor_actitud,
+        'fecha_inicio': fecha_inicio,
+    }
+
+def _pagina_columna_kanban(candidatos, estado, cursor=None):
+    """
+    Devuelve (tarjetas, siguiente_cursor) de una columna usando paginación por clave
+    (DNI > cursor), de modo que el costo de cada página no depende del total de candidatos.
+    """
+    qs = candidatos.filter(estado_actual=estado).order_by('pk').select_related(
+        'proceso_actual__empresa_proceso', 'proceso_actual__supervisor'
+    )
+    if cursor:
+        qs = qs.filter(pk__gt=cursor)
+
+    pagina = list(qs[:KANBAN_PAGE_SIZE + 1])
+
+    siguiente_cursor = None
+    if len(pagina) > KANBAN_PAGE_SIZE:
+        pagina = pagina[:KANBAN_PAGE_SIZE]
+        siguiente_cursor = pagina[-1].pk
+
+    return [_tarjeta_kanban(candidato) for candidato in pagina], siguiente_cursor
+
 class KanbanDashboardView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
 
@@ -209,43 +300,15 @@ class KanbanDashboardView(LoginRequiredMixin, View):
         
         active_date_for_template = None 
         
-        latest_proceso_prefetch = Prefetch(
-            'procesos', 
-            queryset=Proceso.objects.filter(kanban_activo=True).order_by('-pk').select_related('empresa_proceso', 'supervisor'),
-            to_attr='latest_proceso'
-        )
-
-        candidatos = Candidato.objects.prefetch_related(latest_proceso_prefetch).all()
-        candidatos = candidatos.exclude(estado_actual__in=ESTADOS_FINALES_OCULTOS)
-        filtro_registrado = Q(estado_actual='REGISTRADO', kanban_activo=True)
-        filtro_activo = Q(procesos__kanban_activo=True)
-        candidatos = candidatos.filter(filtro_registrado | filtro_activo).distinct()
-        
         if fecha_inicio_filter:
             try:
                 active_date_for_template = datetime.strptime(fecha_inicio_filter, '%Y-%m-%d').date()
-
-                candidatos = candidatos.filter(
-                    procesos__fecha_inicio=fecha_inicio_filter
-                ).distinct()
-
             except ValueError:
                 messages.error(request, "Formato de fecha de filtro inválido. Use AAAA-MM-DD.")
                 fecha_inicio_filter = None
                 active_date_for_template = None 
-            
-        if search_query:
-            normalized_query = re.sub(r'\D', '', search_query).strip()
-            
-            filtro = (
-                Q(DNI__icontains=search_query) | 
-                Q(nombres_completos__icontains=search_query)
-            )
 
-            if normalized_query:
-                filtro |= Q(telefono_whatsapp__icontains=normalized_query)
-            
-            candidatos = candidatos.filter(filtro)
+        candidatos = _candidatos_kanban_queryset(search_query, active_date_for_template)
 
         convocatoria_dates = Proceso.objects.filter(
             kanban_activo=True
@@ -254,54 +317,26 @@ class KanbanDashboardView(LoginRequiredMixin, View):
             .order_by('-fecha_inicio') \
             .filter(fecha_inicio__isnull=False, count__gt=0)
 
-        total_candidatos = candidatos.count()
+        kanban_data = {}
+        kanban_cursores = {}
+        kanban_totales = {estado: 0 for estado in KANBAN_COLUMNAS}
 
-        ESTADOS_KANBAN_ACTIVOS = [
-            estado[0] for estado in Candidato.ESTADOS 
-            if estado[0] not in ESTADOS_FINALES_OCULTOS
-        ]
-        
-        kanban_data = {estado: [] for estado in ESTADOS_KANBAN_ACTIVOS}
+        conteos = candidatos.order_by().values('estado_actual').annotate(total=Count('pk', distinct=True))
+        for fila in conteos:
+            if fila['estado_actual'] in kanban_totales:
+                kanban_totales[fila['estado_actual']] = fila['total']
 
-        PROCESO_ESTADOS = getattr(Proceso, 'ESTADOS_PROCESO', None)
+        for estado in KANBAN_COLUMNAS:
+            kanban_data[estado], kanban_cursores[estado] = _pagina_columna_kanban(candidatos, estado)
 
-        for candidato in candidatos:
-            estado = candidato.estado_actual
+        total_candidatos = sum(kanban_totales.values())
 
-            if estado in kanban_data: 
-                proceso_actual = candidato.latest_proceso[0] if candidato.latest_proceso else None
-                
-                proceso_status_display = 'N/A'
-                proceso_id = None
-                empresa_nombre = 'N/A'
-                supervisor_nombre = 'N/A'
-                objetivo_alcanzado = 'false'
-                factor_actitud = 'false'
-                fecha_inicio = None
-
-                if proceso_actual:
-                    proceso_status_display = proceso_actual.get_estado_display()
-                    proceso_id = proceso_actual.pk
-                    empresa_nombre = proceso_actual.empresa_proceso.nombre if proceso_actual.empresa_proceso else 'N/A'
-                    supervisor_nombre = proceso_actual.supervisor.nombre if proceso_actual.supervisor else 'N/A'
-                    objetivo_alcanzado = 'true' if proceso_actual.objetivo_ventas_alcanzado else 'false'
-                    factor_actitud = 'true' if proceso_actual.factor_aptitud_aplica else 'false'
-                    fecha_inicio = proceso_actual.fecha_inicio
-                    
-                kanban_data[estado].append({
-                    'candidato': candidato,
-                    'proceso': proceso_actual,
-                    'proceso_status': proceso_status_display,
-                    'proceso_id': proceso_id,
-                    'empresa_nombre': empresa_nombre,
-                    'supervisor_nombre': supervisor_nombre,
-                    'objetivo_alcanzado': objetivo_alcanzado,
-                    'factor_actitud': factor_actitud,
-                    'fecha_inicio': fecha_inicio,
-                })
+        PROCESO_ESTADOS = getattr(Proceso, 'ESTADOS_PROCESO', None)
 
         context = {
             'kanban_data': kanban_data,
+            'kanban_totales': kanban_totales,
+            'kanban_cursores': kanban_cursores,
             'empresas': Empresa.objects.all(),
             'sedes': Sede.objects.all(),
             'supervisores': Supervisor.objects.all(),
@@ -318,6 +353,39 @@ class KanbanDashboardView(LoginRequiredMixin, View):
         
         return render(request, 'dashboard.html', context)
 
+class KanbanColumnaView(LoginRequiredMixin, View):
+    """
+    API: Devuelve la siguiente página de tarjetas de una columna del Kanban (fragmento HTML),
+    respetando los mismos filtros de búsqueda y fecha que el tablero.
+    """
+    def get(self, request, estado, *args, **kwargs):
+        if estado not in KANBAN_COLUMNAS:
+            return JsonResponse({'status': 'error', 'message': f'Columna {estado} no válida.'}, status=400)
+
+        fecha_inicio = None
+        fecha_inicio_str = request.GET.get('fecha_inicio')
+        if fecha_inicio_str:
+            try:
+                fecha_inicio = datetime.strptime(fecha_inicio_str, '%Y-%m-%d').date()
+            except ValueError:
+                return JsonResponse({'status': 'error', 'message': 'Formato de fecha de filtro inválido. Use AAAA-MM-DD.'}, status=400)
+
+        candidatos = _candidatos_kanban_queryset(request.GET.get('search'), fecha_inicio)
+        tarjetas, siguiente_cursor = _pagina_columna_kanban(candidatos, estado, request.GET.get('cursor'))
+
+        html = render_to_string('includes/kanban_cards_fragment.html', {
+            'data': tarjetas,
+            'status_key': estado,
+            'color': KANBAN_COLUMNAS[estado],
+        }, request=request)
+
+        return JsonResponse({
+            'status': 'success',
+            'html': html,
+            'count': len(tarjetas),
+            'next_cursor': siguiente_cursor,
+        })
+
 @method_decorator(csrf_exempt, name='dispatch')
 class UpdateStatusMultipleView(LoginRequiredMixin, View):
     """
@@ -347,19 +415,9 @@ class UpdateStatusMultipleView(LoginRequiredMixin, View):
                 except ValueError:
                     return JsonResponse({'status': 'error', 'message': 'Formato de fecha de inicio no válido. Use AAAA-MM-DD.'}, status=400)
 
-            proceso_estado_map = {
-                'CONVOCADO': 'CONVOCADO', 
-                'CONFIRMADO': 'CONFIRMADO',
-                'CAPACITACION_TEORICA': 'TEORIA',
-                'CAPACITACION_PRACTICA': 'PRACTICA',
-                'CONTRATADO': 'CONTRATADO',
-                'NO_APTO': 'NO_APTO', 
-            }
-
-            proceso_status_to_update = proceso_estado_map.get(new_status_key)
-            estado_orden = {state[0]: i for i, state in enumerate(Candidato.ESTADOS)}
-            
-            candidatos_actualizados = 0
+            is_to_convocado = new_status_key == 'CONVOCADO'
+            if is_to_convocado and not fecha_inicio_nueva:
+                return JsonResponse({'status': 'error', 'message': 'La fecha de inicio es requerida para iniciar el proceso de convocatoria masiva.'}, status=400)
 
             try:
                 default_supervisor = Supervisor.objects.first()
@@ -369,78 +427,30 @@ class UpdateStatusMultipleView(LoginRequiredMixin, View):
             except Exception as e:
                  return JsonResponse({'status': 'error', 'message': f'Fallo de configuración: {str(e)}'}, status=500)
 
+            resultados = aplicar_transicion_masiva(
+                dni_list,
+                new_status_key,
+                request.user,
+                fecha_inicio=fecha_inicio_nueva,
+                motivo_descarte=motivo_descarte,
+                supervisor=default_supervisor,
+                empresa=default_empresa,
+            )
 
-            with transaction.atomic():
-                
-                candidatos = Candidato.objects.filter(DNI__in=dni_list).prefetch_related(
-                    Prefetch(
-                        'procesos',
-                        queryset=Proceso.objects.order_by('-fecha_inicio'), 
-                        to_attr='latest_proceso'
-                    )
-                )
-                
-                is_to_convocado = new_status_key == 'CONVOCADO'
-                if is_to_convocado and not fecha_inicio_nueva:
-                    return JsonResponse({'status': 'error', 'message': 'La fecha de inicio es requerida para iniciar el proceso de convocatoria masiva.'}, status=400)
+            candidatos_actualizados = sum(1 for r in resultados.values() if r == RESULTADO_ACTUALIZADO)
 
+            if candidatos_actualizados > 0:
+                display_status = dict(Candidato.ESTADOS).get(new_status_key, new_status_key)
+            else:
+                display_status = new_status_key 
                 
-                for candidato in candidatos:
-                    
-                    current_order = estado_orden.get(candidato.estado_actual, -1)
-                    new_order = estado_orden.get(new_status_key, -1)
-
-                    if new_order > current_order or new_status_key in ['CONTRATADO', 'NO_APTO', 'DESISTE']:
-                        
-                        proceso_activo = candidato.latest_proceso[0] if candidato.latest_proceso else None
-                        
-                        if candidato.estado_actual == 'REGISTRADO' and is_to_convocado:
-                            
-                            Proceso.objects.create(
-                                candidato=candidato,
-                                fecha_inicio=fecha_inicio_nueva,
-                                supervisor=default_supervisor, 
-                                empresa_proceso=default_empresa, 
-                                sede_proceso=candidato.sede_registro, 
-                                estado='CONVOCADO'
-                            )
-                            candidato.estado_actual = new_status_key
-                            
-                        elif proceso_status_to_update:
-                            if not proceso_activo:
-                                print(f"Advertencia: Candidato {candidato.DNI} sin proceso activo para actualizar a {new_status_key}")
-                                continue
-                                
-                            proceso_activo.estado = proceso_status_to_update
-                            proceso_activo.save() 
-
-                            candidato.estado_actual = new_status_key
-                            
-                        elif new_status_key in ['DESISTE', 'NO_APTO']:
-                            candidato.estado_actual = new_status_key
-                            
-                            if motivo_descarte: 
-                                candidato.motivo_descarte = motivo_descarte 
-                            
-                        else:
-                            continue 
-
-                        candidato.usuario_ultima_modificacion = request.user
-                        candidato.save()
-                        
-                        candidatos_actualizados += 1
-                        
-                if candidatos_actualizados > 0:
-                    display_status = dict(Candidato.ESTADOS).get(new_status_key, new_status_key)
-                else:
-                    display_status = new_status_key 
-                    
-                return JsonResponse({
-                    'status': 'success', 
-                    'message': f'{candidatos_actualizados} candidatos movidos a **{display_status}** con éxito.',
-                    'count': candidatos_actualizados,
-                    'new_status_key': new_status_key 
-                })
+            return JsonResponse({
+                'status': 'success', 
+                'message': f'{candidatos_actualizados} candidatos movidos a **{display_status}** con éxito.',
+                'count': candidatos_actualizados,
+                'new_status_key': new_status_key,
+                'resultados': resultados,
+            })
 
         except Exception as e:
             print(f"Error fatal en UpdateStatusMultipleView: {e}")
@@ -476,19 +486,13 @@ class CandidatoSearchView(View):
         query = request.GET.get('q', '').strip()
         results = []
 
-        if query:
-            candidatos = Candidato.objects.filter(
-                Q(DNI__startswith=query) | 
-                Q(nombres_completos__icontains=query) |
-                Q(telefono_whatsapp__startswith=query)  
-            ).values('DNI', 'nombres_completos', 'telefono_whatsapp')[:10]
-
-            for c in candidatos:
-                results.append({
-                    'DNI': c['DNI'],
-                    'nombres_completos': c['nombres_completos'],
-                    'telefono_whatsapp': c['telefono_whatsapp'] if c.get('telefono_whatsapp') else 'N/A',
-                })
+        # Índice de tokens por prefijo (utils/busqueda.py), con caché por consulta.
+        for c in buscar_candidatos(query):
+            results.append({
+                'DNI': c['DNI'],
+                'nombres_completos': c['nombres_completos'],
+                'telefono_whatsapp': c['telefono_whatsapp'] if c.get('telefono_whatsapp') else 'N/A',
+            })
 
         return JsonResponse(results, safe=False)
 
@@ -507,85 +511,48 @@ class AsistenciaDiariaCheckView(View):
         if not normalized_query:
             return JsonResponse({'success': False, 'message': 'Consulta inválida.'}, status=400)
 
-        zona_horaria_servidor = timezone.get_current_timezone()
-        momento_registro = timezone.localtime(timezone.now(), timezone=zona_horaria_servidor)
-        hoy_date = momento_registro.date()
+        momento_registro = timezone.localtime(timezone.now())
         
         try:
-            candidato = Candidato.objects.filter(
+            candidato = Candidato.objects.select_related('proceso_actual__sede_proceso').filter(
                 Q(DNI=normalized_query) | Q(telefono_whatsapp=normalized_query)
             ).first() 
             
             if not candidato:
                 return JsonResponse({'success': False, 'message': f'Candidato no encontrado.'}, status=200)
 
-            proceso_activo = candidato.procesos.filter(
-                ~Q(estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO'])
-            ).order_by('-fecha_inicio').first()
+            proceso_activo = candidato.proceso_activo
             
             if not proceso_activo:
                 return JsonResponse({'success': False, 'message': f'Candidato {candidato.DNI} sin Proceso ACTIVO.'}, status=200)
 
-            
-            def get_aware_time(h, m):
-                naive_time = datetime.combine(hoy_date, time(h, m))
-                return make_aware(naive_time, zona_horaria_servidor) 
-
-            hora_limite_entrada = get_aware_time(7, 0) 
-            hora_limite_tardanza = get_aware_time(14, 0) 
-            
-            
-            
-            entrada_hoy_exists = RegistroAsistencia.objects.filter(
-                proceso=proceso_activo,
-                momento_registro__date=hoy_date,
-                movimiento='ENTRADA' 
-            ).exists()
-            
-            msg_accion = ""
-            estado_final = 'A' 
-            registrado_por_user = request.user if request.user.is_authenticated else None
-
-
-            if entrada_hoy_exists:
-                movimiento = 'SALIDA'
-                
-                if momento_registro < hora_limite_tardanza:
-                    msg_accion = "⚠️ Se registró la SALIDA, pero fue TEMPRANO (antes de 14:00)."
-                else:
-                    msg_accion = "✅ Salida registrada con éxito."
 
-            else:
-                movimiento = 'ENTRADA'
-                
-                if momento_registro >= hora_limite_tardanza:
-                    estado_final = 'F'
-                    msg_accion = "❌ Registro FALLIDO: Es después de las 14:00 y no hay ENTRADA previa. Se marca como FALTA."
-                
-                elif momento_registro > hora_limite_entrada:
-                    estado_final = 'T' 
-                    msg_accion = "⚠️ Entrada registrada como TARDE."
-                
-                else:
-                    estado_final = 'A' 
-                    msg_accion = "✅ Entrada registrada como PUNTUAL."
-            
-                        
             FASE_MAP = {
                 'CONVOCADO': 'CONFIRMADO', 'TEORIA': 'TEORIA', 'PRACTICA': 'PRACTICA',
             }
-            fase_asistencia = FASE_MAP.get(proceso_activo.estado, 'TEORIA')
-            
-            registro = RegistroAsistencia.objects.create(
-                proceso=proceso_activo, 
-                
-                estado_asistencia=estado_final, 
-                estado=estado_final, 
-                movimiento=movimiento, 
-                fase_actual=fase_asistencia, 
-                registrado_por=registrado_por_user,
-                momento_registro=momento_registro
-            )
+            registrado_por_user = request.user if request.user.is_authenticated else None
+
+            try:
+                registro, salida_temprana = registrar_asistencia(
+                    proceso_activo,
+                    usuario=registrado_por_user,
+                    fase=FASE_MAP.get(proceso_activo.estado, 'TEORIA'),
+                    momento=momento_registro,
+                )
+            except AsistenciaRechazada as e:
+                return JsonResponse({'success': False, 'message': f'Registro para {candidato.nombres_completos} ({candidato.DNI}): ⛔ {e}'}, status=200)
+
+            movimiento = registro.movimiento
+            estado_final = registro.estado
+
+            if movimiento == 'SALIDA':
+                msg_accion = "⚠️ Se registró la SALIDA, pero fue TEMPRANO." if salida_temprana else "✅ Salida registrada con éxito."
+            elif estado_final == 'F':
+                msg_accion = "❌ Registro FALLIDO: Es después de la hora límite y no hay ENTRADA previa. Se marca como FALTA."
+            elif estado_final == 'T':
+                msg_accion = "⚠️ Entrada registrada como TARDE."
+            else:
+                msg_accion = "✅ Entrada registrada como PUNTUAL."
             
             return JsonResponse({
                 'success': True,
@@ -613,10 +580,6 @@ def registrar_asistencia_rapida(request):
             status=403
         )
 
-    zona_horaria_servidor = get_current_timezone()
-    momento_registro = timezone.localtime(timezone.now(), timezone=zona_horaria_servidor)
-    hoy = momento_registro.date()
-    
     try:
         proceso_id = request.POST.get('proceso_id')
         fase_actual_key = request.POST.get('fase_actual') 
@@ -627,91 +590,37 @@ def registrar_asistencia_rapida(request):
                 status=400
             )
 
-        proceso = Proceso.objects.get(pk=proceso_id)
-        candidato = proceso.candidato
-        candidato_nombre = candidato.nombres_completos
-        mensaje_exito = "" 
-        estado_final = 'A'
-
-        def get_aware_time(h, m):
-            naive_time = datetime.combine(hoy, time(h, m))
-            return make_aware(naive_time, zona_horaria_servidor) 
-        
-        
-        falta_existente_hoy = RegistroAsistencia.objects.filter(
-            proceso=proceso,
-            momento_registro__date=hoy,
-            estado='F' 
-        ).exists()
-        
-        if falta_existente_hoy:
-            return JsonResponse({
-                'success': False, 
-                'message': f'⚠️ El candidato {candidato_nombre} ya fue marcado como **FALTA** hoy. Contacte a soporte para corregir el estado.'
-            }, status=409)
-
-
-        entrada_registro = RegistroAsistencia.objects.filter(
-            proceso=proceso,
-            momento_registro__date=hoy,
-            movimiento='ENTRADA' 
-        ).first()
-
-        salida_hoy_exists = RegistroAsistencia.objects.filter(
-            proceso=proceso,
-            momento_registro__date=hoy,
-            movimiento='SALIDA' 
-        ).exists()
-
-        if entrada_registro is None:
-            movimiento = 'ENTRADA'
+        proceso = Proceso.objects.select_related('candidato', 'sede_proceso').get(pk=proceso_id)
+        candidato_nombre = proceso.candidato.nombres_completos
 
-            hora_limite_entrada = get_aware_time(7, 0)
-            hora_limite_tardanza = get_aware_time(14, 0) # 2:00 PM
-            
-            if momento_registro >= hora_limite_tardanza:
-                estado_final = 'F'
-                mensaje_exito = f"❌ Registro de ENTRADA FALLIDO (> 14:00). Marcado como **FALTA**."
-            elif momento_registro > hora_limite_entrada:
-                estado_final = 'T' 
-                mensaje_exito = f"⚠️ ENTRADA registrada para {candidato_nombre} como TARDE."
+        try:
+            registro, salida_temprana = registrar_asistencia(
+                proceso, usuario=request.user, fase=fase_actual_key
+            )
+        except AsistenciaRechazada as e:
+            if e.codigo == RECHAZO_FALTA_REGISTRADA:
+                mensaje = f'⚠️ El candidato {candidato_nombre} ya fue marcado como **FALTA** hoy. Contacte a soporte para corregir el estado.'
+            elif e.codigo == RECHAZO_CICLO_COMPLETO:
+                mensaje = f'⛔ El candidato {candidato_nombre} ya tiene registrado su ciclo de ENTRADA/SALIDA completo para hoy.'
             else:
-                estado_final = 'A'
-                mensaje_exito = f"🟢 ENTRADA registrada para {candidato_nombre} como PUNTUAL."
+                mensaje = f'⛔ {e}'
+            return JsonResponse({'success': False, 'message': mensaje}, status=409)
 
-        elif entrada_registro is not None and not salida_hoy_exists:
-            movimiento = 'SALIDA'
-            
-            estado_final = entrada_registro.estado
-            
-            hora_limite_salida = get_aware_time(14, 0)
-            
-            if momento_registro < hora_limite_salida:
-                mensaje_exito = f"⚠️ SALIDA registrada para {candidato_nombre} antes de la hora límite (14:00). Se considera Salida Temprana."
+        if registro.movimiento == 'SALIDA':
+            if salida_temprana:
+                mensaje_exito = f"⚠️ SALIDA registrada para {candidato_nombre} antes de la hora límite. Se considera Salida Temprana."
             else:
                 mensaje_exito = f"✅ SALIDA registrada para {candidato_nombre} a tiempo. ¡Fin de Jornada!"
-
-        else: 
-             return JsonResponse({
-                'success': False, 
-                'message': f'⛔ El candidato {candidato_nombre} ya tiene registrado su ciclo de ENTRADA/SALIDA completo para hoy.'
-            }, status=409)
-
-        RegistroAsistencia.objects.create(
-            proceso=proceso,
-            candidato=candidato,
-            fase_actual=fase_actual_key,
-            movimiento=movimiento,
-            
-            estado_asistencia=estado_final,
-            estado=estado_final,
-            
-            registrado_por=request.user,
-            momento_registro=momento_registro
-        )
+        elif registro.estado == 'F':
+            mensaje_exito = f"❌ Registro de ENTRADA FALLIDO (fuera de hora). Marcado como **FALTA**."
+        elif registro.estado == 'T':
+            mensaje_exito = f"⚠️ ENTRADA registrada para {candidato_nombre} como TARDE."
+        else:
+            mensaje_exito = f"🟢 ENTRADA registrada para {candidato_nombre} como PUNTUAL."
         
         if proceso.estado == 'CONFIRMADO' and fase_actual_key == 'CONVOCADO':
             proceso.estado = 'TEORIA' 
+            proceso.usuario_transicion = request.user
             proceso.save()
             mensaje_exito = f"🎉 ¡Asistencia Registrada y Avance! {candidato_nombre} ha avanzado a la fase de TEORÍA."
             
@@ -743,13 +652,9 @@ def asistencia_dashboard(request):
             return JsonResponse({'success': False, 'message': 'DNI no puede estar vacío.'})
 
         try:
-            candidato = Candidato.objects.get(DNI=dni)
+            candidato = Candidato.objects.select_related('proceso_actual').get(DNI=dni)
             
-            ultimo_proceso = Proceso.objects.filter(
-                candidato=candidato
-            ).exclude(
-                estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO']
-            ).order_by('-fecha_inicio').first()
+            ultimo_proceso = candidato.proceso_activo
             
             if not ultimo_proceso:
                 return JsonResponse({
@@ -770,7 +675,7 @@ def asistencia_dashboard(request):
                 ultimo_registro_hoy = RegistroAsistencia.objects.filter(
                     proceso=ultimo_proceso, 
                     fase_actual=fase_proceso,
-                    momento_registro__date=hoy 
+                    fecha=hoy 
                 ).order_by('-momento_registro').first()
 
                 if ultimo_registro_hoy and ultimo_registro_hoy.movimiento == 'ENTRADA':
@@ -807,6 +712,112 @@ def asistencia_dashboard(request):
 
     return render(request, 'asistencia_dashboard.html', {'today': date.today()})
 
+KIOSKO_LOTE_MAXIMO = 200
+KIOSKO_DESFASE_MAXIMO = timedelta(minutes=5)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class KioskoAsistenciaView(LoginRequiredMixin, View):
+    """
+    Modo kiosko: búsqueda del DNI y registro de asistencia en una sola llamada.
+
+    Acepta un escaneo {"dni": ..., "momento": ...} o un lote {"escaneos": [...]} con los
+    escaneos que el kiosko encoló sin conexión. `momento` (ISO 8601, opcional) es la hora
+    real del escaneo; reenviar el mismo escaneo devuelve ESCANEO_REPETIDO sin duplicar.
+    El DNI se resuelve contra el mapa en memoria de procesos activos.
+    """
+    def _momento(self, valor, ahora):
+        if not valor:
+            return ahora
+        momento = parse_datetime(str(valor))
+        if momento is None:
+            raise ValueError('Momento inválido.')
+        if timezone.is_naive(momento):
+            momento = make_aware(momento)
+        if momento > ahora + KIOSKO_DESFASE_MAXIMO:
+            raise ValueError('El momento del escaneo está en el futuro.')
+        return momento
+
+    def _resultado(self, escaneo):
+        return {
+            'id': escaneo.get('id'),
+            'success': False,
+            'dni': re.sub(r'\D', '', str(escaneo.get('dni') or '')),
+        }
+
+    def _procesar(self, escaneo, momento, usuario):
+        resultado = self._resultado(escaneo)
+        dni = resultado['dni']
+
+        if not dni:
+            resultado.update(codigo='DNI_INVALIDO', mensaje='DNI vacío o inválido.')
+            return resultado
+
+        entrada = mapa_procesos_activos.buscar(dni)
+        if not entrada:
+            resultado.update(codigo='SIN_PROCESO', mensaje=f'DNI {dni} no encontrado o sin proceso activo.')
+            return resultado
+
+        resultado['candidato_nombre'] = entrada['nombre']
+
+        try:
+            registro, salida_temprana = registrar_asistencia(
+                mapa_procesos_activos.proceso(entrada),
+                usuario=usuario,
+                momento=momento,
+                horario=mapa_procesos_activos.horario(entrada['sede_id']),
+            )
+        except AsistenciaRechazada as e:
+            if e.codigo == RECHAZO_CONCURRENTE:
+                mapa_procesos_activos.invalidar(dni)
+            resultado.update(codigo=e.codigo, mensaje=str(e), success=e.codigo == RECHAZO_REPETIDO)
+            return resultado
+
+        resultado.update(
+            success=True,
+            codigo='REGISTRADO',
+            movimiento=registro.movimiento,
+            estado=registro.estado,
+            salida_temprana=salida_temprana,
+            mensaje=f"{registro.get_movimiento_display()} registrada ({registro.get_estado_display()}).",
+        )
+        return resultado
+
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'success': False, 'error': 'Formato JSON inválido.'}, status=400)
+
+        escaneos = data.get('escaneos') if isinstance(data, dict) else None
+        if escaneos is None and isinstance(data, dict):
+            escaneos = [data]
+
+        if not isinstance(escaneos, list) or not escaneos:
+            return JsonResponse({'success': False, 'error': 'No se enviaron escaneos.'}, status=400)
+        if len(escaneos) > KIOSKO_LOTE_MAXIMO:
+            return JsonResponse({'success': False, 'error': f'Máximo {KIOSKO_LOTE_MAXIMO} escaneos por lote.'}, status=400)
+
+        ahora = timezone.now()
+        # Se procesan en orden cronológico, para que una ENTRADA encolada entre antes que su
+        # SALIDA. El orden se toma del momento ya interpretado, no del texto: '...T12:00-05:00'
+        # es posterior a '...T13:00Z'. Los escaneos sin momento son de este instante y los de
+        # momento inválido se rechazan sin registrar nada.
+        resultados, validos = [], []
+        for escaneo in escaneos:
+            if not isinstance(escaneo, dict):
+                continue
+            try:
+                validos.append((self._momento(escaneo.get('momento'), ahora), escaneo))
+            except ValueError as e:
+                resultado = self._resultado(escaneo)
+                resultado.update(codigo='MOMENTO_INVALIDO', mensaje=str(e))
+                resultados.append(resultado)
+
+        validos.sort(key=lambda par: par[0])
+        resultados += [self._procesar(escaneo, momento, request.user) for momento, escaneo in validos]
+
+        return JsonResponse({'success': True, 'resultados': resultados})
+
 @method_decorator(csrf_exempt, name='dispatch')
 class UpdateStatusView(LoginRequiredMixin, View):
     def post(self, request):
@@ -820,9 +831,9 @@ class UpdateStatusView(LoginRequiredMixin, View):
             if not dni or not new_status_key:
                 return JsonResponse({'status': 'error', 'message': 'DNI and new status are required.'}, status=400)
 
-            candidato = Candidato.objects.get(DNI=dni)
+            candidato = Candidato.objects.select_related('proceso_actual').get(DNI=dni)
 
-            proceso_activo = candidato.procesos.order_by('-fecha_inicio').first() 
+            proceso_activo = candidato.proceso_actual
 
             proceso_estado_map = {
                 'CONVOCADO': 'CONVOCADO',
@@ -851,12 +862,14 @@ class UpdateStatusView(LoginRequiredMixin, View):
                         supervisor_id=1,
                         empresa_proceso_id=1,
                         sede_proceso_id=candidato.sede_registro_id,
-                        estado='CONVOCADO'
+                        estado='CONVOCADO',
+                        usuario_transicion=request.user,
                     )
                     proceso_activo = proceso_nuevo
                 
                 elif proceso_status_to_update and proceso_activo:
                     proceso_activo.estado = proceso_status_to_update
+                    proceso_activo.usuario_transicion = request.user
                     proceso_activo.save()
 
                 estado_orden = {state[0]: i for i, state in enumerate(Candidato.ESTADOS)}
@@ -913,6 +926,7 @@ class AsignarSupervisorIndividualView(LoginRequiredMixin, View):
             with transaction.atomic():
                 proceso.supervisor = supervisor
                 proceso.estado = 'PRACTICA'
+                proceso.usuario_transicion = request.user
                 proceso.save()
 
                 candidato.estado_actual = 'CAPACITACION_PRACTICA'
@@ -929,123 +943,46 @@ class AsignarSupervisorIndividualView(LoginRequiredMixin, View):
 class ExportarCandidatosExcelView(LoginRequiredMixin, View):
     def get(self, request, estado, *args, **kwargs):
         
+        formato = formato_export(request.GET)
+        if formato is None:
+            return HttpResponseBadRequest(f"Formato no disponible. Use: {', '.join(formatos_disponibles())}.")
+
         fecha_filtro_str = request.GET.get('fecha_filtro')
         
-        proceso_queryset = Proceso.objects.order_by('-fecha_inicio').select_related('supervisor', 'empresa_proceso')
-        
-        if fecha_filtro_str:
-            proceso_queryset = proceso_queryset.filter(fecha_inicio=fecha_filtro_str)
-        
-        candidatos_qs = Candidato.objects.filter(estado_actual=estado)
-        
-        if fecha_filtro_str:
-            candidatos_qs = candidatos_qs.filter(procesos__fecha_inicio=fecha_filtro_str).distinct()
-
-        candidatos_qs = candidatos_qs.order_by('fecha_registro').select_related(
+        candidatos_qs = Candidato.objects.filter(estado_actual=estado).order_by('fecha_registro').select_related(
             'sede_registro',
             'datoscualificacion' 
         )
-
-        candidatos = candidatos_qs.prefetch_related(
-            models.Prefetch('procesos', queryset=proceso_queryset, to_attr='latest_proceso_list')
-        )
-        
-        candidatos_a_exportar = list(candidatos)
         
-        if not candidatos_a_exportar:
-           
-            return redirect('kanban_dashboard')
-
-        data = []
-        
-        def format_date(date_field):
-            return date_field.strftime('%d/%m/%Y') if date_field else ''
-        
-        def format_bool(bool_field):
-            if bool_field is True: return 'SÍ'
-            if bool_field is False: return 'NO'
-            return 'N/A' 
-        
-        for c in candidatos_a_exportar:
-            ultimo_proceso = c.latest_proceso_list[0] if c.latest_proceso_list else None
-            cualificacion = getattr(c, 'datoscualificacion', None) 
-
-            row = {
-                'DNI': c.DNI,
-                'Nombres_Completos': c.nombres_completos,
-                'Telefono_Whatsapp': c.telefono_whatsapp,
-                'Email': c.email if c.email else '',
-                'Edad': c.edad,
-                'Distrito_Candidato': c.distrito, 
-                'Estado_Actual_Candidato': c.get_estado_actual_display(), 
-                'Fecha_Registro': format_date(c.fecha_registro),
-                'Sede_Registro': c.sede_registro.nombre if c.sede_registro else 'N/A',
-
-                'Secundaria_Completa': format_bool(cualificacion.secundaria_completa) if cualificacion else '',
-                'Exp_Campanas_Espanolas': format_bool(cualificacion.experiencia_campanas_espanolas) if cualificacion else '', 
-                'Tipo_Exp_Ventas': cualificacion.get_experiencia_ventas_tipo_display() if cualificacion else '', 
-                'Empresa_Exp_Ventas': cualificacion.empresa_vendedor if cualificacion else '',
-                'Tiempo_Experiencia_Vendedor': cualificacion.get_tiempo_experiencia_vendedor_display() if cualificacion else '', 
-                'Conforme_Beneficios': cualificacion.get_conforme_beneficios_display() if cualificacion else '',
-                'Detalle_Beneficios_Otro': cualificacion.detalle_beneficios_otro if cualificacion else '', 
-                'Disponibilidad_Horario': format_bool(cualificacion.disponibilidad_horario) if cualificacion else '',
-                'Discapacidad_Enfermedad_Cronica': cualificacion.discapacidad_enfermedad_cronica if cualificacion else '',
-                'Dificultad_Habla': format_bool(cualificacion.dificultad_habla) if cualificacion else '',
-
-                'Empresa_Cliente': ultimo_proceso.empresa_proceso.nombre if ultimo_proceso and ultimo_proceso.empresa_proceso else '',
-                'Fecha_Convocatoria': format_date(ultimo_proceso.fecha_inicio) if ultimo_proceso else '',
-                'Fecha_Confirmado': format_date(ultimo_proceso.fecha_confirmado) if ultimo_proceso else '',
-                'Fecha_Teorico': format_date(ultimo_proceso.fecha_teorico) if ultimo_proceso else '',
-                'Fecha_Practico': format_date(ultimo_proceso.fecha_practico) if ultimo_proceso else '',
-                'Fecha_Contratacion': format_date(ultimo_proceso.fecha_contratacion) if ultimo_proceso else '',
-                'Supervisor_Asignado': ultimo_proceso.supervisor.nombre if ultimo_proceso and ultimo_proceso.supervisor else '',
-                'Estado_Proceso': ultimo_proceso.get_estado_display() if ultimo_proceso else 'N/A', 
-            }
-            
-            data.append(row)
-
-       
-        column_names = list(data[0].keys()) 
-        
-        df = pd.DataFrame(data, columns=column_names)
-        
-        df = df.fillna('')
-        df.columns = df.columns.astype(str) 
-
-        output = io.BytesIO()
-        writer = pd.ExcelWriter(output, engine='openpyxl') 
-            
-        nombre_hoja = f"Candidatos_{estado}"[:31]
-        df.to_excel(writer, sheet_name=nombre_hoja, index=False)
+        if fecha_filtro_str:
+            candidatos_qs = candidatos_qs.filter(
+                Exists(Proceso.objects.filter(candidato=OuterRef('pk'), fecha_inicio=fecha_filtro_str))
+            ).prefetch_related(
+                models.Prefetch(
+                    'procesos',
+                    queryset=Proceso.objects.filter(fecha_inicio=fecha_filtro_str).order_by('-fecha_inicio').select_related('supervisor', 'empresa_proceso'),
+                    to_attr='latest_proceso_list'
+                )
+            )
 
-        worksheet = writer.sheets[nombre_hoja]
-        
-        for col_idx, column in enumerate(df.columns):
-            try:
-                max_len = df[column].astype(str).str.len().max()
-                
-                final_width = min(max(max_len, len(column)) + 2, 40)
-                
-                col_letter = get_column_letter(col_idx + 1)
-                worksheet.column_dimensions[col_letter].width = final_width
-                
-            except Exception:
-                col_letter = get_column_letter(col_idx + 1)
-                worksheet.column_dimensions[col_letter].width = 20
-                continue
-                
-        writer.close() 
+            def ultimo_proceso(c):
+                return c.latest_proceso_list[0] if c.latest_proceso_list else None
+        else:
+            candidatos_qs = candidatos_qs.select_related('proceso_actual__empresa_proceso', 'proceso_actual__supervisor')
 
-        output.seek(0)
+            def ultimo_proceso(c):
+                return c.proceso_actual
 
-        filename = f"candidatos_{estado.lower()}_{date.today().strftime('%Y%m%d')}.xlsx"
+        if not candidatos_qs.exists():
+            return redirect('kanban_dashboard')
 
-        response = HttpResponse(
-            output,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filas = (
+            fila_candidato(c, ultimo_proceso(c))
+            for c in candidatos_qs.iterator(chunk_size=EXPORT_CHUNK)
         )
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+
+        nombre_base = f"candidatos_{estado.lower()}_{date.today().strftime('%Y%m%d')}"
+        return respuesta_exportacion(filas, COLUMNAS_CANDIDATO, f"Candidatos_{estado}", nombre_base, formato)
 
 class RegistroPublicoCompletoView(View):
     def get(self, request):
@@ -1059,11 +996,13 @@ class RegistroPublicoCompletoView(View):
             'tipos_documento': tipos_documento_disponibles,
             'TIPO_VENTA_CHOICES': DatosCualificacion.TIPO_VENTA_CHOICES,
             'TIEMPO_EXP_CHOICES': DatosCualificacion.TIEMPO_EXP_CHOICES,
+            # Clave de idempotencia del envío (campo oculto del formulario).
+            'clave_envio': uuid.uuid4().hex,
         }
         return render(request, 'registro_publico_completo.html', context)
 
-    @transaction.atomic
     def post(self, request):
+        clave_envio = request.POST.get('clave_envio', '').strip()[:64]
         tipo_documento_id = request.POST.get('tipo_documento')
         dni = request.POST.get('DNI', '').strip()
         nombres_completos = request.POST.get('nombres_completos', '').strip()
@@ -1107,8 +1046,8 @@ class RegistroPublicoCompletoView(View):
             messages.error(request, 'El número de teléfono (WhatsApp) debe tener exactamente 9 dígitos y contener solo números.')
             return redirect('registro_publico_completo')
 
-        edad_int = int(edad)
         try:
+            edad_int = int(edad)
             if edad_int > 35:
                 messages.error(request, '❌ Por favor, **leer los requisitos** de postulación publicados para poder continuar')
                 return redirect('registro_publico_completo')
@@ -1130,67 +1069,46 @@ class RegistroPublicoCompletoView(View):
         
         # -------------------------------------------------------------------
         
-        # --- LÓGICA DE DNI ÚNICO: BUSCAR, ACTUALIZAR FECHA O CREAR ---
-        try:
-            # 1. Intentar buscar el candidato por DNI
-            candidato = Candidato.objects.get(DNI=dni)
-            
-            # 2. Si existe: Actualizar fecha, mostrar mensaje de repostulación
-            candidato.fecha_registro = datetime.now()
-            candidato.save(update_fields=['fecha_registro'])
-            
-            messages.warning(request, f'⚠️ Atención: El DNI {dni} ya se encontraba registrado. Se ha actualizado la **fecha de postulación** para este candidato. ¿Deseas volver a postular?')
-            
-        except Candidato.DoesNotExist:
-            # 3. Si NO existe: Crear el nuevo candidato
-            try:
-                candidato = Candidato.objects.create(
-                    DNI=dni,
-                    nombres_completos=nombres_completos,
-                    edad=edad_int,
-                    telefono_whatsapp=telefono_whatsapp,
-                    email=email if email else None,
-                    distrito=distrito,
-                    sede_registro=sede_seleccionada, 
-                    tipo_documento=tipo_documento_obj,
-                    estado_actual='REGISTRADO' 
-                )
-            except IntegrityError as e:
-                error_message = str(e)
-                # Manejar otros errores de unicidad (teléfono, email)
-                if 'telefono_whatsapp' in error_message:
-                    msg = 'El número de teléfono ya está registrado con otro candidato.'
-                elif 'email' in error_message:
-                    msg = 'El correo electrónico ya está registrado con otro candidato.'
-                else:
-                    msg = f'Error de duplicidad. Contacte a soporte. Detalle: {error_message}'
-                messages.error(request, msg)
-                return redirect('registro_publico_completo')
-        
-        # --- CREACIÓN DE DATOS DE CUALIFICACIÓN (ASOCIADO AL CANDIDATO ENCONTRADO O CREADO) ---
+        # --- REGISTRO: UNA TRANSACCIÓN, IDEMPOTENTE POR clave_envio Y SEGURA ANTE ENVÍOS SIMULTÁNEOS ---
+        datos_candidato = {
+            'nombres_completos': nombres_completos,
+            'edad': edad_int,
+            'telefono_whatsapp': telefono_whatsapp,
+            'email': email if email else None,
+            'distrito': distrito,
+            'sede_registro': sede_seleccionada,
+            'tipo_documento': tipo_documento_obj,
+            'estado_actual': 'REGISTRADO',
+        }
+        datos_cualificacion = {
+            'distrito': distrito,
+            'secundaria_completa': secundaria_completa,
+            'experiencia_campanas_espanolas': experiencia_campanas_espanolas,
+            'experiencia_ventas_tipo': experiencia_ventas_tipo,
+            'empresa_vendedor': empresa_vendedor if empresa_vendedor else None,
+            'tiempo_experiencia_vendedor': tiempo_experiencia_vendedor,
+            'conforme_beneficios': conforme_beneficios,
+            'detalle_beneficios_otro': detalle_beneficios_otro if conforme_beneficios == 'OTRO' else None,
+            'disponibilidad_horario': disponibilidad_horario,
+            'discapacidad_enfermedad_cronica': discapacidad_enfermedad_cronica if discapacidad_enfermedad_cronica else None,
+            'dificultad_habla': dificultad_habla,
+        }
+
         try:
-            DatosCualificacion.objects.create(
-                candidato=candidato,
-                distrito=distrito,
-                secundaria_completa=secundaria_completa,
-                experiencia_campanas_espanolas=experiencia_campanas_espanolas,
-                experiencia_ventas_tipo=experiencia_ventas_tipo,
-                empresa_vendedor=empresa_vendedor if empresa_vendedor else None,
-                tiempo_experiencia_vendedor=tiempo_experiencia_vendedor,
-                conforme_beneficios=conforme_beneficios,
-                detalle_beneficios_otro=detalle_beneficios_otro if conforme_beneficios == 'OTRO' else None,
-                disponibilidad_horario=disponibilidad_horario,
-                discapacidad_enfermedad_cronica=discapacidad_enfermedad_cronica if discapacidad_enfermedad_cronica else None,
-                dificultad_habla=dificultad_habla,
-            )
-        
-        except ValidationError as e:
-            messages.error(request, f'Error de validación de cualificación: {e.message_dict}')
+            candidato, creado = registrar_postulacion(clave_envio, dni, datos_candidato, datos_cualificacion)
+        except EnvioRepetido:
+            messages.success(request, '✅ Tu registro ya fue recibido. Puedes registrar a alguien más si lo deseas.')
+            return redirect('registro_publico_completo')
+        except PosibleDuplicado:
+            messages.error(request, 'Ya existe una postulación con este nombre y teléfono registrada con otro número de documento. Verifica tu DNI o contacta a soporte.')
             return redirect('registro_publico_completo')
         except Exception as e:
-            messages.error(request, f'Error inesperado al guardar cualificación: {e}')
+            messages.error(request, f'Error inesperado al guardar el registro: {e}')
             return redirect('registro_publico_completo')
-            
+
+        if not creado:
+            messages.warning(request, f'⚠️ Atención: El DNI {dni} ya se encontraba registrado. Se ha actualizado la **fecha de postulación** y tus respuestas del formulario.')
+
         messages.success(request, '✅ ¡Tu registro y cualificación se completaron con éxito! Puedes registrar a alguien más si lo deseas.')
         return redirect('registro_publico_completo')
     
@@ -1589,10 +1507,7 @@ class CandidatoListView(LoginRequiredMixin, ListView):
         fecha_final_str = self.request.GET.get('fecha_final')
         
         if search_query:
-            queryset = queryset.filter(
-                Q(DNI__icontains=search_query) | 
-                Q(nombres_completos__icontains=search_query)
-            )
+            queryset = filtrar_por_busqueda(queryset, search_query)
             
         if estado_filter:
             queryset = queryset.filter(estado_actual=estado_filter)
@@ -1632,170 +1547,114 @@ class CandidatoListView(LoginRequiredMixin, ListView):
         
         return context
 
-def format_date(dt):
-    if isinstance(dt, date):
-        return dt.strftime('%Y-%m-%d')
-    return ''
-
-def format_bool(val):
-    if val is True:
-        return 'Sí'
-    elif val is False:
-        return 'No'
-    return ''
-
 class CandidatoExportView(LoginRequiredMixin, View):
     
     def get(self, request, *args, **kwargs):
         
-        search_query = request.GET.get('search')
-        estado_filter = request.GET.get('estado')
-        motivo_descarte_filter = request.GET.get('descarte')
-        fecha_inicio_str = request.GET.get('fecha_inicio')
-        fecha_final_str = request.GET.get('fecha_final')
-        
-        candidatos_qs = Candidato.objects.all()
-                
-        # Aplicar filtros de texto y estado
-        if search_query:
-            candidatos_qs = candidatos_qs.filter(
-                Q(DNI__icontains=search_query) | 
-                Q(nombres_completos__icontains=search_query)
-            )
-            
-        if estado_filter:
-            candidatos_qs = candidatos_qs.filter(estado_actual=estado_filter)
-        
-        if motivo_descarte_filter:
-            candidatos_qs = candidatos_qs.filter(motivo_descarte=motivo_descarte_filter)
-            
-        # Aplicar filtros de rango de fechas
-        if fecha_inicio_str:
-            try:
-                fecha_inicio = datetime.strptime(fecha_inicio_str, '%Y-%m-%d').date()
-                candidatos_qs = candidatos_qs.filter(fecha_registro__gte=fecha_inicio)
-            except ValueError:
-                pass
-        
-        if fecha_final_str:
-            try:
-                fecha_final_date = datetime.strptime(fecha_final_str, '%Y-%m-%d').date()
-                fecha_final_dt = datetime.combine(fecha_final_date, time.max)
-                candidatos_qs = candidatos_qs.filter(fecha_registro__lte=fecha_final_dt)
-            except ValueError:
-                pass
-        
-        # Optimización
-        proceso_queryset = Proceso.objects.order_by('-fecha_inicio').select_related('supervisor', 'empresa_proceso')
-        
-        candidatos_qs = candidatos_qs.order_by('fecha_registro').select_related(
-            'sede_registro',
-            'datoscualificacion' 
-        ).prefetch_related(
-            models.Prefetch('procesos', queryset=proceso_queryset, to_attr='latest_proceso_list')
-        )
-        
-        candidatos_a_exportar = list(candidatos_qs)
-        
-        # FUNCIONES AUXILIARES
-        def format_date(date_field):
-            return date_field.strftime('%d/%m/%Y') if date_field else ''
-        
-        def format_bool(bool_field):
-            if bool_field is True: return 'SÍ'
-            if bool_field is False: return 'NO'
-            return 'N/A' 
-        
-        # PREPARACIÓN DE DATOS
-        data = []
-        for c in candidatos_a_exportar:
-            ultimo_proceso = c.latest_proceso_list[0] if c.latest_proceso_list else None
-            cualificacion = getattr(c, 'datoscualificacion', None) 
-
-            row = {
-                'DNI': c.DNI,
-                'Nombres_Completos': c.nombres_completos,
-                'Telefono_Whatsapp': c.telefono_whatsapp,
-                'Email': c.email if c.email else '',
-                'Edad': c.edad,
-                'Distrito_Candidato': c.distrito, 
-                'Estado_Actual_Candidato': c.get_estado_actual_display(), 
-                'Fecha_Registro': format_date(c.fecha_registro),
-                'Sede_Registro': c.sede_registro.nombre if c.sede_registro else 'N/A',
-                'Secundaria_Completa': format_bool(cualificacion.secundaria_completa) if cualificacion else '',
-                'Exp_Campanas_Espanolas': format_bool(cualificacion.experiencia_campanas_espanolas) if cualificacion else '', 
-                'Tipo_Exp_Ventas': cualificacion.get_experiencia_ventas_tipo_display() if cualificacion else '', 
-                'Empresa_Exp_Ventas': cualificacion.empresa_vendedor if cualificacion else '',
-                'Tiempo_Experiencia_Vendedor': cualificacion.get_tiempo_experiencia_vendedor_display() if cualificacion else '', 
-                'Conforme_Beneficios': cualificacion.get_conforme_beneficios_display() if cualificacion else '',
-                'Detalle_Beneficios_Otro': cualificacion.detalle_beneficios_otro if cualificacion else '', 
-                'Disponibilidad_Horario': format_bool(cualificacion.disponibilidad_horario) if cualificacion else '',
-                'Discapacidad_Enfermedad_Cronica': cualificacion.discapacidad_enfermedad_cronica if cualificacion else '',
-                'Dificultad_Habla': format_bool(cualificacion.dificultad_habla) if cualificacion else '',
-                'Empresa_Cliente': ultimo_proceso.empresa_proceso.nombre if ultimo_proceso and ultimo_proceso.empresa_proceso else '',
-                'Fecha_Convocatoria': format_date(ultimo_proceso.fecha_inicio) if ultimo_proceso else '',
-                'Fecha_Confirmado': format_date(ultimo_proceso.fecha_confirmado) if ultimo_proceso else '' ,
-                'Fecha_Teorico': format_date(ultimo_proceso.fecha_teorico) if ultimo_proceso else '',
-                'Fecha_Practico': format_date(ultimo_proceso.fecha_practico) if ultimo_proceso else '',
-                'Fecha_Contratacion': format_date(ultimo_proceso.fecha_contratacion) if ultimo_proceso else '',
-                'Supervisor_Asignado': ultimo_proceso.supervisor.nombre if ultimo_proceso and ultimo_proceso.supervisor else '',
-                'Estado_Proceso': ultimo_proceso.get_estado_display() if ultimo_proceso else 'N/A', 
-            }
-            data.append(row)
-        
-        # GENERACIÓN DEL EXCEL
-        column_names = [
-            'DNI', 'Nombres_Completos', 'Telefono_Whatsapp', 'Email', 'Edad', 'Distrito_Candidato', 
-            'Estado_Actual_Candidato', 'Fecha_Registro', 'Sede_Registro', 
-            'Secundaria_Completa', 'Exp_Campanas_Espanolas', 'Tipo_Exp_Ventas', 
-            'Empresa_Exp_Ventas', 'Tiempo_Experiencia_Vendedor', 'Conforme_Beneficios', 
-            'Detalle_Beneficios_Otro', 'Disponibilidad_Horario', 'Discapacidad_Enfermedad_Cronica', 
-            'Dificultad_Habla', 'Empresa_Cliente', 'Fecha_Convocatoria', 'Fecha_Confirmado', 
-            'Fecha_Teorico', 'Fecha_Practico', 'Fecha_Contratacion', 'Supervisor_Asignado', 
-            'Estado_Proceso'
-        ]
-        
-        df = pd.DataFrame(data, columns=column_names)
-        df = df.fillna('')
-        df.columns = df.columns.astype(str) 
+        formato = formato_export(request.GET)
+        if formato is None:
+            return HttpResponseBadRequest(f"Formato no disponible. Use: {', '.join(formatos_disponibles())}.")
+
+        parametros = parametros_export_candidatos(request.GET)
+        filas = filas_candidatos(candidatos_para_exportar(parametros))
+
+        nombre_base = f"candidatos_reporte_{date.today().strftime('%Y%m%d')}"
+        return respuesta_exportacion(filas, COLUMNAS_CANDIDATO, "Candidatos_Reporte", nombre_base, formato)
+
+
+def _trabajo_exportacion_json(trabajo):
+    return {
+        'id': trabajo.pk,
+        'estado': trabajo.estado,
+        'progreso': trabajo.progreso,
+        'total_filas': trabajo.total_filas,
+        'filas_procesadas': trabajo.filas_procesadas,
+        'error': trabajo.error,
+        'url_estado': reverse('exportacion_trabajo_estado', args=[trabajo.pk]),
+        'url_descarga': (
+            reverse('exportacion_trabajo_descargar', args=[trabajo.pk])
+            if trabajo.estado == 'COMPLETADO' else None
+        ),
+    }
 
-        output = io.BytesIO()
-        writer = pd.ExcelWriter(output, engine='openpyxl') 
-            
-        nombre_hoja = f"Candidatos_Reporte"[:31]
-        df.to_excel(writer, sheet_name=nombre_hoja, index=False)
 
-        # AJUSTE ROBUSTO DE ANCHO DE COLUMNA
-        worksheet = writer.sheets[nombre_hoja]
-        
-        for col_idx, column in enumerate(column_names):
-            # Usamos el nombre de la columna para asegurar un ancho mínimo
-            max_len = len(column) 
-            
-            # Si hay datos, calculamos la longitud máxima real
-            if not df.empty:
-                try:
-                    max_data_len = df[column].astype(str).str.len().max()
-                    max_len = max(max_len, max_data_len)
-                except Exception:
-                    pass
-            
-            final_width = min(max_len + 2, 40)
-            col_letter = get_column_letter(col_idx + 1)
-            worksheet.column_dimensions[col_letter].width = final_width
-                
-        writer.close() 
+def _trabajo_exportacion_del_usuario(request, **filtros):
+    """Trabajo de exportación visible para el usuario: los propios o cualquiera si es staff."""
+    trabajos = TrabajoExportacion.objects.all()
+    if not request.user.is_staff:
+        trabajos = trabajos.filter(usuario=request.user)
+    return get_object_or_404(trabajos, **filtros)
 
-        output.seek(0)
 
-        filename = f"candidatos_reporte_{date.today().strftime('%Y%m%d')}.xlsx"
+class ExportacionTrabajoCrearView(LoginRequiredMixin, View):
+    """
+    POST con los mismos filtros de CandidatoExportView: genera el XLSX en segundo plano
+    y devuelve el trabajo para consultar su avance.
+    """
+
+    def post(self, request, *args, **kwargs):
+        formato = formato_export(request.POST if 'formato' in request.POST else request.GET)
+        if formato is None:
+            return JsonResponse({'error': f"Formato no disponible. Use: {', '.join(formatos_disponibles())}."}, status=400)
+
+        parametros = parametros_export_candidatos(request.GET)
+        parametros.update(parametros_export_candidatos(request.POST))
+        parametros['formato'] = formato
+        trabajo = encolar_exportacion(parametros, usuario=request.user)
+        return JsonResponse(_trabajo_exportacion_json(trabajo), status=202)
+
 
-        response = HttpResponse(
-            output,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+class ExportacionTrabajoEstadoView(LoginRequiredMixin, View):
+
+    def get(self, request, pk, *args, **kwargs):
+        trabajo = _trabajo_exportacion_del_usuario(request, pk=pk)
+        return JsonResponse(_trabajo_exportacion_json(trabajo))
+
+
+class ExportacionTrabajoDescargarView(LoginRequiredMixin, View):
+
+    def get(self, request, pk, *args, **kwargs):
+        trabajo = _trabajo_exportacion_del_usuario(request, pk=pk, estado='COMPLETADO')
+        if not trabajo.archivo or not trabajo.archivo.storage.exists(trabajo.archivo.name):
+            raise Http404("El archivo de la exportación ya no está disponible.")
+
+        content_type, extension, _ = FORMATOS_EXPORT[trabajo.parametros.get('formato', FORMATO_EXPORT_POR_DEFECTO)]
+        filename = f"candidatos_reporte_{timezone.localtime(trabajo.fecha_creacion).strftime('%Y%m%d')}.{extension}"
+        return FileResponse(
+            trabajo.archivo.open('rb'), as_attachment=True, filename=filename, content_type=content_type
         )
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+
+VALID_ATTENDANCE_STATES = ['CONVOCADO', 'CONFIRMADO', 'TEORIA', 'PRACTICA']
+
+def _anotar_resumen_asistencia(queryset, estados=VALID_ATTENDANCE_STATES):
+    """
+    Anota totales, último movimiento y asistencia de hoy leyendo ResumenAsistenciaDiaria
+    (una fila por candidato/proceso/día) en lugar de agregar RegistroAsistencia.
+    """
+    hoy = timezone.localdate()
+    en_estado = Q(resumenes_asistencia__proceso__estado__in=estados)
+
+    ultimo_resumen = ResumenAsistenciaDiaria.objects.filter(
+        candidato=OuterRef('pk'),
+        proceso__estado__in=estados,
+    ).order_by('-fecha', '-ultimo_momento')
+
+    resumen_hoy = ResumenAsistenciaDiaria.objects.filter(
+        candidato=OuterRef('pk'),
+        fecha=hoy,
+    ).exclude(ultimo_estado='').order_by('-ultimo_momento')
+
+    return queryset.annotate(
+        total_registros=Coalesce(Sum('resumenes_asistencia__registros', filter=en_estado), 0),
+        total_tardanzas=Coalesce(Sum('resumenes_asistencia__tardanzas', filter=en_estado), 0),
+        total_faltas=Coalesce(Sum('resumenes_asistencia__faltas', filter=en_estado), 0),
+        total_asistencias_puntuales=Coalesce(Sum('resumenes_asistencia__asistencias', filter=en_estado), 0),
+
+        ultima_fase=Subquery(ultimo_resumen.values('ultima_fase')[:1], output_field=models.CharField()),
+        ultimo_movimiento=Subquery(ultimo_resumen.values('ultimo_movimiento')[:1], output_field=models.CharField()),
+        ultimo_registro_momento=Subquery(ultimo_resumen.values('ultimo_momento')[:1], output_field=models.DateTimeField()),
+        asistencia_hoy=Subquery(resumen_hoy.values('ultimo_estado')[:1], output_field=models.CharField()),
+    )
 
 class CandidatoAsistenciaListView(LoginRequiredMixin, ListView):
     model = Candidato
@@ -1805,72 +1664,34 @@ class CandidatoAsistenciaListView(LoginRequiredMixin, ListView):
     ordering = ['-total_registros', '-fecha_registro'] 
 
     def get_queryset(self):
-        hoy = timezone.localdate()
-
-        VALID_ATTENDANCE_STATES = ['CONVOCADO','CONFIRMADO', 'TEORIA', 'PRACTICA']
         DEFAULT_STATE_SUPERVISOR = 'PRACTICA' 
-        
-        proceso_filter_q = Q(procesos__estado__in=VALID_ATTENDANCE_STATES)
-        
-        latest_attendance = RegistroAsistencia.objects.filter(
-            candidato=OuterRef('pk'),
-            proceso__estado__in=VALID_ATTENDANCE_STATES
-        ).order_by('-momento_registro').values(
-            'momento_registro', 'fase_actual', 'movimiento', 'estado'
-        )[:1]
-        
-        asistencia_hoy = RegistroAsistencia.objects.filter(
-            candidato=OuterRef('pk'),
-            momento_registro__date=hoy
-        ).exclude(estado=None).order_by('-momento_registro').values('estado')[:1]
-        
-        queryset = Candidato.objects.annotate(
-            total_registros=Count('registroasistencia', filter=proceso_filter_q, distinct=True),
-            total_tardanzas=Count('registroasistencia', filter=Q(registroasistencia__estado='T') & proceso_filter_q),
-            total_faltas=Count('registroasistencia', filter=Q(registroasistencia__estado='F') & proceso_filter_q),
-            total_asistencias_puntuales=Count('registroasistencia', filter=Q(registroasistencia__estado='A') & proceso_filter_q),
-            
-            ultima_fase=Subquery(latest_attendance.values('fase_actual')[:1], output_field=models.CharField()),
-            ultimo_movimiento=Subquery(latest_attendance.values('movimiento')[:1], output_field=models.CharField()),
-            ultimo_registro_momento=Subquery(latest_attendance.values('momento_registro')[:1], output_field=models.DateTimeField()),
-            asistencia_hoy=Subquery(asistencia_hoy, output_field=models.CharField())
-        ).filter(
-            procesos__estado__in=VALID_ATTENDANCE_STATES
-        )
-        
+
         search_query = self.request.GET.get('search')
         estado_filter = self.request.GET.get('estado')
         supervisor_filter = self.request.GET.get('supervisor')
-        
+
+        # Exists en lugar del join con procesos: evita filas duplicadas y el .distinct().
+        procesos = Proceso.objects.filter(candidato=OuterRef('pk'))
+
         if supervisor_filter: 
-            queryset = queryset.filter(
-                procesos__estado=DEFAULT_STATE_SUPERVISOR,
-                procesos__supervisor__pk=supervisor_filter
-            )
-        
+            procesos = procesos.filter(estado=DEFAULT_STATE_SUPERVISOR, supervisor__pk=supervisor_filter)
         elif estado_filter:
-            queryset = queryset.filter(procesos__estado=estado_filter)
-            
+            procesos = procesos.filter(estado=estado_filter)
+        else:
+            procesos = procesos.filter(estado__in=VALID_ATTENDANCE_STATES)
+
+        queryset = Candidato.objects.filter(Exists(procesos))
+
         if search_query:
-            queryset = queryset.filter(
-                Q(DNI__icontains=search_query) | 
-                Q(nombres_completos__icontains=search_query)
-            )
-            
-        queryset = queryset.distinct() 
-            
-        return queryset.order_by(*self.ordering)
+            queryset = filtrar_por_busqueda(queryset, search_query)
+
+        return _anotar_resumen_asistencia(queryset).order_by(*self.ordering)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        VALID_ATTENDANCE_STATES = ['CONVOCADO','CONFIRMADO', 'TEORIA', 'PRACTICA']
         DEFAULT_STATE_SUPERVISOR = 'PRACTICA'
         
-        estado_is_in_get = 'estado' in self.request.GET
-        supervisor_is_in_get = 'supervisor' in self.request.GET
-        is_initial_load = not estado_is_in_get and not supervisor_is_in_get
-
         active_filters = self.request.GET.dict().copy()
         
         if 'supervisor' in active_filters and active_filters.get('supervisor'):
@@ -1885,29 +1706,23 @@ class CandidatoAsistenciaListView(LoginRequiredMixin, ListView):
             if key in VALID_ATTENDANCE_STATES
         ] 
         
-        candidato_dnies_activos = Candidato.objects.filter(
-            procesos__estado__in=VALID_ATTENDANCE_STATES
-        ).values_list('DNI', flat=True)
+        candidatos_activos = Proceso.objects.filter(
+            estado__in=VALID_ATTENDANCE_STATES
+        ).values('candidato')
 
-        conteo_global_registros = RegistroAsistencia.objects.filter(
-            candidato__DNI__in=candidato_dnies_activos
+        conteo_global_registros = ResumenAsistenciaDiaria.objects.filter(
+            candidato__in=candidatos_activos
         ).aggregate(
-            A=Count('pk', filter=Q(estado='A')), 
-            T=Count('pk', filter=Q(estado='T')), 
-            F=Count('pk', filter=Q(estado='F')),
+            A=Coalesce(Sum('asistencias'), 0),
+            T=Coalesce(Sum('tardanzas'), 0),
+            F=Coalesce(Sum('faltas'), 0),
         )
         
-        conteo_dict = {
-            'A': conteo_global_registros.get('A', 0),
-            'T': conteo_global_registros.get('T', 0),
-            'F': conteo_global_registros.get('F', 0),
-        }
-        
         context['FASES_ASISTENCIA'] = RegistroAsistencia.FASE_ASISTENCIA 
         context['MOVIMIENTO_MAP'] = dict(RegistroAsistencia.TIPO_MOVIMIENTO) 
         
-        context['total_candidatos'] = Candidato.objects.filter(procesos__estado__in=VALID_ATTENDANCE_STATES).count()
-        context['conteo_asistencias'] = conteo_dict
+        context['total_candidatos'] = Candidato.objects.filter(pk__in=candidatos_activos).count()
+        context['conteo_asistencias'] = conteo_global_registros
         context['current_year'] = date.today().year
 
         return context
@@ -2289,15 +2104,6 @@ class ListaCandidatosPorFechaView(LoginRequiredMixin, View):
         
         return render(request, 'includes/modal_gestion_candidatos.html', context)
     
-PROCESO_ESTADO_MAP = {
-    'REGISTRADOS': 'REGISTRADO', 
-    'CONVOCADOS': 'CONVOCADO',  
-    'CONFIRMADOS': 'CONFIRMADO',   
-    'TEORIA': 'TEORIA',           
-    'PRACTICA': 'PRACTICA',       
-    'CONTRATADOS': 'CONTRATADO',  
-}
-
 class MensajeriaDashboardView(LoginRequiredMixin, TemplateView):
     """Renderiza la interfaz principal del módulo de mensajería."""
     template_name = 'dashboard_mensajeria.html' # Ajusta a tu ruta real
@@ -2312,7 +2118,7 @@ class MensajeriaDashboardView(LoginRequiredMixin, TemplateView):
         return context
     
 class MensajeriaAPIView(LoginRequiredMixin, View):
-    """API para obtener fechas y contactos por proceso/fecha."""
+    """API para obtener fechas y contactos por proceso/fecha (ver utils/audiencias.py)."""
     
     def get(self, request, *args, **kwargs):
         accion = request.GET.get('accion')
@@ -2324,19 +2130,26 @@ class MensajeriaAPIView(LoginRequiredMixin, View):
         if proceso_tipo not in PROCESO_ESTADO_MAP:
             return JsonResponse({'status': 'error', 'message': 'Tipo de proceso no válido.'}, status=400)
         
-        estado_db = PROCESO_ESTADO_MAP[proceso_tipo]
-        
         try:
             if accion == 'get_fechas':
-                fechas_disponibles = self._get_fechas_disponibles(proceso_tipo, estado_db)
-                return JsonResponse({'status': 'success', 'fechas': fechas_disponibles})
+                return JsonResponse({'status': 'success', 'fechas': fechas_disponibles(proceso_tipo)})
             
             elif accion == 'get_contactos':
                 fecha_str = request.GET.get('fecha')
                 if not fecha_str:
                     return JsonResponse({'status': 'error', 'message': 'Falta la fecha.'}, status=400)
+
+                filtro = request.GET.get('filtro') or None
+                if filtro and filtro not in FILTROS_AUDIENCIA:
+                    return JsonResponse({'status': 'error', 'message': 'Filtro de audiencia no válido.'}, status=400)
+
+                try:
+                    fecha_obj = date.fromisoformat(fecha_str)
+                    dias = int(request.GET.get('dias') or DIAS_SIN_LECTURA)
+                except ValueError:
+                    return JsonResponse({'status': 'success', 'contactos': []})
                     
-                contactos = self._get_contactos_por_filtro(proceso_tipo, estado_db, fecha_str)
+                contactos = contactos_audiencia(proceso_tipo, fecha_obj, filtro, dias)
                 return JsonResponse({'status': 'success', 'contactos': contactos})
         
         except Exception as e:
@@ -2344,179 +2157,62 @@ class MensajeriaAPIView(LoginRequiredMixin, View):
         
         return JsonResponse({'status': 'error', 'message': 'Acción desconocida.'}, status=400)
 
-    def _get_fechas_disponibles(self, proceso_tipo, estado_db):
-        """
-        Obtiene las fechas únicas disponibles para el estado seleccionado.
-        """
-        if proceso_tipo == 'REGISTRADOS':
-            fechas = Candidato.objects.filter(
-                estado_actual=estado_db, #
-                kanban_activo=True, 
-                telefono_whatsapp__isnull=False 
-            ).dates('fecha_registro', 'day', order='DESC') 
-            
-        else:
-          
-            fechas = Proceso.objects.filter(
-                estado=estado_db, 
-                candidato__telefono_whatsapp__isnull=False 
-            ).dates('fecha_inicio', 'day', order='DESC')
-            
-        return [f.strftime('%Y-%m-%d') for f in fechas]
-    
-    def _get_contactos_por_filtro(self, proceso_tipo, estado_db, fecha_str):
-        """
-        Obtiene la lista de contactos y anota la cantidad de mensajes exitosos 
-        enviados a cada uno, sin aplicar filtros de exclusión.
-        """
-        try:
-            fecha_obj = date.fromisoformat(fecha_str)
-        except ValueError:
-            return []
-            
-        if proceso_tipo == 'REGISTRADOS':
-            qs = Candidato.objects.filter(
-                estado_actual=estado_db,
-                fecha_registro=fecha_obj,
-                kanban_activo=True,
-                telefono_whatsapp__isnull=False
-            )
-        else:
-            qs = Candidato.objects.filter(
-                procesos__estado=estado_db,
-                procesos__fecha_inicio=fecha_obj,
-                telefono_whatsapp__isnull=False
-            ).distinct()
-            
-        estados_exitosos = ['ENVIADO', 'ENTREGADO', 'LEIDO']
-        
-        qs = qs.annotate(
-            conteo_envios_exitosos=Count(
-                'detalleenvio', 
-                filter=Q(detalleenvio__estado_meta__in=estados_exitosos)
-            )
-        ).values('pk', 'DNI', 'nombres_completos', 'telefono_whatsapp', 'conteo_envios_exitosos')
-        
-        return list(qs)
-
-class HistorialEnviosJsonView(ListView):
+class HistorialEnviosJsonView(LoginRequiredMixin, View):
     """
-    API: Retorna la lista general de tareas para el Modal.
+    API: Retorna el historial de tareas para el Modal, paginado por cursor (ver
+    utils/historial_envios.pagina_historial para los parámetros). Una página de campañas
+    terminadas lleva ETag/Last-Modified y responde 304 si no cambió.
     """
-    model = TareaEnvioMasivo
-    
-    def get_queryset(self):
-        return TareaEnvioMasivo.objects.annotate(
-            tasa_exito_db=ExpressionWrapper(
-                F('total_entregados') * 100.0 / F('total_contactos'),
-                output_field=FloatField()
-            )
-        ).values(
-            'id', 
-            'total_entregados', 
-            'total_contactos', 
-            'fecha_origen', 
-            'fecha_inicio',
-            'estado',
-            'tasa_exito_db',
-            'proceso_tipo', 
-            'mensaje_plantilla__titulo' 
-        ).order_by('-fecha_inicio')
 
     def get(self, request, *args, **kwargs):
-        object_list = self.get_queryset() 
-        data = []
-        
-        for tarea in object_list:
-            tasa_exito_valor = round(tarea['tasa_exito_db'], 1) if tarea['total_contactos'] else 0.0
-            
-            estado_obj = TareaEnvioMasivo(estado=tarea['estado'])
-            proceso_obj = TareaEnvioMasivo(proceso_tipo=tarea['proceso_tipo'])
-            
-            data.append({
-                'id': tarea['id'],
-                'proceso': tarea['proceso_tipo'], 
-                'proceso_display': f"{proceso_obj.get_proceso_tipo_display()}", 
-                'fechaOrigen': tarea['fecha_origen'].strftime('%Y-%m-%d'),
-                'enviados': tarea['total_entregados'],
-                'total': tarea['total_contactos'],
-                'tasa_exito': tasa_exito_valor,
-                'fechaEnvio': timezone.localtime(tarea['fecha_inicio']).strftime('%d/%m/%Y %H:%M'),
-                'estado': tarea['estado'], 
-                'estado_display': estado_obj.get_estado_display()
-            })
-            
-        return JsonResponse({'status': 'success', 'historialData': data})   
+        try:
+            data, siguiente, filas = pagina_historial(request.GET)
+        except ParametroInvalido as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+        validadores_pagina = None
+        if filas and all(t['estado'] in ESTADOS_TERMINADOS for t in filas):
+            validadores_pagina = validadores(request, [(t['id'], t['fecha_actualizacion']) for t in filas])
+            no_modificado = respuesta_condicional(request, *validadores_pagina)
+            if no_modificado is not None:
+                return no_modificado
+
+        response = JsonResponse({'status': 'success', 'historialData': data, 'siguiente': siguiente})
+        if validadores_pagina:
+            con_validadores(response, *validadores_pagina)
+        return response
 
 class DetalleTareaJsonView(LoginRequiredMixin, View):
     """
     API: Retorna la lista de personas (DetalleEnvio) de una Tarea específica.
-    Se llama cuando das click en el botón de 'ojo' en la tabla.
+    Se llama cuando das click en el botón de 'ojo' en la tabla. Paginada por cursor
+    (limite, cursor, campos, estado); si la tarea terminó responde 304 mientras no cambie.
     """
     def get(self, request, tarea_id):
+        tarea = TareaEnvioMasivo.objects.filter(pk=tarea_id).values('estado', 'fecha_actualizacion').first()
+        if tarea is None:
+            return JsonResponse({'status': 'error', 'message': 'Tarea no encontrada.'}, status=404)
+
+        validadores_tarea = None
+        if tarea['estado'] in ESTADOS_TERMINADOS:
+            validadores_tarea = validadores(request, [(tarea_id, tarea['fecha_actualizacion'])])
+            no_modificado = respuesta_condicional(request, *validadores_tarea)
+            if no_modificado is not None:
+                return no_modificado
+
         try:
-            detalles = DetalleEnvio.objects.filter(tarea_envio_id=tarea_id).select_related('contacto').order_by('estado_meta')
-            
-            data_detalles = []
-            for d in detalles:
-                nombre = d.contacto.nombres_completos if d.contacto else "Contacto Eliminado"
-                dni = d.contacto.DNI if d.contacto else "---"
-                
-                data_detalles.append({
-                    'dni': dni,
-                    'nombre': nombre,
-                    'telefono': d.telefono,
-                    'estado': d.get_estado_meta_display(),
-                    'estado_codigo': d.estado_meta, 
-                    'fecha_hora': timezone.localtime(d.fecha_envio).strftime('%H:%M:%S')
-                })
-            
-            return JsonResponse({'status': 'success', 'detalles': data_detalles})
-        except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+            data_detalles, siguiente = pagina_detalles(tarea_id, request.GET)
+        except ParametroInvalido as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
-ESTADOS_META_SIMULACION = ['ENTREGADO', 'LEIDO', 'ENVIADO']
-def simular_tarea_celery(tarea_id, lista_candidatos_pks, mensaje_contenido_final):
-    """
-    Simulación de la función que Celery ejecutaría en segundo plano. 
-    Guarda los DetalleEnvio para cada candidato y actualiza el conteo de la Tarea.
-    """
-    print(f"Tarea Celery ID {tarea_id} iniciada para {len(lista_candidatos_pks)} candidatos.")
-    tarea = TareaEnvioMasivo.objects.get(pk=tarea_id)
-    
-    candidatos_qs = Candidato.objects.filter(pk__in=lista_candidatos_pks).distinct()
-    
-    total_entregados = 0
-    total_fallidos = 0
+        payload = {'status': 'success', 'detalles': data_detalles, 'siguiente': siguiente}
+        if not request.GET.get('cursor'):
+            payload['total'] = DetalleEnvio.objects.filter(tarea_envio_id=tarea_id).count()
 
-    detalles_a_crear = []
-    
-    for candidato in candidatos_qs:
-        estado_simulado = choice(ESTADOS_META_SIMULACION) 
-        id_meta_simulado = f"wamid.{randint(100000000000, 999999999999)}" if estado_simulado != 'FALLIDO' else None
-        
-        if estado_simulado in ['ENTREGADO', 'LEIDO', 'ENVIADO']:
-            total_entregados += 1
-        else:
-            total_fallidos += 1
-            
-        detalles_a_crear.append(DetalleEnvio(
-            tarea_envio=tarea,
-            contacto=candidato,
-            telefono=candidato.telefono_whatsapp, 
-            contenido_final=mensaje_contenido_final.replace('{nombres_completos}', candidato.nombres_completos), 
-            estado_meta=estado_simulado,
-            id_mensaje_meta=id_meta_simulado,
-        ))
-
-    DetalleEnvio.objects.bulk_create(detalles_a_crear)
-    
-    tarea.total_entregados = total_entregados
-    tarea.total_fallidos = total_fallidos
-    tarea.estado = 'COMPLETADO' 
-    tarea.save()
-    
-    print(f"Tarea Celery ID {tarea_id} completada. Entregados: {total_entregados}, Fallidos: {total_fallidos}")
+        response = JsonResponse(payload)
+        if validadores_tarea:
+            con_validadores(response, *validadores_tarea)
+        return response
 
 class IniciarEnvioMasivoView(View):
     def post(self, request, *args, **kwargs):
@@ -2532,12 +2228,15 @@ class IniciarEnvioMasivoView(View):
             }, status=400) 
             
         try:
-            plantilla, created = MensajePlantilla.objects.get_or_create(
-                contenido_texto=mensaje_contenido, 
-                defaults={
-                    'titulo': f'MENSAJE AD HOC - {timezone.now().strftime("%Y%m%d%H%M%S")}-{request.user.pk}',
-                    'creado_por': request.user, 
-                }
+            validar_texto(mensaje_contenido)
+        except PlantillaInvalida as e:
+            return JsonResponse({'success': False, 'message': str(e), 'variables_invalidas': e.variables}, status=400)
+
+        try:
+            plantilla = MensajePlantilla.para_texto(
+                mensaje_contenido,
+                titulo=f'MENSAJE AD HOC - {timezone.now().strftime("%Y%m%d%H%M%S")}-{request.user.pk}',
+                creado_por=request.user,
             )
             fecha_origen = date.fromisoformat(fecha_filtro_str) 
 
@@ -2547,25 +2246,25 @@ class IniciarEnvioMasivoView(View):
                 proceso_tipo=proceso_filtro,
                 fecha_origen=fecha_origen,
                 total_contactos=len(candidatos_seleccionados_pks),
+                destinatarios=candidatos_seleccionados_pks,
                 estado='PENDIENTE', 
             )
             
-            task_id_simulado = f"celery-{nueva_tarea.id}-{timezone.now().timestamp()}"
-            nueva_tarea.task_id = task_id_simulado
+            task_id = f"envio-{nueva_tarea.id}-{timezone.now().timestamp()}"
+            nueva_tarea.task_id = task_id
             nueva_tarea.estado = 'EN_PROCESO'
             nueva_tarea.save()
             
-            simular_tarea_celery(
-                nueva_tarea.id, 
-                candidatos_seleccionados_pks, 
-                mensaje_contenido 
-            )
+            encolar_envio_masivo(nueva_tarea.id)
+
+            fin_estimado = CupoEnvioWhatsApp.del_numero().estimar_fin(len(candidatos_seleccionados_pks))
             
             return JsonResponse({
                 'success': True, 
                 'message': 'Envío masivo iniciado correctamente.',
                 'tarea_id': nueva_tarea.id,
-                'task_id': task_id_simulado
+                'task_id': task_id,
+                'fin_estimado': timezone.localtime(fin_estimado).strftime('%d/%m/%Y %H:%M') if fin_estimado else None,
             }, status=202)
 
         except ValueError:
@@ -2578,38 +2277,16 @@ class IniciarEnvioMasivoView(View):
 def actualizar_fila_y_contadores(request: HttpRequest, candidato_pk: int) -> HttpResponse:
     hoy = timezone.localdate()
     
-    conteo_global = RegistroAsistencia.objects.filter(
-        momento_registro__date=hoy
-    ).exclude(estado=None).values('estado').annotate(count=Count('estado'))
-    
-    conteo_dict = {item['estado']: item['count'] for item in conteo_global}
+    conteo_dict = ResumenAsistenciaDiaria.objects.filter(fecha=hoy).aggregate(
+        A=Coalesce(Sum('asistencias'), 0),
+        T=Coalesce(Sum('tardanzas'), 0),
+        F=Coalesce(Sum('faltas'), 0),
+        J=Coalesce(Sum('justificados'), 0),
+    )
     
     total_candidatos = Candidato.objects.exclude(procesos__estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO']).count() 
 
-    latest_attendance = RegistroAsistencia.objects.filter(
-        candidato=OuterRef('pk')
-    ).order_by('-momento_registro').values(
-        'momento_registro', 'fase_actual', 'movimiento', 'estado'
-    )[:1]
-    
-    asistencia_hoy_subquery = RegistroAsistencia.objects.filter(
-        candidato=OuterRef('pk'),
-        momento_registro__date=hoy
-    ).exclude(estado=None).order_by('-momento_registro').values('estado')[:1]
-
-    proceso_filter_q = ~Q(procesos__estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO'])
-    
-    candidato = Candidato.objects.annotate(
-        total_registros=Count('procesos__registroasistencia', filter=proceso_filter_q),
-        total_tardanzas=Count('procesos__registroasistencia', filter=Q(procesos__registroasistencia__estado='T') & proceso_filter_q),
-        total_faltas=Count('procesos__registroasistencia', filter=Q(procesos__registroasistencia__estado='F') & proceso_filter_q),
-        total_asistencias_puntuales=Count('procesos__registroasistencia', filter=Q(procesos__registroasistencia__estado='A') & proceso_filter_q),
-        
-        ultima_fase=Subquery(latest_attendance.values('fase_actual'), output_field=models.CharField()),
-        ultimo_movimiento=Subquery(latest_attendance.values('movimiento'), output_field=models.CharField()),
-        ultimo_registro_momento=Subquery(latest_attendance.values('momento_registro'), output_field=models.DateTimeField()),
-        asistencia_hoy=Subquery(asistencia_hoy_subquery, output_field=models.CharField())
-    ).get(pk=candidato_pk)
+    candidato = _anotar_resumen_asistencia(Candidato.objects.all()).get(pk=candidato_pk)
     
     try:
         candidato.ultimo_registro = RegistroAsistencia.objects.filter(candidato=candidato).latest('momento_registro')
@@ -2639,113 +2316,46 @@ def registrar_asistencia_htmx(request, candidato_pk):
         return JsonResponse({'success': False, 'error': 'Método no permitido'}, status=405)
 
     try:
-        candidato = get_object_or_404(Candidato, pk=candidato_pk)
+        candidato = get_object_or_404(Candidato.objects.select_related('proceso_actual__sede_proceso'), pk=candidato_pk)
         data = json.loads(request.body)
         
         registrado_por_user = request.user if request.user.is_authenticated else None
-        momento_registro = timezone.now() 
-        zona_horaria_servidor = timezone.get_current_timezone()
-        momento_registro_aware = timezone.localtime(momento_registro, timezone=zona_horaria_servidor)
-        hoy_date = momento_registro_aware.date()
+        hoy_date = timezone.localdate()
         
-        proceso_activo = candidato.procesos.filter(
-            ~Q(estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO'])
-        ).order_by('-fecha_inicio').first()
+        proceso_activo = candidato.proceso_activo
         
         if not proceso_activo:
             return JsonResponse({'success': False, 'error': f'Candidato {candidato_pk} sin Proceso ACTIVO.'}, status=400)
-        
-        falta_existente_hoy = RegistroAsistencia.objects.filter(
-            proceso=proceso_activo,
-            momento_registro__date=hoy_date,
-            estado='F' 
-        ).exists()
-        
-        if falta_existente_hoy:
-            return JsonResponse({
-                'success': False, 
-                'error': f'⚠️ El candidato {candidato.nombres_completos} ya fue marcado como **FALTA** hoy. Contacte a soporte para corregir el estado.'
-            }, status=200)
 
-        entrada_hoy = RegistroAsistencia.objects.filter(
-            proceso=proceso_activo,
-            momento_registro__date=hoy_date,
-            movimiento='ENTRADA' 
-        ).first() 
-        
-        salida_hoy_exists = RegistroAsistencia.objects.filter(
-            proceso=proceso_activo,
-            momento_registro__date=hoy_date,
-            movimiento='SALIDA' 
-        ).exists()
-        
-        msg_accion = ""
-        
-        
-        if entrada_hoy and not salida_hoy_exists:
-            movimiento = 'SALIDA'
-            estado_final = entrada_hoy.estado 
-            
-            limite_salida_str = '14:00'
-            limite_hora_salida, limite_minuto_salida = map(int, limite_salida_str.split(':'))
-            hora_limite_salida_aware = make_aware(datetime.combine(hoy_date, time(limite_hora_salida, limite_minuto_salida)), get_current_timezone())
-            
-            if momento_registro_aware < hora_limite_salida_aware:
-                msg_accion = "⚠️ Salida registrada antes de la hora límite (14:00). Se considera Salida Temprana."
+        try:
+            registro, salida_temprana = registrar_asistencia(proceso_activo, usuario=registrado_por_user)
+        except AsistenciaRechazada as e:
+            if e.codigo == RECHAZO_FALTA_REGISTRADA:
+                error = f'⚠️ El candidato {candidato.nombres_completos} ya fue marcado como **FALTA** hoy. Contacte a soporte para corregir el estado.'
+            elif e.codigo == RECHAZO_CICLO_COMPLETO:
+                error = f'⛔ El candidato {candidato.nombres_completos} ya tiene registrado su ciclo de ENTRADA/SALIDA completo para hoy.'
             else:
-                msg_accion = "✅ Salida registrada a tiempo (14:00 o después). Fin de Jornada."
-
-        elif entrada_hoy and salida_hoy_exists:
-            return JsonResponse({
-                'success': False, 
-                'error': f'⛔ El candidato {candidato.nombres_completos} ya tiene registrado su ciclo de ENTRADA/SALIDA completo para hoy.'
-            }, status=200)
+                error = f'⛔ {e}'
+            return JsonResponse({'success': False, 'error': error}, status=200)
 
-        else: 
-            movimiento = 'ENTRADA'
-            
-            limite_entrada_str = getattr(settings, 'HORA_LIMITE_ASISTENCIA', '07:00')
-            limite_hora_entrada, limite_minuto_entrada = map(int, limite_entrada_str.split(':'))
-            
-            hora_limite_aware = make_aware(datetime.combine(hoy_date, time(limite_hora_entrada, limite_minuto_entrada)), get_current_timezone())
-            hora_limite_tardanza_aware = make_aware(datetime.combine(hoy_date, time(14, 0)), get_current_timezone())
+        movimiento = registro.movimiento
+        estado_final = registro.estado
+        fase_asistencia = registro.fase_actual
 
-            
-            if momento_registro_aware > hora_limite_tardanza_aware:
-                estado_final = 'F' 
-                msg_accion = "❌ Registro de ENTRADA FALLIDO (> 14:00). Marcado como **FALTA**." 
-            elif momento_registro_aware > hora_limite_aware:
-                estado_final = 'T' 
-                msg_accion = "⚠️ Asistencia registrada como TARDE."
+        if movimiento == 'SALIDA':
+            if salida_temprana:
+                msg_accion = "⚠️ Salida registrada antes de la hora límite. Se considera Salida Temprana."
             else:
-                estado_final = 'A' 
-                msg_accion = "✅ Asistencia registrada como PUNTUAL."
-            
-        
-        FASE_MAP = {
-            'CONVOCADO': 'CONVOCADO','CONFIRMADO': 'CONFIRMADO', 'TEORIA': 'TEORIA', 'PRACTICA': 'PRACTICA',
-            'CONTRATADO': 'PRACTICA', 'NO_APTO': 'PRACTICA', 'ABANDONO': 'PRACTICA',
-        }
-        fase_asistencia = FASE_MAP.get(proceso_activo.estado, 'CONVOCADO')
-
-        registro = RegistroAsistencia.objects.create(
-            proceso=proceso_activo, 
-            candidato=candidato,
-            estado_asistencia=estado_final, 
-            estado=estado_final, 
-            
-            movimiento=movimiento, 
-            fase_actual=fase_asistencia, 
-            registrado_por=registrado_por_user,
-            momento_registro=momento_registro 
-        )
+                msg_accion = "✅ Salida registrada a tiempo. Fin de Jornada."
+        elif estado_final == 'F':
+            msg_accion = "❌ Registro de ENTRADA FALLIDO (fuera de hora). Marcado como **FALTA**."
+        elif estado_final == 'T':
+            msg_accion = "⚠️ Asistencia registrada como TARDE."
+        else:
+            msg_accion = "✅ Asistencia registrada como PUNTUAL."
             
-        proceso_filter_q = ~Q(procesos__estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO'])
-        candidato_actualizado = Candidato.objects.filter(pk=candidato_pk).annotate(
-            total_registros=Count('procesos__registroasistencia', filter=proceso_filter_q),
-            total_tardanzas=Count('procesos__registroasistencia', filter=Q(procesos__registroasistencia__estado='T') & proceso_filter_q),
-            total_faltas=Count('procesos__registroasistencia', filter=Q(procesos__registroasistencia__estado='F') & proceso_filter_q),
-            total_asistencias_puntuales=Count('procesos__registroasistencia', filter=Q(procesos__registroasistencia__estado='A') & proceso_filter_q),
+        candidato_actualizado = _anotar_resumen_asistencia(
+            Candidato.objects.filter(pk=candidato_pk)
         ).first()
 
         if candidato_actualizado:
@@ -2756,13 +2366,14 @@ def registrar_asistencia_htmx(request, candidato_pk):
             setattr(candidato_actualizado, 'ultima_fase', fase_asistencia)
             setattr(candidato_actualizado, 'ultimo_movimiento', movimiento)
             
-        conteo_asistencias_query = RegistroAsistencia.objects.filter(
-            momento_registro__date=hoy_date,
-        ).exclude(proceso__estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO']).values('estado').annotate(
-            count=Count('estado')
-        ).order_by('estado')
-
-        conteo_dict = {item['estado']: item['count'] for item in conteo_asistencias_query}
+        conteo_dict = ResumenAsistenciaDiaria.objects.filter(
+            fecha=hoy_date,
+        ).exclude(proceso__estado__in=Proceso.ESTADOS_FINALES).aggregate(
+            A=Coalesce(Sum('asistencias'), 0),
+            T=Coalesce(Sum('tardanzas'), 0),
+            F=Coalesce(Sum('faltas'), 0),
+            J=Coalesce(Sum('justificados'), 0),
+        )
         
         total_candidatos = Candidato.objects.exclude(procesos__estado__in=['CONTRATADO', 'NO_APTO', 'ABANDONO']).count() 
 
@@ -2807,9 +2418,7 @@ class CandidatoPracticaSupervisorListView(ListView):
 
         search_query = self.request.GET.get('search')
         if search_query:
-            queryset = queryset.filter(
-                Q(dni__icontains=search_query) | Q(nombre__icontains=search_query)
-            )
+            queryset = filtrar_por_busqueda(queryset, search_query)
 
         return queryset
 
@@ -2864,6 +2473,7 @@ def iniciar_envio_mensajes(request):
     return JsonResponse({'success': False, 'message': 'Método no permitido.'}, status=405)
 
 WEBHOOK_VERIFY_TOKEN = 'TU_TOKEN_SECRETO_PARA_WEBHOOKS' 
+@method_decorator(csrf_exempt, name='dispatch')
 class WhatsappWebhookView(View):
 
     def get(self, request, *args, **kwargs):
@@ -2878,4 +2488,15 @@ class WhatsappWebhookView(View):
             return HttpResponse("Fallo en la verificación o token incorrecto.", status=403)
 
     def post(self, request, *args, **kwargs):
+        # Meta reintenta si no recibe 200 rápido: solo se encola el payload crudo y el
+        # procesamiento (utils/webhook_whatsapp) corre fuera de la petición.
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return HttpResponse(status=200)
+        # Meta siempre envía un objeto; cualquier otra cosa se descarta sin encolar.
+        if not isinstance(payload, dict):
+            return HttpResponse(status=200)
+
+        encolar_evento(payload)
         return HttpResponse(status=200)
\ No newline at end of file
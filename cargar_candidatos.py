@@ -1,14 +1,12 @@
-import re
-from datetime import date
-from django.core.exceptions import ValidationError
-from django.db import transaction
-from candidatos.models import Candidato, Sede, TipoDocumento 
+import pandas as pd
+from candidatos.models import Sede, TipoDocumento
+from candidatos.utils.importacion import ImportacionCandidatos
 
 # ==============================================================================
-# CONFIGURACIÓN DE LA FECHA BASE Y SEDE POR DEFECTO
+# CONFIGURACIÓN DE LA SEDE POR DEFECTO
+# Para listas grandes usar: python manage.py importar_candidatos archivo.xlsx --sede 1
 # ==============================================================================
 
-FECHA_REGISTRO_BASE = date(2025, 10, 1)
 SEDE_DEFECTO_ID = 1 
 # Asumimos que el DNI es el TipoDocumento con PK=1 (creado en el shell)
 TIPO_DOCUMENTO_DNI_ID = 1 
@@ -57,25 +55,12 @@ DATA_RAW = [
 ]
 
 # ==============================================================================
-# LÓGICA DE LIMPIEZA Y CARGA
+# CARGA (misma lógica que manage.py importar_candidatos)
 # ==============================================================================
 
-def clean_dni(dni):
-    """Limpia el DNI y asegura que tenga 8 dígitos (para esta carga)."""
-    if dni is None: return None
-    dni = re.sub(r'\D', '', str(dni).strip()) 
-    return dni if len(dni) == 8 else None
-
-def clean_phone(phone):
-    """Limpia el número de teléfono, mantiene los últimos 9 dígitos."""
-    if phone is None: return ''
-    phone = re.sub(r'\D', '', str(phone)) 
-    
-    return phone[-9:] if len(phone) >= 9 else phone
-
 def run_data_upload():
     """Función principal para cargar y actualizar los candidatos."""
-    print("--- INICIANDO CARGA DE CANDIDATOS (REGISTRADOS 01/10/2025) ---")
+    print("--- INICIANDO CARGA DE CANDIDATOS ---")
     
     try:
         # Recuperar objetos FK (Sede y TipoDocumento)
@@ -88,90 +73,12 @@ def run_data_upload():
         print(f"ERROR: No se encontró el TipoDocumento DNI con PK={TIPO_DOCUMENTO_DNI_ID}. ¡Correr el shell para crearlo!")
         return
 
-    candidatos_a_crear = []
-    dnies_validos = set()
-    total_registros = 0
-    
-    # 1. Unificar y limpiar los datos
-    print("1. Limpiando y unificando datos...")
-    
-    for data in DATA_RAW:
-        dni = clean_dni(data['DNI'])
-        telefono = clean_phone(data['telefono_whatsapp'])
-        total_registros += 1
-
-        if not dni:
-            print(f"Advertencia: DNI inválido (no 8 dígitos) para {data['nombres_completos']}")
-            continue
-
-        if dni not in dnies_validos:
-            dnies_validos.add(dni)
-            candidatos_a_crear.append({
-                'DNI': dni,
-                'nombres_completos': data['nombres_completos'].strip(),
-                'telefono_whatsapp': telefono,
-                'estado_actual': 'REGISTRADO',
-                'fecha_registro': FECHA_REGISTRO_BASE, 
-                'sede_registro': sede_defecto,
-                'tipo_documento': tipo_documento_dni, # <<-- CAMBIO CLAVE
-                'email': None,
-            })
-            
-    print(f"Registros únicos y válidos a procesar: {len(candidatos_a_crear)}")
-    
-    # 2. Iterar y hacer el Create/Update final
-    created_count = 0
-    updated_count = 0
-    error_count = 0
-    
-    print("\n2. Actualizando/Creando en la Base de Datos...")
-
-    with transaction.atomic():
-        for data in candidatos_a_crear:
-            try:
-                # Intentar obtener el candidato (usando DNI como PK)
-                candidato = Candidato.objects.filter(pk=data['DNI']).first()
-                
-                if candidato:
-                    # Candidato existe (por DNI/PK)
-                    update_fields = {}
-                    
-                    if candidato.nombres_completos != data['nombres_completos']:
-                        update_fields['nombres_completos'] = data['nombres_completos']
-                        
-                    if candidato.telefono_whatsapp != data['telefono_whatsapp']:
-                        update_fields['telefono_whatsapp'] = data['telefono_whatsapp']
-                        
-                    if update_fields:
-                        Candidato.objects.filter(pk=data['DNI']).update(**update_fields)
-                        updated_count += 1
-                        
-                else:
-                    # El candidato no existe, se crea
-                    Candidato.objects.create(
-                        DNI=data['DNI'],
-                        nombres_completos=data['nombres_completos'],
-                        telefono_whatsapp=data['telefono_whatsapp'],
-                        estado_actual='REGISTRADO',
-                        fecha_registro=FECHA_REGISTRO_BASE,
-                        sede_registro=data['sede_registro'],
-                        tipo_documento=data['tipo_documento'], # <<-- CAMBIO CLAVE
-                        email=None
-                    )
-                    created_count += 1
-                    
-            except ValidationError as e:
-                print(f"ERROR de validación para DNI {data['DNI']}: {e.message_dict}")
-                error_count += 1
-            except Exception as e:
-                print(f"ERROR inesperado al procesar DNI {data['DNI']}: {e}")
-                error_count += 1
+    importacion = ImportacionCandidatos(sede_defecto, tipo_documento_dni, al_cambiar=print)
+    importacion.procesar(pd.DataFrame(DATA_RAW))
 
     print("\n--- RESUMEN DE LA CARGA ---")
-    print(f"Registros leídos (total): {total_registros}")
-    print(f"Candidatos CREADOS: {created_count}")
-    print(f"Candidatos ACTUALIZADOS (datos de contacto): {updated_count}")
-    print(f"Registros con ERRORES: {error_count}")
+    for etiqueta, valor in importacion.resumen().items():
+        print(f"{etiqueta}: {valor}")
     print("¡Proceso de carga finalizado con éxito!")
 
 if __name__ == '__main__':
@@ -109,6 +109,8 @@ USE_I18N = True
 USE_TZ = True
 
 HORA_LIMITE_ASISTENCIA = "7:00"
+# Después de esta hora una ENTRADA se marca como FALTA y antes de ella una SALIDA es temprana.
+HORA_LIMITE_TARDANZA = "14:00"
 
 # =========================
 # ARCHIVOS ESTÁTICOS / MEDIA
@@ -130,9 +132,17 @@ LOGIN_URL = '/login/'
 # WHATSAPP API
 # =========================
 WHATSAPP_API_VERSION = 'v19.0'
-WHATSAPP_API_URL = f'https://graph.facebook.com/{WHATSAPP_API_VERSION}/'
-WHATSAPP_PHONE_ID = '96582358756'
-WHATSAPP_ACCESS_TOKEN = 'TU_TOKEN_TEMPORAL_DE_24_HORAS'
+WHATSAPP_API_URL = env("WHATSAPP_API_URL", default=f'https://graph.facebook.com/{WHATSAPP_API_VERSION}/')
+WHATSAPP_PHONE_ID = env("WHATSAPP_PHONE_ID", default='96582358756')
+WHATSAPP_ACCESS_TOKEN = env("WHATSAPP_ACCESS_TOKEN", default='TU_TOKEN_TEMPORAL_DE_24_HORAS')
+
+# Envíos masivos: hilos concurrentes por proceso y límite global de mensajes por segundo.
+WHATSAPP_ENVIO_WORKERS = env.int("WHATSAPP_ENVIO_WORKERS", default=8)
+WHATSAPP_MENSAJES_POR_SEGUNDO = env.float("WHATSAPP_MENSAJES_POR_SEGUNDO", default=20)
+# Mensajes por día del nivel de mensajería de Meta (0 = sin límite).
+WHATSAPP_LIMITE_DIARIO = env.int("WHATSAPP_LIMITE_DIARIO", default=1000)
+# Prefijo de país para normalizar telefono_whatsapp (9 dígitos) a E.164.
+WHATSAPP_CODIGO_PAIS = env("WHATSAPP_CODIGO_PAIS", default='51')
 
 # =========================
 # LOGGING (FIJO, SIN ERRORES)
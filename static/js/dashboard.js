@@ -752,6 +752,53 @@ function initializeBulkSelectHeader() {
 
 document.addEventListener('DOMContentLoaded', initializeBulkSelectHeader);
 
+const KANBAN_SCROLL_MARGIN = 200;
+
+function loadMoreKanbanCards(column) {
+    const cursor = column.dataset.nextCursor;
+    if (!cursor || column.dataset.loading === 'true') return;
+
+    column.dataset.loading = 'true';
+
+    const params = new URLSearchParams(window.location.search);
+    params.set('cursor', cursor);
+
+    fetch(`${column.dataset.pageUrl}?${params.toString()}`, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' }
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`Error ${response.status} al cargar la columna.`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (data.status !== 'success') {
+            throw new Error(data.message || 'Respuesta inválida del servidor.');
+        }
+        column.insertAdjacentHTML('beforeend', data.html);
+        column.dataset.nextCursor = data.next_cursor || '';
+    })
+    .catch(error => {
+        console.error('Error al cargar más tarjetas:', error);
+    })
+    .finally(() => {
+        column.dataset.loading = 'false';
+    });
+}
+
+function initializeKanbanLazyLoading() {
+    document.querySelectorAll('.kanban-column-body[data-page-url]').forEach(column => {
+        column.addEventListener('scroll', () => {
+            if (column.scrollTop + column.clientHeight >= column.scrollHeight - KANBAN_SCROLL_MARGIN) {
+                loadMoreKanbanCards(column);
+            }
+        });
+    });
+}
+
+document.addEventListener('DOMContentLoaded', initializeKanbanLazyLoading);
+
 document.addEventListener('DOMContentLoaded', () => {
     document.querySelectorAll('.kanban-column-body').forEach(column => {
         column.addEventListener('dragover', allowDrop);
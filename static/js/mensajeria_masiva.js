@@ -2,6 +2,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // --- Referencias al DOM ---
     const selectProceso = document.getElementById('select-proceso');
     const selectFecha = document.getElementById('select-fecha');
+    const selectAudiencia = document.getElementById('select-audiencia');
     const totalDisponiblesText = document.getElementById('total-disponibles');
     const loadingSpinner = document.getElementById('loading-spinner');
     
@@ -207,7 +208,8 @@ document.addEventListener('DOMContentLoaded', function() {
         toggleLoading(true);
 
         try {
-            const response = await fetch(`${urlMensajeriaApi}?accion=get_contactos&proceso=${proceso}&fecha=${fecha}`);
+            const filtro = selectAudiencia ? selectAudiencia.value : '';
+            const response = await fetch(`${urlMensajeriaApi}?accion=get_contactos&proceso=${proceso}&fecha=${fecha}&filtro=${filtro}`);
             const data = await response.json();
             
             if (data.status === 'success') {
@@ -264,6 +266,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     if (selectFecha) {
         selectFecha.addEventListener('change', loadContactos);
+        if (selectAudiencia) selectAudiencia.addEventListener('change', loadContactos);
     }
 
     if (btnMoverSeleccion) btnMoverSeleccion.addEventListener('click', () => transferOptions(selectDisponibles, selectElegidos));